@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""Convert raw MPI-IO catalogs (COVMOCK_WRITER_BACKEND=mpiio) into HDF5.
+
+write_parallel_mpiio leaves `<base>.bin` plus a `<base>.json` sidecar next to where the
+HDF5 catalog would have gone. This post-processor memory-maps the binary and writes the
+chunked `<base>.hdf5` serially, off the MPI job's critical path.
+
+Usage: python mpiio_to_hdf5.py <catalog.json> [more ...] [--remove-raw]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+from covariance_mocks.hdf5_writer import convert_mpiio_to_hdf5
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert MPI-IO catalogs to HDF5")
+    parser.add_argument("headers", nargs="+", help="JSON sidecar(s) written by write_parallel_mpiio")
+    parser.add_argument("--remove-raw", action="store_true",
+                        help="Delete the .bin and .json files after a successful conversion")
+    args = parser.parse_args()
+
+    for header_path in args.headers:
+        output_path = convert_mpiio_to_hdf5(header_path)
+        print(f"{header_path} -> {output_path}")
+        if args.remove_raw:
+            os.remove(os.path.splitext(header_path)[0] + ".bin")
+            os.remove(header_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -197,6 +197,9 @@ def monitor_production(args):
         print(f"Update interval: {args.interval} seconds")
         print("Press Ctrl+C to stop monitoring\n")
         
+        # One streaming squeue for the whole session instead of one per update
+        manager.start_squeue_poller()
+        
         try:
             while True:
                 stats = manager.check_job_status()
@@ -14,7 +14,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from tests.test_catalog_validation import (
     load_hdf5_datasets,
-    compare_datasets,
+    compare_hdf5_files,
     REFERENCE_CATALOG
 )
 from tests.integration_core import MockGenerationConfig, run_full_pipeline
@@ -40,16 +40,9 @@ def validate_catalog(catalog_path, reference_path=None, tolerance=1e-10):
         return False
     
     try:
-        print("Loading reference catalog...")
-        ref_data = load_hdf5_datasets(reference_path)
-        print(f"  Found {len(ref_data)} datasets in reference")
-        
-        print("Loading test catalog...")
-        test_data = load_hdf5_datasets(catalog_path)
-        print(f"  Found {len(test_data)} datasets in test catalog")
-        
+        # Streamed chunk by chunk; neither catalog is loaded whole
         print(f"Comparing with tolerance={tolerance}...")
-        differences = compare_datasets(ref_data, test_data, tolerance=tolerance)
+        differences = compare_hdf5_files(reference_path, catalog_path, tolerance=tolerance)
         
         if len(differences) == 0:
             print("✅ VALIDATION PASSED: Catalogs are identical")
@@ -16,8 +16,8 @@ SIMULATION_BOX = "AbacusSummit_small_c000"
 
 # Import main modules when available
 try:
-    from .hdf5_writer import write_parallel_hdf5, write_single_hdf5
-    from .mpi_setup import initialize_mpi_jax, finalize_mpi
+    from .hdf5_writer import write_parallel_hdf5, write_single_hdf5, write_parallel_mpiio, convert_mpiio_to_hdf5
+    from .mpi_setup import initialize_mpi, initialize_jax, initialize_mpi_jax, finalize_mpi
     from .data_loader import load_and_filter_halos, build_abacus_path
     from .galaxy_generator import generate_galaxies
     from .utils import validate_catalog_path, generate_output_filename
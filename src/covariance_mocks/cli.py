@@ -1,8 +1,10 @@
 #!/usr/bin/env python3
 """Command-line interface for production management."""
 
+import os
 import sys
 import argparse
+import functools
 from pathlib import Path
 
 # Import the existing CLI functions
@@ -19,6 +21,7 @@ from .production_config import ConfigurationError
 def list_productions(args):
     """List all available productions."""
     try:
+        _resolve_config_cached.cache_clear()
         registry = get_registry()
         productions = registry.list_productions()
         
@@ -38,12 +41,22 @@ def list_productions(args):
         return 1
 
 
+@functools.lru_cache(maxsize=32)
+def _resolve_config_cached(name_or_path, cwd):
+    """resolve_config, memoized per name and working directory.
+    
+    Relative paths resolve against the current directory, so it is part of
+    the key. Failed lookups raise and are not cached.
+    """
+    return resolve_config(name_or_path)
+
+
 def wrap_with_config_resolution(func):
     """Wrapper to resolve config names to paths before calling original function."""
     def wrapper(args):
         try:
             # Resolve production name to config path
-            config_path = resolve_config(args.config)
+            config_path = _resolve_config_cached(args.config, os.getcwd())
             # Replace the config argument with resolved path
             args.config = config_path
             
@@ -59,9 +72,15 @@ def wrap_with_config_resolution(func):
     return wrapper
 
 
-def main():
-    """Main CLI entry point."""
+def _build_parser():
+    """Build the argument parser (once, at import).
+    
+    Subcommands record their handler by name (``handler``) and whether the
+    config argument needs resolving; main() looks both up at dispatch, so
+    the shared parser always calls the module's current functions.
+    """
     parser = argparse.ArgumentParser(
+        prog="production-manager",
         description="Production management for covariance mock generation",
         formatter_class=argparse.RawDescriptionHelpFormatter,
         epilog="""
@@ -105,50 +124,61 @@ Examples:
     
     # List command
     list_parser = subparsers.add_parser("list", help="List available productions")
-    list_parser.set_defaults(func=list_productions)
+    list_parser.set_defaults(handler="list_productions", resolve_config=False)
     
     # Initialize command
     init_parser = subparsers.add_parser("init", help="Initialize new production")
     init_parser.add_argument("config", help="Production name or configuration file path")
     init_parser.add_argument("--allow-dirty", action="store_true", 
                            help="Allow tagging with uncommitted changes (not recommended for production)")
-    init_parser.set_defaults(func=wrap_with_config_resolution(initialize_production))
+    init_parser.set_defaults(handler="initialize_production", resolve_config=True)
     
     # Stage command
     stage_parser = subparsers.add_parser("stage", help="Stage pending jobs")
     stage_parser.add_argument("config", help="Production name or configuration file path")
-    stage_parser.set_defaults(func=wrap_with_config_resolution(stage_jobs))
+    stage_parser.set_defaults(handler="stage_jobs", resolve_config=True)
     
     # Submit command
     submit_parser = subparsers.add_parser("submit", help="Submit staged jobs")
     submit_parser.add_argument("config", help="Production name or configuration file path")
-    submit_parser.set_defaults(func=wrap_with_config_resolution(submit_jobs))
+    submit_parser.set_defaults(handler="submit_jobs", resolve_config=True)
     
     # Status command
     status_parser = subparsers.add_parser("status", help="Check production status")
     status_parser.add_argument("config", help="Production name or configuration file path")
     status_parser.add_argument("--verbose", "-v", action="store_true", help="Show detailed information")
-    status_parser.set_defaults(func=wrap_with_config_resolution(check_status))
+    status_parser.set_defaults(handler="check_status", resolve_config=True)
     
     # Retry command
     retry_parser = subparsers.add_parser("retry", help="Retry failed jobs")
     retry_parser.add_argument("config", help="Production name or configuration file path")
     retry_parser.add_argument("--submit", action="store_true", help="Submit retry jobs immediately")
-    retry_parser.set_defaults(func=wrap_with_config_resolution(retry_failed))
+    retry_parser.set_defaults(handler="retry_failed", resolve_config=True)
     
     # Monitor command
     monitor_parser = subparsers.add_parser("monitor", help="Monitor production progress")
     monitor_parser.add_argument("config", help="Production name or configuration file path")
     monitor_parser.add_argument("--interval", type=int, default=60, help="Update interval in seconds (default: 60)")
-    monitor_parser.set_defaults(func=wrap_with_config_resolution(monitor_production))
+    monitor_parser.set_defaults(handler="monitor_production", resolve_config=True)
     
-    args = parser.parse_args()
+    return parser
+
+
+_PARSER = _build_parser()
+
+
+def main():
+    """Main CLI entry point."""
+    args = _PARSER.parse_args()
     
-    if not hasattr(args, 'func'):
-        parser.print_help()
+    if not hasattr(args, 'handler'):
+        _PARSER.print_help()
         return 1
     
-    return args.func(args)
+    func = globals()[args.handler]
+    if args.resolve_config:
+        func = wrap_with_config_resolution(func)
+    return func(args)
 
 
 if __name__ == "__main__":
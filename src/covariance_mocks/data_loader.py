@@ -9,7 +9,6 @@ Slab decomposition and mass filtering for distributed halo processing.
 
 import os
 import numpy as np
-import jax.numpy as jnp
 from . import LGMP_MIN
 
 
@@ -90,6 +89,7 @@ def load_and_filter_halos(catalog_path, rank=0, size=1, n_gen=None):
     - Slab decomposition splits halos by y-coordinate: rank gets [rank*Lbox/size, (rank+1)*Lbox/size)
     - Returns JAX arrays with float32 dtype for GPU compatibility
     """
+    import jax.numpy as jnp
     from rgrspit_diffsky.data_loaders import load_abacus
     
     # Load halo catalog (all ranks load the same data initially)
@@ -7,7 +7,6 @@ Manages batch processing and random key management for galaxy population.
 Coordinates galaxy population using rgrspit_diffsky with batch processing.
 """
 
-from jax import random as jran
 from . import CURRENT_Z_OBS, LGMP_MIN
 
 # Lean SFR-only output (2026-06-16 amendment). The deliverable carries no line
@@ -69,6 +68,7 @@ def generate_galaxies(logmhost, halo_radius, halo_pos, halo_vel, Lbox, rank=0, z
     - Uses z_obs parameter if provided, otherwise falls back to CURRENT_Z_OBS constant
     - Galaxy catalog includes satellite galaxies via synthetic subhalo population
     """
+    from jax import random as jran
     from dsps.cosmology import DEFAULT_COSMOLOGY
     from rgrspit_diffsky import mc_galpop
     
@@ -9,9 +9,405 @@ Parallel HDF5 writing with MPI collective I/O operations.
 """
 
 import os
+import json
+import atexit
+import hashlib
+import shutil
+import subprocess
+from enum import IntEnum
+
 import numpy as np
 import h5py
 
+try:
+    import hdf5plugin
+except ImportError:
+    # LZ4 filter unavailable; COVMOCK_COMPRESSION=lz4 falls back to gzip
+    hdf5plugin = None
+
+
+# Upper bound on the size of a single chunk of a partitioned dataset
+_MAX_CHUNK_BYTES = 64 * 1024 * 1024
+
+
+class _FieldKind(IntEnum):
+    """How a catalog field is laid out across MPI ranks."""
+    GLOBAL = 0  # Shared by all ranks, written once by rank 0
+    ROW_1D = 1  # (n,) partitioned along axis 0
+    ROW_2D = 2  # Table arrays (n, n_features) partitioned along axis 0
+    COL_2D = 3  # Parameter arrays (n_params, n), stored transposed as (n, n_params)
+
+
+# Fields whose kind is not implied by their dimensionality alone
+_GAL_FIELD_KIND = {
+    't_table': _FieldKind.GLOBAL,
+    't0': _FieldKind.GLOBAL,
+    'z_obs': _FieldKind.GLOBAL,
+    't_obs': _FieldKind.GLOBAL,
+    'log_mah_table': _FieldKind.ROW_2D,
+    'sfh_table': _FieldKind.ROW_2D,
+    'pos': _FieldKind.ROW_2D,
+    'vel': _FieldKind.ROW_2D,
+}
+_HALO_FIELD_KIND = {
+    'pos': _FieldKind.ROW_2D,
+    'vel': _FieldKind.ROW_2D,
+}
+
+# Per-kind dispatch, indexed by _FieldKind: global dataset shape from a local
+# shape and the total count, partitioned axis, and a rank's slab selection.
+# Parameter arrays are stored row-major so every rank's slab is one contiguous
+# file range rather than a strided column block
+_DATASET_SHAPE = (
+    lambda shape, n: tuple(shape),
+    lambda shape, n: (n,),
+    lambda shape, n: (n, shape[1]),
+    lambda shape, n: (n, shape[0]),
+)
+_PARTITION_AXIS = (None, 0, 0, 0)
+_SLAB_SELECTION = (
+    lambda start, end: (),
+    lambda start, end: np.s_[start:end],
+    lambda start, end: np.s_[start:end, :],
+    lambda start, end: np.s_[start:end, :],
+)
+
+
+# Reduced on-disk precision for bulky float fields, applied when
+# COVMOCK_QUANTIZE=1 (single precision is ample for positions, velocities and
+# tabulated histories, and halves the bytes written)
+_PRECISION = {
+    'pos': 'f4',
+    'vel': 'f4',
+    'sfh_table': 'f4',
+    'log_mah_table': 'f4',
+}
+
+
+def _storage_dtype(key, dtype):
+    """On-disk dtype for a field, narrowed per _PRECISION when quantizing."""
+    dtype = np.dtype(dtype)
+    target = _PRECISION.get(key)
+    if (target is None or os.environ.get('COVMOCK_QUANTIZE') != '1'
+            or dtype.kind != 'f' or dtype.itemsize <= np.dtype(target).itemsize):
+        return dtype
+    return np.dtype(target)
+
+
+# Decimal digits kept by the Scale-Offset filter for position-like fields
+# (3 digits ~ kpc/h), applied on top of compression when COVMOCK_QUANTIZE=1
+_SCALEOFFSET_DIGITS = {
+    'pos': 3,
+}
+
+
+def _compression_kwargs(key, dtype):
+    """Filter keywords for a chunked dataset, selected by COVMOCK_COMPRESSION.
+    
+    ``gzip`` uses level 1 with byte shuffling and ``lz4`` uses the
+    ``hdf5plugin`` LZ4 filter (gzip if the plugin is not installed); anything
+    else leaves the dataset uncompressed. When quantizing, float fields listed
+    in ``_SCALEOFFSET_DIGITS`` are additionally rounded by the Scale-Offset
+    filter, which replaces the shuffle.
+    """
+    mode = os.environ.get('COVMOCK_COMPRESSION', '').lower()
+    if mode == 'lz4' and hdf5plugin is not None:
+        kwargs = dict(hdf5plugin.LZ4(nbytes=0))
+    elif mode in ('gzip', 'lz4'):
+        kwargs = {'compression': 'gzip', 'compression_opts': 1}
+    else:
+        return {}
+    digits = _SCALEOFFSET_DIGITS.get(key)
+    if (digits is not None and np.dtype(dtype).kind == 'f'
+            and os.environ.get('COVMOCK_QUANTIZE') == '1'):
+        kwargs['scaleoffset'] = digits
+    else:
+        kwargs['shuffle'] = True
+    return kwargs
+
+
+# Galaxy fields known to be plain arrays, which skip the namedtuple check
+_ARRAY_KEYS = frozenset((
+    'pos', 'vel', 'upid',
+    'logsm_t_obs', 'logssfr_t_obs', 'logmp_t_obs',
+    'z_obs', 't_obs', 't0', 't_table',
+    'log_mah_table', 'sfh_table',
+))
+
+
+def _ragged_components(key, value):
+    """Components of a namedtuple field that cannot be stacked into one array.
+    
+    Returns a list of ``(field_name, array)`` when ``value`` is a namedtuple
+    whose components differ in shape, and None otherwise (plain arrays and
+    namedtuples that ``np.asarray`` stacks into an (n_params, n) block).
+    """
+    if key in _ARRAY_KEYS:
+        return None
+    fields = getattr(value, '_fields', None)
+    if fields is None:
+        return None
+    components = [(name, np.asarray(getattr(value, name))) for name in fields]
+    if len({arr.shape for _, arr in components}) <= 1:
+        return None
+    return components
+
+
+def _galaxy_arrays(galcat, split_ragged=True):
+    """Convert every galaxy field to an ndarray once, before any dataset is made.
+    
+    Namedtuple fields whose components cannot be stacked are expanded into
+    ``{key}_{field}`` entries, or dropped when ``split_ragged`` is False.
+    """
+    arrays = {}
+    for key, value in galcat.items():
+        components = _ragged_components(key, value)
+        if components is None:
+            arrays[key] = np.asarray(value)
+        elif split_ragged:
+            for field_name, field_value in components:
+                arrays[f'{key}_{field_name}'] = field_value
+    return arrays
+
+
+def _halo_arrays(logmhost, radius, pos, vel):
+    """Convert the halo arrays once, with C-contiguous positions and velocities."""
+    return {
+        'logmhost': np.asarray(logmhost),
+        'radius': np.asarray(radius),
+        'pos': np.ascontiguousarray(pos),
+        'vel': np.ascontiguousarray(vel),
+    }
+
+
+def _field_kind(kinds, key, ndim):
+    """Look up a field's kind, defaulting on dimensionality for unlisted keys."""
+    kind = kinds.get(key)
+    if kind is None:
+        kind = (_FieldKind.GLOBAL, _FieldKind.ROW_1D, _FieldKind.COL_2D)[ndim]
+    return kind
+
+
+def _spec_fingerprint(specs):
+    """Hash the layout-defining part of dataset specs into a 62-bit integer.
+    
+    Only the key, dtype, and non-partitioned dimensions enter the hash, since
+    the partitioned length legitimately differs between ranks.
+    """
+    items = []
+    for key in sorted(specs):
+        spec = specs[key]
+        fixed = _DATASET_SHAPE[spec['kind']](spec['shape'], 0)
+        items.append((key, fixed, spec['dtype'], int(spec['kind'])))
+    digest = hashlib.sha256(repr(items).encode()).digest()
+    return int.from_bytes(digest[:8], 'little') >> 2
+
+
+def _check_specs_consistent(specs, comm):
+    """Assert that all ranks derived the same dataset layout (debug only).
+    
+    Reduces the spec fingerprint with MIN over ``(h, -h)`` so that a single
+    fixed-size Allreduce yields both the minimum and maximum fingerprint,
+    without transferring the spec dictionaries themselves.
+    """
+    from mpi4py import MPI
+    
+    fingerprint = _spec_fingerprint(specs)
+    bounds = np.array([fingerprint, -fingerprint], dtype=np.int64)
+    comm.Allreduce(MPI.IN_PLACE, bounds, op=MPI.MIN)
+    if bounds[0] != -bounds[1]:
+        raise RuntimeError(
+            f"Rank {comm.Get_rank()}: dataset specs differ between MPI ranks"
+        )
+
+
+def _collective_dxpl():
+    """Dataset transfer property list requesting collective MPI-IO."""
+    dxpl = h5py.h5p.create(h5py.h5p.DATASET_XFER)
+    dxpl.set_dxpl_mpio(h5py.h5fd.MPIO_COLLECTIVE)
+    return dxpl
+
+
+def _write_collective(dset, arr=None, selection=()):
+    """Write ``arr`` into ``dset[selection]`` with collective MPI-IO transfer.
+    
+    Collective transfers require every rank to take part in every write, so a
+    rank with nothing to contribute (``arr`` is None or empty) issues a
+    zero-sized write against an empty file selection instead of skipping.
+    """
+    if arr is not None and arr.size > 0:
+        # Cast in numpy: HDF5 falls back to independent I/O when it has to
+        # convert datatypes during a collective transfer
+        if arr.dtype != dset.dtype:
+            arr = arr.astype(dset.dtype)
+        if not arr.flags.c_contiguous:
+            arr = np.ascontiguousarray(arr)
+        with dset.collective:
+            dset[selection] = arr
+    else:
+        file_space = dset.id.get_space()
+        file_space.select_none()
+        mem_space = h5py.h5s.create_simple((1,))
+        mem_space.select_none()
+        dset.id.write(mem_space, file_space, np.empty((1,), dtype=dset.dtype),
+                      dxpl=_collective_dxpl())
+
+
+def _write_all_collective(writes):
+    """Issue a plan of ``(dset, arr, selection)`` writes as collective transfers.
+    
+    h5py has no binding for HDF5's multi-dataset write, so the plan is issued
+    back-to-back, grouped by file datatype so that consecutive transfers reuse
+    the same type conversion path. The order only depends on the datasets,
+    which are identical on every rank, so the collective calls still match.
+    """
+    for dset, arr, selection in sorted(writes, key=lambda w: w[0].dtype.str):
+        _write_collective(dset, arr, selection)
+
+
+def _mpi_io_info():
+    """Build MPI-IO hints for the parallel output file.
+    
+    Enables collective buffering with 16 MiB aggregation buffers and, for
+    Lustre, sets the stripe size (``COVMOCK_STRIPE_UNIT``, default 8 MiB).
+    The stripe count and number of aggregators are only set when
+    ``COVMOCK_STRIPE_COUNT`` / ``COVMOCK_CB_NODES`` are given, otherwise
+    the MPI library picks them.
+    """
+    from mpi4py import MPI
+    
+    info = MPI.Info.Create()
+    info.Set('romio_cb_write', 'enable')
+    info.Set('cb_buffer_size', '16777216')
+    info.Set('striping_unit', os.environ.get('COVMOCK_STRIPE_UNIT', '8388608'))
+    stripe_count = os.environ.get('COVMOCK_STRIPE_COUNT')
+    if stripe_count:
+        info.Set('striping_factor', stripe_count)
+    cb_nodes = os.environ.get('COVMOCK_CB_NODES', stripe_count)
+    if cb_nodes:
+        info.Set('cb_nodes', cb_nodes)
+    return info
+
+
+def _set_lustre_striping(directory):
+    """Stripe the output directory to match the aggregator count (best effort).
+    
+    Only applies when ``COVMOCK_STRIPE_COUNT`` is set and ``lfs`` is on the
+    PATH; failures are ignored since striping is purely a performance hint.
+    """
+    stripe_count = os.environ.get('COVMOCK_STRIPE_COUNT')
+    if not stripe_count or shutil.which('lfs') is None:
+        return
+    stripe_unit = os.environ.get('COVMOCK_STRIPE_UNIT', '8388608')
+    subprocess.run(
+        ['lfs', 'setstripe', '-c', stripe_count, '-S', stripe_unit, directory],
+        capture_output=True,
+        check=False
+    )
+
+
+def _file_access_kwargs():
+    """File-access tuning for the parallel output file.
+    
+    With ``COVMOCK_HDF5_ALIGN`` set (e.g. 8388608, the Lustre stripe size),
+    aligns large objects to that block size and allocates metadata in blocks
+    of the same size. Objects smaller than an eighth of the alignment are left
+    unaligned so scalar and small global datasets do not pad the file. Unset,
+    the default HDF5 layout is kept, so catalogs stay byte-identical to the
+    reference.
+    """
+    alignment = os.environ.get('COVMOCK_HDF5_ALIGN')
+    if not alignment:
+        return {}
+    alignment = int(alignment)
+    return {
+        'alignment_threshold': max(1, alignment // 8),
+        'alignment_interval': alignment,
+        'meta_block_size': alignment,
+    }
+
+
+# Environment variables that shape the MPI-IO hints and file-access tuning
+_FAPL_ENV = (
+    'COVMOCK_STRIPE_UNIT',
+    'COVMOCK_STRIPE_COUNT',
+    'COVMOCK_CB_NODES',
+    'COVMOCK_HDF5_ALIGN',
+)
+
+# MPI.Info and file-access keywords per communicator and tuning, reused
+# across files; the Info objects are freed at exit
+_FAPL_CACHE = {}
+_fapl_cache_registered = False
+
+
+def _clear_fapl_cache():
+    """Free the cached MPI.Info objects."""
+    for info, _ in _FAPL_CACHE.values():
+        info.Free()
+    _FAPL_CACHE.clear()
+
+
+def _get_fapl(comm):
+    """Cached ``(info, file_access_kwargs)`` for parallel files on ``comm``.
+    
+    Registered with atexit on first use, i.e. after mpi4py has registered its
+    own finalization, so the cache is freed before MPI_Finalize runs.
+    """
+    global _fapl_cache_registered
+    key = (comm.py2f(),) + tuple(os.environ.get(name) for name in _FAPL_ENV)
+    if key not in _FAPL_CACHE:
+        if not _fapl_cache_registered:
+            atexit.register(_clear_fapl_cache)
+            _fapl_cache_registered = True
+        _FAPL_CACHE[key] = (_mpi_io_info(), _file_access_kwargs())
+    return _FAPL_CACHE[key]
+
+
+def _partition_chunks(shape, dtype, partition_axis):
+    """Chunk shape covering whole rows of the partitioned axis.
+    
+    The chunk length along ``partition_axis`` is ``COVMOCK_CHUNK`` (default
+    2**20) elements, clamped to the dataset length and to at most
+    ``_MAX_CHUNK_BYTES`` per chunk; the other axes are not split. Returns None
+    (contiguous layout) for global datasets and empty partitions.
+    """
+    if partition_axis is None or shape[partition_axis] == 0:
+        return None
+    row_nbytes = np.dtype(dtype).itemsize
+    for axis, length in enumerate(shape):
+        if axis != partition_axis:
+            row_nbytes *= max(1, length)
+    chunk_len = int(os.environ.get('COVMOCK_CHUNK', 1 << 20))
+    chunk_len = min(chunk_len, shape[partition_axis], _MAX_CHUNK_BYTES // row_nbytes)
+    chunks = list(shape)
+    chunks[partition_axis] = max(1, chunk_len)
+    return tuple(max(1, c) for c in chunks)
+
+
+def _create_dataset(f, name, shape, dtype, partition_axis=None):
+    """Create a dataset in the parallel output file.
+    
+    By default datasets are contiguous with HDF5's default creation
+    properties, so catalogs stay byte-identical to the reference. Setting
+    ``COVMOCK_CHUNK`` or ``COVMOCK_COMPRESSION`` opts into the chunked
+    layout: datasets partitioned across ranks are chunked along
+    ``partition_axis`` so that ranks own whole chunks away from their slab
+    boundaries, those chunks are compressed according to
+    ``COVMOCK_COMPRESSION``, and space is allocated at creation with fill
+    values never written (every element is overwritten by the rank
+    hyperslabs, so writing fill bytes first would only double the I/O).
+    """
+    if not (os.environ.get('COVMOCK_CHUNK') or os.environ.get('COVMOCK_COMPRESSION')):
+        return f.create_dataset(name, shape, dtype=dtype)
+    dcpl = h5py.h5p.create(h5py.h5p.DATASET_CREATE)
+    dcpl.set_fill_time(h5py.h5d.FILL_TIME_NEVER)
+    dcpl.set_alloc_time(h5py.h5d.ALLOC_TIME_EARLY)
+    chunks = _partition_chunks(shape, dtype, partition_axis)
+    filters = _compression_kwargs(name.rsplit('/', 1)[-1], dtype) if chunks else {}
+    return f.create_dataset(name, shape, dtype=dtype, chunks=chunks,
+                            dcpl=dcpl, **filters)
+
 
 def write_single_hdf5(galcat, plot_logmhost, plot_halo_radius, plot_halo_pos, plot_halo_vel, output_path, Lbox, z_obs=None):
     """
@@ -44,32 +440,42 @@ def write_single_hdf5(galcat, plot_logmhost, plot_halo_radius, plot_halo_pos, pl
     - Saves halo properties under 'halos/' group  
     - Includes metadata attributes: Lbox, z_obs, lgmp_min, n_halos, n_galaxies
     - Handles structured data by saving components separately
+    - Stores parameter arrays row-major as (n_galaxies, n_params), flagged by
+      the ``param_layout = 'row_major'`` file attribute; files without
+      parameter arrays (e.g. the lean production output) carry no flag
+    - With ``COVMOCK_QUANTIZE=1``, float64 positions, velocities and history
+      tables are stored as float32
+    - ``COVMOCK_COMPRESSION=gzip|lz4`` compresses the non-scalar datasets
     """
     from . import CURRENT_Z_OBS, LGMP_MIN, SIMULATION_BOX, CURRENT_PHASE, CURRENT_REDSHIFT
     
+    # Convert inputs (e.g. JAX arrays) to numpy once
+    gal_arrays = _galaxy_arrays(galcat)
+    halo_arrays = _halo_arrays(plot_logmhost, plot_halo_radius, plot_halo_pos, plot_halo_vel)
+    
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
     
     with h5py.File(output_path, 'w') as f:
-        # Save galaxy properties
-        for key, value in galcat.items():
-            try:
-                # Convert to numpy array with consistent shape
-                arr_value = np.array(value)
-                f.create_dataset(f'galaxies/{key}', data=arr_value)
-            except ValueError as e:
-                # Handle structured data or complex objects
-                print(f"Skipping {key} due to shape issue: {e}")
-                # For structured data like DiffmahParams, save components separately
-                if hasattr(value, '_fields'):
-                    for field_name in value._fields:
-                        field_value = getattr(value, field_name)
-                        f.create_dataset(f'galaxies/{key}_{field_name}', data=np.array(field_value))
+        has_params = False
+        # Save galaxy properties (structured data like DiffmahParams with
+        # mismatched component shapes arrives as separate components)
+        for key, arr_value in gal_arrays.items():
+            arr_value = arr_value.astype(_storage_dtype(key, arr_value.dtype), copy=False)
+            if _field_kind(_GAL_FIELD_KIND, key, arr_value.ndim) == _FieldKind.COL_2D:
+                # Same row-major (n_galaxies, n_params) layout as the parallel writers
+                arr_value = np.ascontiguousarray(arr_value.T)
+                has_params = True
+            filters = _compression_kwargs(key, arr_value.dtype) if arr_value.ndim and arr_value.size else {}
+            f.create_dataset(f'galaxies/{key}', data=arr_value, **filters)
         
         # Save halo properties used for generation
-        f.create_dataset('halos/logmhost', data=np.array(plot_logmhost))
-        f.create_dataset('halos/radius', data=np.array(plot_halo_radius))
-        f.create_dataset('halos/pos', data=np.array(plot_halo_pos))
-        f.create_dataset('halos/vel', data=np.array(plot_halo_vel))
+        for key, arr_value in halo_arrays.items():
+            arr_value = arr_value.astype(_storage_dtype(key, arr_value.dtype), copy=False)
+            if _field_kind(_HALO_FIELD_KIND, key, arr_value.ndim) == _FieldKind.COL_2D:
+                arr_value = np.ascontiguousarray(arr_value.T)
+                has_params = True
+            filters = _compression_kwargs(key, arr_value.dtype) if arr_value.size else {}
+            f.create_dataset(f'halos/{key}', data=arr_value, **filters)
         
         # Save metadata
         actual_z_obs = z_obs if z_obs is not None else CURRENT_Z_OBS
@@ -85,10 +491,12 @@ def write_single_hdf5(galcat, plot_logmhost, plot_halo_radius, plot_halo_pos, pl
         f.attrs['redshift'] = redshift_str
         f.attrs['mpi_rank'] = 0
         f.attrs['mpi_size'] = 1
+        if has_params:
+            f.attrs['param_layout'] = 'row_major'
 
 
 def write_parallel_hdf5(galcat, plot_logmhost, plot_halo_radius, plot_halo_pos, plot_halo_vel, 
-                       output_path, rank, size, comm, Lbox, z_obs=None):
+                       output_path, rank, size, comm, Lbox, z_obs=None, writer_backend=None):
     """
     Write galaxy catalog using parallel HDF5 for multiple MPI ranks.
     
@@ -120,188 +528,152 @@ def write_parallel_hdf5(galcat, plot_logmhost, plot_halo_radius, plot_halo_pos,
     z_obs : float, optional
         Observational redshift used for galaxy calculations.
         If None, uses CURRENT_Z_OBS from constants
+    writer_backend : str, optional
+        ``'hdf5'`` (default) or ``'mpiio'`` to write a raw binary plus JSON
+        sidecar with write_parallel_mpiio instead. If None, taken from
+        ``COVMOCK_WRITER_BACKEND``
         
     Notes
     -----
     - Uses MPI collective operations to coordinate writes
-    - Gathers counts and calculates offsets for contiguous data layout
+    - Allgathers counts and calculates offsets for contiguous data layout
     - All ranks write to same file using parallel HDF5
+    - MPI-IO hints and Lustre striping are tunable via ``COVMOCK_STRIPE_UNIT``,
+      ``COVMOCK_STRIPE_COUNT`` and ``COVMOCK_CB_NODES``; dataset alignment is opt-in
+      via ``COVMOCK_HDF5_ALIGN``
     - Rank 0 writes metadata and creates file structure
     - Includes temporary rank files cleanup after successful write
     - Handles galaxy and halo data with proper offset calculations
+    - Per-rank slab ranges are printed only with ``COVMOCK_VERBOSE=1``
+    - Stores parameter arrays row-major as (n_galaxies, n_params), flagged by
+      the ``param_layout = 'row_major'`` file attribute; files without
+      parameter arrays (e.g. the lean production output) carry no flag
+    - With ``COVMOCK_QUANTIZE=1``, float64 positions, velocities and history
+      tables are stored as float32
+    - ``COVMOCK_COMPRESSION=gzip|lz4`` compresses the chunked per-rank
+      datasets; parallel HDF5 then requires the collective writes used here
     """
     from . import CURRENT_Z_OBS, LGMP_MIN, SIMULATION_BOX, CURRENT_PHASE, CURRENT_REDSHIFT
     
-    # Step 1: Gather galaxy and halo counts from all ranks
+    if writer_backend is None:
+        writer_backend = os.environ.get('COVMOCK_WRITER_BACKEND', 'hdf5')
+    if writer_backend == 'mpiio':
+        return write_parallel_mpiio(galcat, plot_logmhost, plot_halo_radius, plot_halo_pos,
+                                    plot_halo_vel, output_path, rank, size, comm, Lbox, z_obs)
+    if writer_backend != 'hdf5':
+        raise ValueError(f"Unknown writer backend: {writer_backend}")
+    
+    # Convert inputs (e.g. JAX arrays) to numpy once; structured fields that
+    # cannot be stacked are skipped
+    gal_arrays = _galaxy_arrays(galcat, split_ragged=False)
+    halo_arrays = _halo_arrays(plot_logmhost, plot_halo_radius, plot_halo_pos, plot_halo_vel)
+    
+    # Step 1: Exchange galaxy and halo counts across all ranks
     local_n_galaxies = len(galcat['pos'])
     local_n_halos = len(plot_logmhost)
     
-    # Gather all counts on rank 0
-    all_n_galaxies = comm.gather(local_n_galaxies, root=0)
-    all_n_halos = comm.gather(local_n_halos, root=0)
-    
-    # Broadcast totals and offsets to all ranks
-    if rank == 0:
-        total_n_galaxies = sum(all_n_galaxies)
-        total_n_halos = sum(all_n_halos)
-        
-        # Calculate galaxy offsets for each rank
-        galaxy_offsets = [0]
-        for i in range(size - 1):
-            galaxy_offsets.append(galaxy_offsets[-1] + all_n_galaxies[i])
-        
-        # Calculate halo offsets for each rank  
-        halo_offsets = [0]
-        for i in range(size - 1):
-            halo_offsets.append(halo_offsets[-1] + all_n_halos[i])
-    else:
-        total_n_galaxies = None
-        total_n_halos = None
-        galaxy_offsets = None
-        halo_offsets = None
+    # Exchange both counts in a single fixed-size Allgather (buffer protocol,
+    # no pickling) and derive totals and offsets locally on every rank
+    local_counts = np.array([local_n_galaxies, local_n_halos], dtype=np.int64)
+    all_counts = np.empty((size, 2), dtype=np.int64)
+    comm.Allgather(local_counts, all_counts)
     
-    # Broadcast to all ranks
-    total_n_galaxies = comm.bcast(total_n_galaxies, root=0)
-    total_n_halos = comm.bcast(total_n_halos, root=0)
-    galaxy_offsets = comm.bcast(galaxy_offsets, root=0)
-    halo_offsets = comm.bcast(halo_offsets, root=0)
+    # One prefix sum over both columns yields every offset and, in its last
+    # row, the totals, so no separate reduction (and no extra collective)
+    # is needed: row r holds the counts of ranks 0..r-1
+    offsets = np.zeros((size + 1, 2), dtype=np.int64)
+    np.cumsum(all_counts, axis=0, out=offsets[1:])
+    total_n_galaxies, total_n_halos = offsets[-1].tolist()
     
     # Calculate this rank's slice indices
-    galaxy_start = galaxy_offsets[rank]
+    galaxy_start, halo_start = offsets[rank].tolist()
     galaxy_end = galaxy_start + local_n_galaxies
-    halo_start = halo_offsets[rank]
     halo_end = halo_start + local_n_halos
     
-    print(f"Rank {rank}: writing galaxies [{galaxy_start}:{galaxy_end}] and halos [{halo_start}:{halo_end}]")
-    comm.Barrier()
+    if os.environ.get('COVMOCK_VERBOSE') == '1':
+        print(f"Rank {rank}: writing galaxies [{galaxy_start}:{galaxy_end}] and halos [{halo_start}:{halo_end}]")
     
-    # Step 2: Create file and datasets on all ranks simultaneously
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    # Step 2: Create file and datasets on all ranks simultaneously. Only rank 0
+    # touches the directory (one mkdir on the metadata server instead of one
+    # per rank); the barrier keeps other ranks from opening the file early
+    if rank == 0:
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        _set_lustre_striping(os.path.dirname(output_path))
+    comm.Barrier()
 
-    # Gather dataset specifications from all ranks to ensure consistency
-    
-    # Define which fields are global/shared vs per-galaxy
-    global_fields = {'t_table', 't0', 'z_obs', 't_obs'}
+    # Dataset specifications are derived locally: every rank holds the same
+    # galcat keys with identical non-partitioned dimensions and dtypes, so no
+    # exchange is needed to agree on the file layout
+    canonical_specs = {}
+    for key, arr_value in gal_arrays.items():
+        if len(arr_value.shape) <= 2:  # Only handle 0D, 1D and 2D arrays
+            canonical_specs[key] = {
+                'shape': arr_value.shape,
+                'dtype': str(_storage_dtype(key, arr_value.dtype)),
+                'kind': _field_kind(_GAL_FIELD_KIND, key, arr_value.ndim)
+            }
     
-    local_dataset_specs = {}
-    for key, value in galcat.items():
-        try:
-            arr_value = np.array(value)
-            if len(arr_value.shape) <= 2:  # Only handle 1D and 2D arrays
-                local_dataset_specs[key] = {
-                    'shape': arr_value.shape,
-                    'dtype': str(arr_value.dtype),
-                    'is_global': key in global_fields
-                }
-        except ValueError:
-            pass  # Skip problematic arrays
-    
-    # Gather all specs and take rank 0's specs as canonical
-    all_specs = comm.gather(local_dataset_specs, root=0)
-    if rank == 0:
-        # Use rank 0's specs as the canonical set
-        canonical_specs = all_specs[0]
-    else:
-        canonical_specs = None
-    canonical_specs = comm.bcast(canonical_specs, root=0)
+    if os.environ.get('COVMOCK_DEBUG_SPECS') == '1':
+        _check_specs_consistent(canonical_specs, comm)
     
-    with h5py.File(output_path, 'w', driver='mpio', comm=comm) as f:
-        # All ranks create the same datasets based on rank 0's specs
+    info, access_kwargs = _get_fapl(comm)
+    with h5py.File(output_path, 'w', driver='mpio', comm=comm, info=info,
+                   **access_kwargs) as f:
+        # All ranks create the same datasets from their (identical) specs;
+        # the field kind selects the global shape and partitioned axis
         galaxy_datasets = {}
         for key, spec in canonical_specs.items():
-            shape = spec['shape']
-            dtype = spec['dtype']
-            is_global = spec.get('is_global', False)
-            
-            if is_global:
-                # Global/shared data: keep original shape
-                if len(shape) == 0:  # Scalar
-                    dset = f.create_dataset(f'galaxies/{key}', (), dtype=dtype)
-                else:  # Shared array like t_table
-                    dset = f.create_dataset(f'galaxies/{key}', shape, dtype=dtype)
-            elif len(shape) == 1:
-                # 1D array: (n_galaxies,)
-                dset = f.create_dataset(f'galaxies/{key}', (total_n_galaxies,), dtype=dtype)
-            elif len(shape) == 2:
-                if key in ['log_mah_table', 'sfh_table', 'pos', 'vel']:
-                    # Table arrays: (n_galaxies, n_features)
-                    dset = f.create_dataset(f'galaxies/{key}', (total_n_galaxies, shape[1]), dtype=dtype)
-                else:
-                    # Parameter arrays: (n_params, n_galaxies)
-                    dset = f.create_dataset(f'galaxies/{key}', (shape[0], total_n_galaxies), dtype=dtype)
-            galaxy_datasets[key] = dset
+            kind = spec['kind']
+            galaxy_datasets[key] = _create_dataset(
+                f, f'galaxies/{key}', _DATASET_SHAPE[kind](spec['shape'], total_n_galaxies),
+                spec['dtype'], _PARTITION_AXIS[kind]
+            )
         
         # Create halo datasets
         halo_datasets = {}
-        halo_data = {
-            'logmhost': plot_logmhost,
-            'radius': plot_halo_radius,
-            'pos': plot_halo_pos,
-            'vel': plot_halo_vel
-        }
-        
-        for key, value in halo_data.items():
-            arr_value = np.array(value)
-            if len(arr_value.shape) == 1:
-                # 1D array: (n_halos,)
-                dset = f.create_dataset(f'halos/{key}', (total_n_halos,), dtype=arr_value.dtype)
-            elif len(arr_value.shape) == 2:
-                if key in ['pos', 'vel']:
-                    # Table arrays: (n_halos, n_features)
-                    dset = f.create_dataset(f'halos/{key}', (total_n_halos, arr_value.shape[1]), dtype=arr_value.dtype)
-                else:
-                    # Parameter arrays: (n_params, n_halos)
-                    dset = f.create_dataset(f'halos/{key}', (arr_value.shape[0], total_n_halos), dtype=arr_value.dtype)
-            halo_datasets[key] = dset
-        
-        # Step 3: Each rank writes its data to its slice
-        comm.Barrier()
+        for key, arr_value in halo_arrays.items():
+            kind = _field_kind(_HALO_FIELD_KIND, key, arr_value.ndim)
+            halo_datasets[key] = _create_dataset(
+                f, f'halos/{key}', _DATASET_SHAPE[kind](arr_value.shape, total_n_halos),
+                _storage_dtype(key, arr_value.dtype), _PARTITION_AXIS[kind]
+            )
         
+        # Step 3: Each rank writes its data to its slice. Dataset creation
+        # and the collective writes synchronize the ranks themselves, so no
+        # explicit barriers are needed between the steps
+        # Collect every galaxy and halo write into one plan, then issue them
+        # as collective transfers so HDF5 can aggregate the per-rank
+        # hyperslabs into a few large MPI-IO calls
+        writes = []
+        has_params = False
         for key, dset in galaxy_datasets.items():
-            if key not in galcat:
-                continue
-            arr_value = np.array(galcat[key])
-            spec = canonical_specs[key]
-            is_global = spec.get('is_global', False)
-            
-            if is_global:
-                # Global data: only rank 0 writes, and writes entire array
-                if rank == 0:
-                    if len(arr_value.shape) == 0:  # Scalar
-                        dset[()] = arr_value
-                    else:  # Shared array like t_table
-                        dset[:] = arr_value
-            elif len(arr_value.shape) == 1:
-                # 1D array: write to [start:end]
-                if arr_value.shape[0] != (galaxy_end - galaxy_start):
-                    continue
-                dset[galaxy_start:galaxy_end] = arr_value
-            elif len(arr_value.shape) == 2:
-                if key in ['log_mah_table', 'sfh_table', 'pos', 'vel']:
-                    # Table arrays: write to [start:end, :]
-                    dset[galaxy_start:galaxy_end, :] = arr_value
-                else:
-                    # Parameter arrays: write to [:, start:end]
-                    dset[:, galaxy_start:galaxy_end] = arr_value
-        
+            arr_value = gal_arrays[key]
+            kind = canonical_specs[key]['kind']
+            if kind == _FieldKind.GLOBAL:
+                # Global data: only rank 0 contributes, and writes entire array
+                writes.append((dset, arr_value if rank == 0 else None, ()))
+            elif kind == _FieldKind.ROW_1D and arr_value.shape[0] != local_n_galaxies:
+                # Not per-galaxy after all: nothing to write from this rank
+                writes.append((dset, None, ()))
+            elif kind == _FieldKind.COL_2D:
+                # Transposed to the row-major (n_galaxies, n_params) layout
+                writes.append((dset, np.ascontiguousarray(arr_value.T),
+                               _SLAB_SELECTION[kind](galaxy_start, galaxy_end)))
+                has_params = True
+            else:
+                writes.append((dset, arr_value, _SLAB_SELECTION[kind](galaxy_start, galaxy_end)))
         
         for key, dset in halo_datasets.items():
-            arr_value = np.array(halo_data[key])
-            if len(arr_value.shape) == 1:
-                # 1D array: write to [start:end]
-                dset[halo_start:halo_end] = arr_value
-            elif len(arr_value.shape) == 2:
-                if key in ['pos', 'vel']:
-                    # Table arrays: write to [start:end, :]
-                    dset[halo_start:halo_end, :] = arr_value
-                else:
-                    # Parameter arrays: write to [:, start:end]
-                    dset[:, halo_start:halo_end] = arr_value
+            arr_value = halo_arrays[key]
+            kind = _field_kind(_HALO_FIELD_KIND, key, arr_value.ndim)
+            if kind == _FieldKind.COL_2D:
+                arr_value = np.ascontiguousarray(arr_value.T)
+                has_params = True
+            writes.append((dset, arr_value, _SLAB_SELECTION[kind](halo_start, halo_end)))
         
+        _write_all_collective(writes)
         
         # Step 4: ALL RANKS write metadata collectively
-        comm.Barrier()
-        
         # COLLECTIVE METADATA OPERATIONS - all ranks participate
         actual_z_obs = z_obs if z_obs is not None else CURRENT_Z_OBS
         redshift_str = f"z{actual_z_obs:.3f}"
@@ -316,85 +688,271 @@ def write_parallel_hdf5(galcat, plot_logmhost, plot_halo_radius, plot_halo_pos,
         f.attrs['redshift'] = redshift_str
         f.attrs['mpi_parallel'] = True
         f.attrs['mpi_size'] = size
+        if has_params:
+            f.attrs['param_layout'] = 'row_major'
+    # Closing the file is collective, so every rank has finished writing by
+    # the time it returns here
+
+
+def _mpiio_paths(output_path):
+    """Raw binary and JSON sidecar paths for an MPI-IO catalog."""
+    base_path, _ = os.path.splitext(output_path)
+    return f"{base_path}.bin", f"{base_path}.json"
 
+
+def write_parallel_mpiio(galcat, plot_logmhost, plot_halo_radius, plot_halo_pos, plot_halo_vel,
+                         output_path, rank, size, comm, Lbox, z_obs=None):
+    """
+    Write galaxy catalog as a raw MPI-IO binary plus JSON sidecar.
+    
+    Alternative to write_parallel_hdf5 for the production hot path: every
+    dataset occupies one contiguous byte region of a shared binary file, laid
+    out exactly as the HDF5 dataset would be, and each rank writes its slab
+    of every region with ``MPI.File.Write_at_all``. Rank 0 then writes a JSON
+    sidecar holding the dtype, shape and byte offset of each dataset and the
+    file attributes. Use convert_mpiio_to_hdf5 (or scripts/mpiio_to_hdf5.py)
+    to produce the HDF5 catalog offline.
+    
+    Parameters
+    ----------
+    Same as write_parallel_hdf5. ``output_path`` is the eventual HDF5 path;
+    the raw data goes to ``<base>.bin`` and the sidecar to ``<base>.json``.
+    
+    Notes
+    -----
+    - One collective write per dataset, issued in the same order on all ranks
+    - Global arrays (t_table, z_obs, ...) are written by rank 0 only
+    - Same row-major parameter layout and ``COVMOCK_QUANTIZE`` storage dtypes
+      as write_parallel_hdf5
+    """
+    from mpi4py import MPI
+    from . import CURRENT_Z_OBS, LGMP_MIN, SIMULATION_BOX, CURRENT_PHASE
+    
+    gal_arrays = _galaxy_arrays(galcat, split_ragged=False)
+    halo_arrays = _halo_arrays(plot_logmhost, plot_halo_radius, plot_halo_pos, plot_halo_vel)
+    local_n_galaxies = len(galcat['pos'])
+    local_n_halos = len(plot_logmhost)
+    
+    # Counts, offsets and totals as in write_parallel_hdf5
+    local_counts = np.array([local_n_galaxies, local_n_halos], dtype=np.int64)
+    all_counts = np.empty((size, 2), dtype=np.int64)
+    comm.Allgather(local_counts, all_counts)
+    offsets = np.zeros((size + 1, 2), dtype=np.int64)
+    np.cumsum(all_counts, axis=0, out=offsets[1:])
+    totals = offsets[-1].tolist()
+    starts = offsets[rank].tolist()
+    
+    # Byte layout: (name, array, kind, group index, global shape, dtype),
+    # derived identically on every rank
+    fields = []
+    for group, arrays, kinds in ((0, gal_arrays, _GAL_FIELD_KIND), (1, halo_arrays, _HALO_FIELD_KIND)):
+        prefix = ('galaxies', 'halos')[group]
+        for key, arr_value in arrays.items():
+            if arr_value.ndim > 2:
+                continue
+            kind = _field_kind(kinds, key, arr_value.ndim)
+            fields.append((f'{prefix}/{key}', arr_value, kind, group,
+                           _DATASET_SHAPE[kind](arr_value.shape, totals[group]),
+                           _storage_dtype(key, arr_value.dtype)))
+    
+    datasets = {}
+    region_start = 0
+    for name, _, _, _, shape, dtype in fields:
+        datasets[name] = {'dtype': dtype.str, 'shape': list(shape), 'offset': region_start}
+        region_start += int(np.prod(shape, dtype=np.int64)) * dtype.itemsize
+    
+    raw_path, header_path = _mpiio_paths(output_path)
+    if rank == 0:
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        _set_lustre_striping(os.path.dirname(output_path))
     comm.Barrier()
+    
+    info, _ = _get_fapl(comm)
+    fh = MPI.File.Open(comm, raw_path, MPI.MODE_WRONLY | MPI.MODE_CREATE, info)
+    try:
+        fh.Set_size(region_start)
+        for name, arr_value, kind, group, shape, dtype in fields:
+            byte_offset = datasets[name]['offset']
+            if kind == _FieldKind.GLOBAL:
+                block = arr_value if rank == 0 else None
+            elif kind == _FieldKind.ROW_1D and arr_value.shape[0] != all_counts[rank, group]:
+                block = None
+            else:
+                block = arr_value.T if kind == _FieldKind.COL_2D else arr_value
+                row_nbytes = int(np.prod(shape[1:], dtype=np.int64)) * dtype.itemsize
+                byte_offset += starts[group] * row_nbytes
+            if block is None or block.size == 0:
+                # Collective: ranks with nothing to write still take part
+                fh.Write_at_all(0, np.empty(0, dtype=np.uint8))
+            else:
+                block = np.ascontiguousarray(block, dtype=dtype)
+                fh.Write_at_all(byte_offset, block.reshape(-1).view(np.uint8))
+    finally:
+        fh.Close()
+    
+    if rank == 0:
+        actual_z_obs = z_obs if z_obs is not None else CURRENT_Z_OBS
+        header = {
+            'format': 'covmock-mpiio',
+            'version': 1,
+            'raw_file': os.path.basename(raw_path),
+            'datasets': datasets,
+            'attrs': {
+                'Lbox': float(Lbox),
+                'z_obs': float(actual_z_obs),
+                'lgmp_min': LGMP_MIN,
+                'n_halos': totals[1],
+                'n_galaxies': totals[0],
+                'simulation_box': SIMULATION_BOX,
+                'phase': CURRENT_PHASE,
+                'redshift': f"z{actual_z_obs:.3f}",
+                'mpi_parallel': True,
+                'mpi_size': size,
+            },
+        }
+        if any(kind == _FieldKind.COL_2D for _, _, kind, _, _, _ in fields):
+            header['attrs']['param_layout'] = 'row_major'
+        with open(header_path, 'w') as f:
+            json.dump(header, f, indent=2)
+
+
+def convert_mpiio_to_hdf5(header_path, output_path=None):
+    """
+    Convert a write_parallel_mpiio catalog into a chunked HDF5 file (serial).
+    
+    Parameters
+    ----------
+    header_path : str
+        Path to the JSON sidecar written by write_parallel_mpiio
+    output_path : str, optional
+        HDF5 file to write; defaults to the sidecar path with ``.hdf5``
+        
+    Returns
+    -------
+    str
+        Path of the HDF5 file written
+        
+    Notes
+    -----
+    The raw file is memory-mapped and copied one chunk at a time, so the
+    conversion needs little memory regardless of catalog size. Datasets are
+    chunked along rows and compressed per ``COVMOCK_COMPRESSION``.
+    """
+    with open(header_path) as f:
+        header = json.load(f)
+    if header.get('format') != 'covmock-mpiio':
+        raise ValueError(f"Not an MPI-IO catalog header: {header_path}")
+    
+    if output_path is None:
+        output_path = os.path.splitext(header_path)[0] + '.hdf5'
+    raw_path = os.path.join(os.path.dirname(header_path), header['raw_file'])
+    
+    with h5py.File(output_path, 'w') as f:
+        for name, layout in header['datasets'].items():
+            dtype = np.dtype(layout['dtype'])
+            shape = tuple(layout['shape'])
+            if not shape:
+                data = np.fromfile(raw_path, dtype=dtype, count=1, offset=layout['offset'])
+                f.create_dataset(name, data=data[0])
+                continue
+            key = name.split('/', 1)[1]
+            kinds = _GAL_FIELD_KIND if name.startswith('galaxies/') else _HALO_FIELD_KIND
+            partition_axis = None if kinds.get(key) == _FieldKind.GLOBAL else 0
+            chunks = _partition_chunks(shape, dtype, partition_axis)
+            filters = _compression_kwargs(key, dtype) if chunks else {}
+            dset = f.create_dataset(name, shape, dtype=dtype, chunks=chunks, **filters)
+            if 0 in shape:
+                continue
+            source = np.memmap(raw_path, dtype=dtype, mode='r', offset=layout['offset'], shape=shape)
+            step = chunks[0] if chunks else shape[0]
+            for start in range(0, shape[0], step):
+                dset[start:start + step] = source[start:start + step]
+            del source
+        
+        for attr_name, attr_value in header['attrs'].items():
+            f.attrs[attr_name] = attr_value
+    
+    return output_path
 
 
 def combine_mpi_files(output_path, size):
     """Combine MPI rank files into final HDF5 catalog (legacy function - not used in parallel HDF5)"""
     base_path, ext = os.path.splitext(output_path)
+    rank_paths = [f"{base_path}_rank{rank:04d}{ext}" for rank in range(size)]
     
-    # Read first file to get structure
-    rank0_path = f"{base_path}_rank0000{ext}"
-    
-    combined_galaxies = {}
-    combined_halos = {}
+    # First pass: read only shapes, dtypes and counters to size the output
+    layouts = {}
     total_n_halos = 0
     total_n_galaxies = 0
+    rank0_attrs = {}
     
-    # Read and combine all rank files
-    for rank in range(size):
-        rank_path = f"{base_path}_rank{rank:04d}{ext}"
-        print(f"Reading rank file: {rank_path}")
+    for rank, rank_path in enumerate(rank_paths):
+        if os.environ.get('COVMOCK_VERBOSE') == '1':
+            print(f"Reading rank file: {rank_path}")
         
         with h5py.File(rank_path, 'r') as f:
-            # Combine galaxy data
-            for key in f['galaxies'].keys():
-                data = np.array(f[f'galaxies/{key}'])
-                if key not in combined_galaxies:
-                    combined_galaxies[key] = [data]
-                else:
-                    combined_galaxies[key].append(data)
-            
-            # Combine halo data
-            for key in f['halos'].keys():
-                data = np.array(f[f'halos/{key}'])
-                if key not in combined_halos:
-                    combined_halos[key] = [data]
-                else:
-                    combined_halos[key].append(data)
+            for group in ('galaxies', 'halos'):
+                for key, dset in f[group].items():
+                    name = f'{group}/{key}'
+                    # Rank files come from write_single_hdf5, which stores
+                    # parameter arrays row-major like every other array, so
+                    # all non-scalars (even global ones such as t_table) are
+                    # stacked along rows
+                    axis = None if dset.ndim == 0 else 0
+                    if name not in layouts:
+                        layouts[name] = {'shape': list(dset.shape), 'dtype': dset.dtype, 'axis': axis}
+                    elif axis is not None:
+                        layouts[name]['shape'][axis] += dset.shape[axis]
             
             # Sum counters
             total_n_halos += f.attrs['n_halos']
             total_n_galaxies += f.attrs['n_galaxies']
+            
+            # Keep the first file's metadata for the combined file
+            if rank == 0:
+                rank0_attrs = dict(f.attrs)
     
     # Write combined file
     with h5py.File(output_path, 'w') as f:
-        # Save combined galaxy properties
-        for key, data_list in combined_galaxies.items():
-            
-            # Different arrays have different conventions
-            if len(data_list[0].shape) == 1:
-                concat_axis = 0
-            elif key in ['log_mah_table', 'sfh_table', 'pos', 'vel']:
-                concat_axis = 0
-            else:
-                concat_axis = 1
-            
-            combined_data = np.concatenate(data_list, axis=concat_axis)
-            f.create_dataset(f'galaxies/{key}', data=combined_data)
+        # Pre-size every combined dataset once
+        combined = {
+            name: f.create_dataset(name, tuple(layout['shape']), dtype=layout['dtype'])
+            for name, layout in layouts.items()
+        }
         
-        # Save combined halo properties  
-        for key, data_list in combined_halos.items():
-            
-            concat_axis = 1
-            
-            combined_data = np.concatenate(data_list, axis=concat_axis)
-            f.create_dataset(f'halos/{key}', data=combined_data)
+        # Second pass: copy each rank's block straight into its slice, one
+        # rank at a time, without an intermediate concatenation buffer
+        offsets = dict.fromkeys(layouts, 0)
+        for rank, rank_path in enumerate(rank_paths):
+            with h5py.File(rank_path, 'r', rdcc_nbytes=64 * 1024 * 1024) as src:
+                for name, dset in combined.items():
+                    if name not in src:
+                        continue
+                    block = src[name]
+                    axis = layouts[name]['axis']
+                    if axis is None:
+                        # Scalars are identical on every rank; keep rank 0's
+                        if rank == 0:
+                            dset[()] = block[()]
+                        continue
+                    n = block.shape[axis]
+                    selection = [slice(None)] * block.ndim
+                    selection[axis] = slice(offsets[name], offsets[name] + n)
+                    dset[tuple(selection)] = block[...]
+                    offsets[name] += n
         
         # Save metadata from first file and update counters
-        with h5py.File(rank0_path, 'r') as f0:
-            for attr_name in f0.attrs.keys():
-                if attr_name not in ['n_halos', 'n_galaxies', 'mpi_rank', 'mpi_size']:
-                    f.attrs[attr_name] = f0.attrs[attr_name]
+        for attr_name, attr_value in rank0_attrs.items():
+            if attr_name not in ('n_halos', 'n_galaxies', 'mpi_rank', 'mpi_size'):
+                f.attrs[attr_name] = attr_value
         
         f.attrs['n_halos'] = total_n_halos
         f.attrs['n_galaxies'] = total_n_galaxies
         f.attrs['mpi_combined'] = True
     
     # Clean up rank files
-    for rank in range(size):
-        rank_path = f"{base_path}_rank{rank:04d}{ext}"
+    for rank_path in rank_paths:
         if os.path.exists(rank_path):
             os.remove(rank_path)
-            print(f"Cleaned temporary file: {rank_path}")
+            if os.environ.get('COVMOCK_VERBOSE') == '1':
+                print(f"Cleaned temporary file: {rank_path}")
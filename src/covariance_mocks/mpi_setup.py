@@ -9,14 +9,13 @@ Standardizes environment-dependent device configuration and process management.
 """
 
 import os
+import shutil
+import importlib
 
 
-def initialize_mpi_jax():
+def initialize_mpi():
     """
-    Initialize MPI and JAX with proper device configuration.
-    
-    Sets up MPI communication and configures JAX for distributed computing
-    with environment-dependent device configuration.
+    Initialize MPI, falling back to single-process mode.
     
     Returns
     -------
@@ -35,10 +34,7 @@ def initialize_mpi_jax():
     -----
     - Attempts to import and initialize mpi4py for parallel execution
     - Falls back to single-process mode if MPI unavailable
-    - Configures JAX environment variables for distributed use
-    - Initializes JAX distributed backend for multi-process execution
-    - Reports JAX backend and available devices for each rank
-    - Handles GPU device configuration automatically
+    - Does not import JAX, so I/O-only callers avoid its startup cost
     """
     # MPI setup
     try:
@@ -61,24 +57,72 @@ def initialize_mpi_jax():
         size = 1
         comm = None
         print("Running in single-process mode")
+    
+    return comm, rank, size, MPI_AVAILABLE
 
+
+def initialize_jax(rank, size):
+    """
+    Import and configure JAX once the MPI layout is known.
+    
+    Parameters
+    ----------
+    rank : int
+        Process rank
+    size : int
+        Total number of MPI processes
+        
+    Returns
+    -------
+    module
+        The imported ``jax`` module
+        
+    Notes
+    -----
+    - Configures JAX environment variables for distributed use
+    - Initializes JAX distributed backend for multi-process execution
+    - Single-process runs without a visible GPU default ``JAX_PLATFORMS``
+      to ``cpu``, skipping the CUDA backend probe at import
+    - Reports JAX backend and available devices for each rank
+    """
     # Configure JAX for distributed use if needed
-    if MPI_AVAILABLE and size > 1:
+    if size > 1:
         # Configure JAX for distributed use
         os.environ['JAX_PLATFORMS'] = ''
         os.environ['JAX_DISTRIBUTED_INITIALIZE'] = 'false'
+    elif 'CUDA_VISIBLE_DEVICES' not in os.environ and shutil.which('nvidia-smi') is None:
+        os.environ.setdefault('JAX_PLATFORMS', 'cpu')
     
-    # Import JAX after MPI setup
-    import jax
-    from jax import random as jran
+    jax = importlib.import_module('jax')
     
-    if MPI_AVAILABLE and size > 1:
+    if size > 1:
         jax.distributed.initialize()
     
     # Report JAX configuration
     print(f"Rank {rank}: JAX backend: {jax.default_backend()}")
     print(f"Rank {rank}: JAX devices: {jax.devices()}")
     
+    return jax
+
+
+def initialize_mpi_jax():
+    """
+    Initialize MPI and JAX with proper device configuration.
+    
+    Sets up MPI communication and configures JAX for distributed computing
+    with environment-dependent device configuration. Equivalent to
+    ``initialize_mpi()`` followed by ``initialize_jax(rank, size)``.
+    
+    Returns
+    -------
+    tuple
+        (comm, rank, size, MPI_AVAILABLE), as returned by ``initialize_mpi()``
+    """
+    comm, rank, size, MPI_AVAILABLE = initialize_mpi()
+    
+    # Import JAX after MPI setup
+    initialize_jax(rank, size)
+    
     return comm, rank, size, MPI_AVAILABLE
 
 
@@ -91,7 +135,7 @@ def finalize_mpi(comm, rank, size, MPI_AVAILABLE):
     Parameters
     ----------
     comm : MPI.Comm or None
-        MPI communicator from initialize_mpi_jax()
+        MPI communicator from initialize_mpi() or initialize_mpi_jax()
     rank : int
         Process rank
     size : int
@@ -103,14 +147,18 @@ def finalize_mpi(comm, rank, size, MPI_AVAILABLE):
     -----
     - Only performs finalization if MPI is available and multi-process
     - Uses MPI barrier to synchronize all ranks before finalization
-    - Provides per-rank logging for debugging distributed shutdown
+    - Provides per-rank logging for debugging distributed shutdown when
+      ``COVMOCK_VERBOSE=1``
     - Safe to call even if MPI not available (no-op)
     """
     # Explicit MPI cleanup to ensure clean exit
     if MPI_AVAILABLE and comm is not None and size > 1:
-        print(f"Rank {rank}: Starting MPI finalization", flush=True)
+        verbose = os.environ.get('COVMOCK_VERBOSE') == '1'
+        if verbose:
+            print(f"Rank {rank}: Starting MPI finalization", flush=True)
         comm.Barrier()  # Ensure all ranks finish
-        print(f"Rank {rank}: MPI finalization complete", flush=True)
+        if verbose:
+            print(f"Rank {rank}: MPI finalization complete", flush=True)
         # Let the interpreter's normal shutdown run MPI_Finalize. Instrumentation
         # showed this Barrier + teardown completes in ~0.2 s, so there is no hang
         # to engineer around; an explicit MPI.Finalize() + os._exit was tried and
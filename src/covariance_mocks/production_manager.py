@@ -6,21 +6,47 @@ failure recovery, and batch execution via SLURM.
 """
 
 import os
+import sys
+import copy
+import atexit
+import functools
 import sqlite3
+import threading
 import json
 import time
 import hashlib
 from pathlib import Path
-from typing import Dict, Any, List, Optional, Iterator, Tuple
+from typing import Dict, Any, Iterable, List, Optional, Iterator, Tuple
 from dataclasses import dataclass, asdict
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from enum import Enum
 import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from .production_config import ProductionConfigLoader, ConfigurationError
 from .utils import ABACUS_BASE_PATH
 
 
+@functools.lru_cache(maxsize=8)
+def _load_config_cached(path_str: str, mtime_ns: int, machine: str) -> Dict[str, Any]:
+    """Load and validate a production config once per (path, mtime, machine).
+    
+    The mtime in the key makes an edited config file reload; callers get the
+    shared dict and must copy it before mutating.
+    """
+    return ProductionConfigLoader().load_production_config(path_str, machine)
+
+
+@functools.lru_cache(maxsize=8)
+def _dump_config_cached(path_str: str, mtime_ns: int, machine: str) -> str:
+    """YAML text of the cached config, serialized once per cache key."""
+    import yaml
+    # The C emitter (when libyaml is available) produces the same document
+    dumper = getattr(yaml, "CDumper", yaml.Dumper)
+    return yaml.dump(_load_config_cached(path_str, mtime_ns, machine),
+                     Dumper=dumper, default_flow_style=False)
+
+
 def input_catalog_dir(realization, redshift):
     """Expected AbacusSummit halo-catalog directory for a (realization, redshift)."""
     return os.path.join(
@@ -36,6 +62,24 @@ def input_catalog_exists(realization, redshift):
     return os.path.isdir(input_catalog_dir(realization, redshift))
 
 
+def _dir_entries(path) -> frozenset:
+    """Names in directory ``path`` (empty if it does not exist)."""
+    try:
+        with os.scandir(path or ".") as entries:
+            return frozenset(entry.name for entry in entries)
+    except (FileNotFoundError, NotADirectoryError):
+        return frozenset()
+
+
+def _probe_outputs(item) -> frozenset:
+    """Existing names among one directory's (job_id, name) candidates."""
+    parent, entries = item
+    if len(entries) == 1:
+        name = entries[0][1]
+        return frozenset((name,)) if os.path.exists(os.path.join(parent, name)) else frozenset()
+    return _dir_entries(parent)
+
+
 def realization_runnable(realization, redshifts):
     """True only if EVERY configured redshift has an input catalog.
 
@@ -45,6 +89,168 @@ def realization_runnable(realization, redshifts):
     return all(input_catalog_exists(realization, z) for z in redshifts)
 
 
+# Repository scripts referenced from batch scripts (the package runs from a
+# source checkout on the cluster)
+_SCRIPTS_DIR = Path(__file__).resolve().parent.parent.parent / "scripts"
+
+
+# SLURM batch script templates (str.format), filled by
+# ProductionManager._create_slurm_batch_script
+_SBATCH_HEADER = """#!/bin/bash
+#SBATCH --job-name={batch_id}
+#SBATCH --account={account}
+#SBATCH --qos=regular
+#SBATCH --constraint={constraint}
+#SBATCH --nodes={nodes}
+#SBATCH --ntasks-per-node={tasks_per_node}
+#SBATCH --cpus-per-task={cpus_per_task}{gpu_directive}
+#SBATCH --time={time}
+"""
+
+_SINGLE_JOB_SCRIPT = _SBATCH_HEADER + """#SBATCH --output={logs_dir}/{batch_id}.out
+#SBATCH --error={logs_dir}/{batch_id}.err
+
+# Load environment
+source {load_env}
+
+echo "Starting job {job_id}: realization {realization}, redshift {redshift}"
+
+# Run the mock generation with MPI
+srun -n 8 python {generate_script} \\
+    {machine} \\
+    "{output_path}" \\
+    --realization "{realization}" \\
+    --redshift "{redshift}"
+
+EXIT_CODE=$?
+
+# Completion marker: lets status polls scan one directory instead of
+# stat-ing every output path
+if [ $EXIT_CODE -eq 0 ] && [ -e "{output_path}" ]; then
+    touch "{done_dir}/{job_id}.done"
+fi
+
+echo "Job {job_id} completed with exit code $EXIT_CODE"
+exit $EXIT_CODE
+"""
+
+_ARRAY_JOB_SCRIPT = _SBATCH_HEADER + """#SBATCH --array=0-{last_index}{throttle}
+#SBATCH --output={logs_dir}/{batch_id}.out
+#SBATCH --error={logs_dir}/{batch_id}.err
+#SBATCH --open-mode=append
+
+# All tasks append to the batch's two logs rather than writing two files
+# each; every line is tagged with its task index
+exec > >(sed -u "s/^/[$SLURM_ARRAY_TASK_ID] /") 2> >(sed -u "s/^/[$SLURM_ARRAY_TASK_ID] /" >&2)
+
+# Load environment
+source {load_env}
+
+# Job array mapping: one "job_id,realization,redshift,output_path" line per
+# job in the parameter file. Each array task runs TASKS_PER_JOB consecutive
+# jobs, one after another, in its allocation
+PARAMS="{params_path}"
+TASKS_PER_JOB={tasks_per_job}
+FIRST=$(( SLURM_ARRAY_TASK_ID * TASKS_PER_JOB + 1 ))
+LAST=$(( FIRST + TASKS_PER_JOB - 1 ))
+
+TASK_EXIT=0
+# Parameters arrive on fd 3 so srun cannot swallow the remaining lines
+while IFS=, read -r JOB_ID REALIZATION REDSHIFT OUTPUT_PATH <&3; do
+    echo "Starting job $JOB_ID: realization $REALIZATION, redshift $REDSHIFT"
+
+    # Run the mock generation with MPI (8 ranks = 2 nodes x 4 GPU, as in the single-job path)
+    srun -n 8 python {generate_script} \\
+        {machine} \\
+        "$OUTPUT_PATH" \\
+        --realization "$REALIZATION" \\
+        --redshift "$REDSHIFT"
+
+    EXIT_CODE=$?
+
+    # Completion marker: lets status polls scan one directory instead of
+    # stat-ing every output path
+    if [ $EXIT_CODE -eq 0 ] && [ -e "$OUTPUT_PATH" ]; then
+        touch "{done_dir}/$JOB_ID.done"
+    else
+        TASK_EXIT=$EXIT_CODE
+    fi
+
+    echo "Job $JOB_ID completed with exit code $EXIT_CODE"
+done 3< <(sed -n "${{FIRST}},${{LAST}}p" "$PARAMS")
+
+# Let the taggers flush before the task ends
+exec >&- 2>&-
+wait
+
+exit $TASK_EXIT
+"""
+
+
+# Hot statements kept as module constants: each string is built once, and
+# sqlite3's per-connection statement cache keys on the SQL text
+_JOB_COLUMNS = """job_id, realization, redshift, output_path, status, submit_count,
+                   slurm_job_id, created_at, started_at, completed_at, error_message"""
+
+_INSERT_JOB = f"""
+    INSERT OR REPLACE INTO jobs ({_JOB_COLUMNS})
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Leaves an existing row untouched instead of deleting and re-inserting it
+_INSERT_JOB_NEW = f"""
+    INSERT OR IGNORE INTO jobs ({_JOB_COLUMNS})
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+_SEL_JOBS_BY_STATUS = f"""
+    SELECT {_JOB_COLUMNS}
+    FROM jobs WHERE status = ?
+    ORDER BY created_at
+"""
+
+_SEL_BATCH_JOBS = """
+    SELECT j.job_id, j.realization, j.redshift, j.output_path, j.status, j.submit_count,
+           j.slurm_job_id, j.created_at, j.started_at, j.completed_at, j.error_message
+    FROM batch_jobs bj JOIN jobs j ON j.job_id = bj.job_id
+    WHERE bj.batch_id = ?
+"""
+
+_SEL_BATCH_IDS_WITH_JOBS = """
+    SELECT b.batch_id FROM batches b
+    WHERE b.status = ? AND EXISTS (
+        SELECT 1 FROM batch_jobs bj JOIN jobs j ON j.job_id = bj.job_id
+        WHERE bj.batch_id = b.batch_id AND j.status = ?
+    )
+    ORDER BY b.created_at, b.batch_id
+"""
+
+_SEL_BATCHES_BY_STATUS = """
+    SELECT batch_id, job_ids, slurm_array_id, status, created_at, submitted_at
+    FROM batches WHERE status = ?
+    ORDER BY created_at
+"""
+
+
+def _utc_timestamp() -> str:
+    """Current UTC time as a naive ISO-8601 string (the format stored in the DB)."""
+    return datetime.now(timezone.utc).replace(tzinfo=None).isoformat()
+
+
+def _encode_job_ids(job_ids: List[str]) -> str:
+    """Serialize a batch's job ids for the batches.job_ids column."""
+    return "\n".join(job_ids)
+
+
+def _decode_job_ids(value: str) -> List[str]:
+    """Inverse of _encode_job_ids; also reads the older JSON-list encoding."""
+    if not value:
+        return []
+    if value.startswith("["):
+        return json.loads(value)
+    return value.split("\n")
+
+
 class JobStatus(Enum):
     """Job execution status."""
     PENDING = "pending"
@@ -58,7 +264,47 @@ class JobStatus(Enum):
     MISSING_INPUT = "missing_input"   # input halo catalog absent; never submitted
 
 
-@dataclass
+# Job/batch specs are built per row on every query; slots (Python 3.10+) drop
+# the per-instance __dict__
+_DATACLASS_OPTIONS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+# Concurrent sbatch calls when submitting staged batches
+_SBATCH_WORKERS = 8
+
+# Array task cap assumed when scontrol cannot report MaxArraySize
+_DEFAULT_MAX_ARRAY_SIZE = 1000
+
+# Job ids per sacct -j call, keeping the argument list well under ARG_MAX
+_SACCT_CHUNK = 500
+
+# Job ids per squeue --jobs call, for the same reason
+_SQUEUE_CHUNK = 500
+
+# Statuses still awaiting a terminal outcome
+_ACTIVE_STATUSES = (JobStatus.PENDING, JobStatus.STAGED, JobStatus.QUEUED, JobStatus.RUNNING)
+
+# Fixed status set inlined as literals, so these statements are built once and
+# always hit the connection's statement cache
+_ACTIVE_IN = ", ".join(f"'{status.value}'" for status in _ACTIVE_STATUSES)
+
+_SEL_ACTIVE_JOBS = f"""
+    SELECT job_id, output_path, slurm_job_id, status
+    FROM jobs WHERE status IN ({_ACTIVE_IN})
+"""
+
+_SEL_ACTIVE_SLURM_IDS = f"""
+    SELECT slurm_job_id FROM jobs
+    WHERE status IN ({_ACTIVE_IN}) AND slurm_job_id IS NOT NULL
+"""
+
+_SEL_JOBS_OFF_QUEUE = f"""
+    SELECT j.job_id, j.output_path, j.slurm_job_id, j.status
+    FROM jobs j LEFT JOIN squeue_snap s ON s.id = j.slurm_job_id
+    WHERE j.status IN ({_ACTIVE_IN}) AND s.id IS NULL
+"""
+
+
+@dataclass(**_DATACLASS_OPTIONS)
 class JobSpec:
     """Individual job specification."""
     job_id: str
@@ -75,10 +321,10 @@ class JobSpec:
     
     def __post_init__(self):
         if self.created_at is None:
-            self.created_at = datetime.utcnow().isoformat()
+            self.created_at = _utc_timestamp()
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class BatchSpec:
     """SLURM batch specification."""
     batch_id: str
@@ -90,11 +336,27 @@ class BatchSpec:
     
     def __post_init__(self):
         if self.created_at is None:
-            self.created_at = datetime.utcnow().isoformat()
+            self.created_at = _utc_timestamp()
 
 
 class JobDatabase:
-    """SQLite database for persistent job tracking."""
+    """SQLite database for persistent job tracking.
+    
+    Holds one connection for its lifetime (in autocommit mode, WAL journal)
+    instead of reconnecting per call. Writes are serialized with a lock;
+    reads go straight to the connection.
+    """
+    
+    # Applied once per connection: WAL lets readers proceed during writes and
+    # only needs an fsync at checkpoints under synchronous=NORMAL
+    _PRAGMAS = """
+        PRAGMA synchronous = NORMAL;
+        PRAGMA busy_timeout = 5000;
+        PRAGMA temp_store = MEMORY;
+        PRAGMA cache_size = -65536;
+        PRAGMA mmap_size = 268435456;
+        PRAGMA recursive_triggers = ON;
+    """
     
     def __init__(self, db_path: Path):
         """Initialize database connection.
@@ -104,12 +366,30 @@ class JobDatabase:
         """
         self.db_path = db_path
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._write_lock = threading.Lock()
+        self._conn = None
         self._init_database()
+        atexit.register(self.close)
     
     def _init_database(self):
-        """Initialize database schema."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""
+        """Open the shared connection and initialize database schema."""
+        # A larger statement cache keeps the per-shape dynamic UPDATEs from
+        # evicting the fixed hot statements
+        self._conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False,
+                                     cached_statements=256)
+        # Rows support both unpacking and access by column name
+        self._conn.row_factory = sqlite3.Row
+        # Journal mode is persistent in the database file; COVMOCK_SQLITE_JOURNAL
+        # allows falling back (e.g. to DELETE) on filesystems without shared memory
+        journal_mode = os.environ.get("COVMOCK_SQLITE_JOURNAL", "WAL")
+        # auto_vacuum only applies to a new database, and must precede the
+        # journal-mode switch that first writes its header
+        self._conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        self._conn.execute(f"PRAGMA journal_mode = {journal_mode}")
+        self._conn.executescript(self._PRAGMAS)
+        
+        with self._write_lock:
+            self._conn.executescript("""
                 CREATE TABLE IF NOT EXISTS jobs (
                     job_id TEXT PRIMARY KEY,
                     realization INTEGER NOT NULL,
@@ -122,10 +402,8 @@ class JobDatabase:
                     started_at TEXT,
                     completed_at TEXT,
                     error_message TEXT
-                )
-            """)
-            
-            conn.execute("""
+                );
+                
                 CREATE TABLE IF NOT EXISTS batches (
                     batch_id TEXT PRIMARY KEY,
                     job_ids TEXT NOT NULL,
@@ -133,104 +411,294 @@ class JobDatabase:
                     status TEXT NOT NULL,
                     created_at TEXT NOT NULL,
                     submitted_at TEXT
-                )
-            """)
-            
-            conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status)
+                );
+                
+                -- (status, created_at) serves status filters and their
+                -- ORDER BY created_at without a sort; it supersedes the
+                -- original status-only index
+                CREATE INDEX IF NOT EXISTS idx_jobs_status_created ON jobs(status, created_at);
+                DROP INDEX IF EXISTS idx_jobs_status;
+                
+                CREATE INDEX IF NOT EXISTS idx_jobs_slurm ON jobs(slurm_job_id)
+                    WHERE slurm_job_id IS NOT NULL;
+                
+                CREATE INDEX IF NOT EXISTS idx_jobs_realization ON jobs(realization);
+                
+                CREATE INDEX IF NOT EXISTS idx_batches_status_created ON batches(status, created_at);
+                
+                CREATE TABLE IF NOT EXISTS batch_jobs (
+                    batch_id TEXT NOT NULL,
+                    job_id TEXT NOT NULL,
+                    PRIMARY KEY (batch_id, job_id)
+                );
+                
+                -- Job counts per status, kept current by the triggers below so
+                -- stats polls read a handful of rows instead of scanning jobs.
+                -- recursive_triggers makes INSERT OR REPLACE fire the delete
+                -- trigger for the replaced row
+                CREATE TABLE IF NOT EXISTS status_counts (
+                    status TEXT PRIMARY KEY,
+                    cnt INTEGER NOT NULL DEFAULT 0
+                );
+                
+                CREATE TRIGGER IF NOT EXISTS trg_jobs_count_insert AFTER INSERT ON jobs
+                BEGIN
+                    INSERT INTO status_counts (status, cnt) VALUES (NEW.status, 1)
+                        ON CONFLICT(status) DO UPDATE SET cnt = cnt + 1;
+                END;
+                
+                CREATE TRIGGER IF NOT EXISTS trg_jobs_count_delete AFTER DELETE ON jobs
+                BEGIN
+                    UPDATE status_counts SET cnt = cnt - 1 WHERE status = OLD.status;
+                END;
+                
+                CREATE TRIGGER IF NOT EXISTS trg_jobs_count_update AFTER UPDATE OF status ON jobs
+                WHEN NEW.status != OLD.status
+                BEGIN
+                    UPDATE status_counts SET cnt = cnt - 1 WHERE status = OLD.status;
+                    INSERT INTO status_counts (status, cnt) VALUES (NEW.status, 1)
+                        ON CONFLICT(status) DO UPDATE SET cnt = cnt + 1;
+                END;
+                
+                -- Databases from before status_counts: seed it from jobs once
+                -- (a populated database never leaves status_counts empty)
+                INSERT INTO status_counts (status, cnt)
+                    SELECT status, COUNT(*) FROM jobs
+                    WHERE NOT EXISTS (SELECT 1 FROM status_counts)
+                    GROUP BY status;
+                
+                -- Per-connection copy of the latest squeue snapshot, joined
+                -- against jobs during status reconciliation
+                CREATE TEMP TABLE IF NOT EXISTS squeue_snap (
+                    id INTEGER PRIMARY KEY,
+                    state TEXT NOT NULL
+                );
             """)
             
-            conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_jobs_realization ON jobs(realization)
-            """)
+            # Databases from before the batch_jobs table only carry the
+            # mapping in batches.job_ids; backfill it once
+            needs_backfill = self._conn.execute(
+                "SELECT EXISTS(SELECT 1 FROM batches) AND NOT EXISTS(SELECT 1 FROM batch_jobs)"
+            ).fetchone()[0]
+            if needs_backfill:
+                rows = [
+                    (batch_id, job_id)
+                    for batch_id, job_ids in self._conn.execute("SELECT batch_id, job_ids FROM batches")
+                    for job_id in _decode_job_ids(job_ids)
+                ]
+                self._conn.execute("BEGIN IMMEDIATE")
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO batch_jobs (batch_id, job_id) VALUES (?, ?)", rows
+                )
+                self._conn.execute("COMMIT")
+    
+    def close(self):
+        """Refresh query-planner statistics and close the shared connection (idempotent)."""
+        with self._write_lock:
+            if self._conn is not None:
+                try:
+                    self._conn.execute("PRAGMA optimize")
+                except sqlite3.Error:
+                    pass
+                self._conn.close()
+                self._conn = None
+    
+    def _write_many(self, statements: List[Tuple[str, Iterable[Tuple]]]):
+        """Run ``(sql, rows)`` pairs with executemany in a single transaction.
+        
+        ``rows`` may be a lazy iterable; executemany consumes it inside the
+        transaction.
+        """
+        with self._write_lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for sql, rows in statements:
+                    if rows:
+                        self._conn.executemany(sql, rows)
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
     
     def insert_job(self, job: JobSpec):
         """Insert job into database."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""
-                INSERT OR REPLACE INTO jobs 
-                (job_id, realization, redshift, output_path, status, submit_count,
-                 slurm_job_id, created_at, started_at, completed_at, error_message)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
+        with self._write_lock:
+            self._conn.execute(_INSERT_JOB, (
                 job.job_id, job.realization, job.redshift, job.output_path,
                 job.status.value, job.submit_count, job.slurm_job_id,
                 job.created_at, job.started_at, job.completed_at, job.error_message
             ))
     
+    def insert_jobs(self, jobs: Iterable[JobSpec]):
+        """Insert many jobs in a single transaction."""
+        # Rows are generated as executemany consumes them, not held as a copy
+        self.insert_job_rows(
+            (job.job_id, job.realization, job.redshift, job.output_path,
+             job.status.value, job.submit_count, job.slurm_job_id,
+             job.created_at, job.started_at, job.completed_at, job.error_message)
+            for job in jobs
+        )
+    
+    def insert_job_rows(self, rows: Iterable[Tuple], replace: bool = True):
+        """Insert raw jobs rows, in JobSpec field order, in a single transaction.
+        
+        For bulk creation paths that need not build a JobSpec per job; ``rows``
+        may be a generator. With ``replace=False``, rows whose job_id already
+        exists are skipped rather than overwritten.
+        """
+        self._write_many([(_INSERT_JOB if replace else _INSERT_JOB_NEW, rows)])
+    
     def insert_batch(self, batch: BatchSpec):
-        """Insert batch into database."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""
+        """Insert batch and its job membership into database."""
+        self._write_many([
+            ("""
                 INSERT OR REPLACE INTO batches
                 (batch_id, job_ids, slurm_array_id, status, created_at, submitted_at)
                 VALUES (?, ?, ?, ?, ?, ?)
-            """, (
-                batch.batch_id, json.dumps(batch.job_ids), batch.slurm_array_id,
+            """, [(
+                batch.batch_id, _encode_job_ids(batch.job_ids), batch.slurm_array_id,
                 batch.status.value, batch.created_at, batch.submitted_at
-            ))
+            )]),
+            ("INSERT OR IGNORE INTO batch_jobs (batch_id, job_id) VALUES (?, ?)",
+             [(batch.batch_id, job_id) for job_id in batch.job_ids]),
+        ])
+    
+    @staticmethod
+    def _job_from_row(row: sqlite3.Row) -> JobSpec:
+        """Build a JobSpec from a jobs row."""
+        return JobSpec(
+            job_id=row["job_id"],
+            realization=row["realization"],
+            redshift=row["redshift"],
+            output_path=row["output_path"],
+            status=JobStatus(row["status"]),
+            submit_count=row["submit_count"],
+            slurm_job_id=row["slurm_job_id"],
+            created_at=row["created_at"],
+            started_at=row["started_at"],
+            completed_at=row["completed_at"],
+            error_message=row["error_message"]
+        )
+    
+    def iter_jobs_by_status(self, status: JobStatus) -> Iterator[JobSpec]:
+        """Yield jobs with specified status without materializing a list.
+        
+        Do not write to the database while iterating; use get_jobs_by_status
+        for loops that update the jobs they visit.
+        """
+        for row in self._conn.execute(_SEL_JOBS_BY_STATUS, (status.value,)):
+            yield self._job_from_row(row)
     
     def get_jobs_by_status(self, status: JobStatus) -> List[JobSpec]:
         """Get all jobs with specified status."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute("""
-                SELECT job_id, realization, redshift, output_path, status, submit_count,
-                       slurm_job_id, created_at, started_at, completed_at, error_message
-                FROM jobs WHERE status = ?
-                ORDER BY created_at
-            """, (status.value,))
-            
-            jobs = []
-            for row in cursor:
-                jobs.append(JobSpec(
-                    job_id=row[0],
-                    realization=row[1],
-                    redshift=row[2],
-                    output_path=row[3],
-                    status=JobStatus(row[4]),
-                    submit_count=row[5],
-                    slurm_job_id=row[6],
-                    created_at=row[7],
-                    started_at=row[8],
-                    completed_at=row[9],
-                    error_message=row[10]
-                ))
-            
-            return jobs
+        return list(self.iter_jobs_by_status(status))
+    
+    def iter_jobs_minimal(self, statuses: List[JobStatus]) -> Iterator[Tuple[str, str, Optional[int], str]]:
+        """Yield (job_id, output_path, slurm_job_id, status_str) for jobs in ``statuses``.
+        
+        For reconciliation paths that need neither a full row nor a JobSpec.
+        """
+        cursor = self._conn.execute(f"""
+            SELECT job_id, output_path, slurm_job_id, status
+            FROM jobs WHERE status IN ({", ".join("?" * len(statuses))})
+        """, [status.value for status in statuses])
+        yield from cursor
+    
+    def iter_active_jobs(self) -> Iterator[Tuple[str, str, Optional[int], JobStatus]]:
+        """Yield (job_id, output_path, slurm_job_id, status) for not-yet-final jobs.
+        
+        Covers the PENDING, STAGED, QUEUED and RUNNING states without building
+        JobSpec objects.
+        """
+        for job_id, output_path, slurm_job_id, status in self._conn.execute(_SEL_ACTIVE_JOBS):
+            yield job_id, output_path, slurm_job_id, JobStatus(status)
+    
+    def iter_active_slurm_ids(self) -> Iterator[int]:
+        """Yield the SLURM job ids of not-yet-final jobs that have one."""
+        for row in self._conn.execute(_SEL_ACTIVE_SLURM_IDS):
+            yield row[0]
+    
+    def iter_jobs_off_queue(self) -> Iterator[Tuple[str, str, Optional[int], JobStatus]]:
+        """Like iter_active_jobs, but only jobs absent from the loaded squeue snapshot.
+        
+        Includes jobs without a SLURM id; see load_squeue_snapshot.
+        """
+        for job_id, output_path, slurm_job_id, status in self._conn.execute(_SEL_JOBS_OFF_QUEUE):
+            yield job_id, output_path, slurm_job_id, JobStatus(status)
+    
+    def get_retryable_job_ids(self, max_retries: int) -> List[str]:
+        """Ids of FAILED jobs submitted at most ``max_retries`` times."""
+        cursor = self._conn.execute("""
+            SELECT job_id FROM jobs WHERE status = ? AND submit_count <= ?
+        """, (JobStatus.FAILED.value, max_retries))
+        return [row[0] for row in cursor]
+    
+    def bulk_retry(self, max_retries: int) -> int:
+        """Reset FAILED jobs submitted at most ``max_retries`` times to PENDING.
+        
+        One set-based UPDATE that also clears the error message.
+        
+        Returns:
+            Number of jobs reset
+        """
+        with self._write_lock:
+            cursor = self._conn.execute("""
+                UPDATE jobs SET status = ?, error_message = NULL
+                WHERE status = ? AND submit_count <= ?
+            """, (JobStatus.PENDING.value, JobStatus.FAILED.value, max_retries))
+        return cursor.rowcount
+    
+    def get_batch_jobs(self, batch_id: str, status: Optional[JobStatus] = None) -> List[JobSpec]:
+        """Get the jobs of a batch, optionally only those with given status.
+        
+        Jobs come back in the batch's job_ids order: batch_jobs rows are
+        inserted in that order, so its rowid serves as the position.
+        """
+        query = _SEL_BATCH_JOBS
+        params = [batch_id]
+        if status is not None:
+            query += " AND j.status = ?"
+            params.append(status.value)
+        cursor = self._conn.execute(query + " ORDER BY bj.rowid", params)
+        
+        return [self._job_from_row(row) for row in cursor]
+    
+    def get_batch_ids_with_jobs(self, batch_status: JobStatus, job_status: JobStatus) -> List[str]:
+        """Ids of ``batch_status`` batches with at least one ``job_status`` job, by creation.
+        
+        Unlike get_batches_by_status, the batches.job_ids column is never decoded.
+        """
+        cursor = self._conn.execute(_SEL_BATCH_IDS_WITH_JOBS, (batch_status.value, job_status.value))
+        return [row[0] for row in cursor]
     
     def get_batches_by_status(self, status: JobStatus) -> List[BatchSpec]:
         """Get all batches with specified status."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute("""
-                SELECT batch_id, job_ids, slurm_array_id, status, created_at, submitted_at
-                FROM batches WHERE status = ?
-                ORDER BY created_at
-            """, (status.value,))
-            
-            batches = []
-            for row in cursor:
-                batches.append(BatchSpec(
-                    batch_id=row[0],
-                    job_ids=json.loads(row[1]),
-                    slurm_array_id=row[2],
-                    status=JobStatus(row[3]),
-                    created_at=row[4],
-                    submitted_at=row[5]
-                ))
-            
-            return batches
+        cursor = self._conn.execute(_SEL_BATCHES_BY_STATUS, (status.value,))
+        
+        return [
+            BatchSpec(
+                batch_id=row["batch_id"],
+                job_ids=_decode_job_ids(row["job_ids"]),
+                slurm_array_id=row["slurm_array_id"],
+                status=JobStatus(row["status"]),
+                created_at=row["created_at"],
+                submitted_at=row["submitted_at"]
+            )
+            for row in cursor
+        ]
     
-    def update_batch_status(self, batch_id: str, status: JobStatus, slurm_array_id: Optional[int] = None):
-        """Update batch status and optionally SLURM array ID."""
-        with sqlite3.connect(self.db_path) as conn:
+    def update_batch_status(self, batch_id: str, status: JobStatus, slurm_array_id: Optional[int] = None,
+                            submitted_at: Optional[str] = None):
+        """Update batch status and optionally SLURM array ID (and submission time)."""
+        with self._write_lock:
             if slurm_array_id is not None:
-                conn.execute("""
+                self._conn.execute("""
                     UPDATE batches 
                     SET status = ?, slurm_array_id = ?, submitted_at = ?
                     WHERE batch_id = ?
-                """, (status.value, slurm_array_id, datetime.utcnow().isoformat(), batch_id))
+                """, (status.value, slurm_array_id, submitted_at or _utc_timestamp(), batch_id))
             else:
-                conn.execute("""
+                self._conn.execute("""
                     UPDATE batches 
                     SET status = ?
                     WHERE batch_id = ?
@@ -244,21 +712,163 @@ class JobDatabase:
         set_clause = ", ".join(f"{key} = ?" for key in fields.keys())
         values = list(fields.values()) + [job_id]
         
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute(f"UPDATE jobs SET {set_clause} WHERE job_id = ?", values)
+        with self._write_lock:
+            self._conn.execute(f"UPDATE jobs SET {set_clause} WHERE job_id = ?", values)
+    
+    def update_jobs_in_batch(self, batch_id: str, status: JobStatus, only_status: Optional[JobStatus] = None,
+                             count_submission: bool = False, **kwargs):
+        """Update all jobs of a batch with one set-based UPDATE via batch_jobs.
+        
+        Args:
+            batch_id: Batch whose member jobs are updated
+            status: New job status
+            only_status: If given, only update members currently in this status
+            count_submission: Also increment submit_count
+            **kwargs: Further columns to set
+        """
+        fields = {"status": status.value}
+        fields.update(kwargs)
+        
+        set_clause = ", ".join(f"{key} = ?" for key in fields.keys())
+        if count_submission:
+            set_clause += ", submit_count = submit_count + 1"
+        query = f"""
+            UPDATE jobs SET {set_clause}
+            WHERE job_id IN (SELECT job_id FROM batch_jobs WHERE batch_id = ?)
+        """
+        values = list(fields.values()) + [batch_id]
+        if only_status is not None:
+            query += " AND status = ?"
+            values.append(only_status.value)
+        
+        with self._write_lock:
+            self._conn.execute(query, values)
+    
+    def bulk_update_status(self, updates: List[Tuple], fields: Tuple[str, ...] = ()):
+        """Update many jobs in a single transaction.
+        
+        Args:
+            updates: Rows of ``(status_value, *field_values, job_id)``
+            fields: Columns set alongside the status, in row order
+        """
+        set_clause = ", ".join(["status = ?"] + [f"{field} = ?" for field in fields])
+        self._write_many([(f"UPDATE jobs SET {set_clause} WHERE job_id = ?", updates)])
+    
+    def apply_status_updates(self, updates: List[Tuple[JobStatus, str, List[Tuple[Any, str]]]]):
+        """Apply grouped status transitions in a single transaction.
+        
+        Args:
+            updates: (status, field, rows) triples; each row is (value, job_id)
+                and sets the job's status plus ``field`` to ``value``
+        """
+        self._write_many([
+            (f"UPDATE jobs SET status = '{status.value}', {field} = ? WHERE job_id = ?", rows)
+            for status, field, rows in updates
+        ])
+    
+    def load_squeue_snapshot(self, slurm_jobs: Dict[int, str], started_at: str):
+        """Replace the squeue_snap temp table and promote jobs squeue reports running.
+        
+        QUEUED jobs whose SLURM id is RUNNING in ``slurm_jobs`` become RUNNING
+        with ``started_at``, in the same transaction as the snapshot load.
+        """
+        self._write_many([
+            ("DELETE FROM squeue_snap", [()]),
+            ("INSERT INTO squeue_snap (id, state) VALUES (?, ?)", list(slurm_jobs.items())),
+            ("""
+                UPDATE jobs SET status = ?, started_at = ?
+                WHERE status = ? AND slurm_job_id IN
+                    (SELECT id FROM squeue_snap WHERE state IN ('RUNNING', 'R'))
+            """, [(JobStatus.RUNNING.value, started_at, JobStatus.QUEUED.value)]),
+        ])
+    
+    def count_jobs(self) -> int:
+        """Total number of jobs in the database."""
+        return self._conn.execute("SELECT COALESCE(SUM(cnt), 0) FROM status_counts").fetchone()[0]
     
     def get_production_stats(self) -> Dict[str, int]:
         """Get production statistics."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute("""
-                SELECT status, COUNT(*) FROM jobs GROUP BY status
-            """)
-            
-            stats = {status.value: 0 for status in JobStatus}
-            for status, count in cursor:
-                stats[status] = count
-            
-            return stats
+        cursor = self._conn.execute("SELECT status, cnt FROM status_counts")
+        
+        stats = {status.value: 0 for status in JobStatus}
+        for status, count in cursor:
+            stats[status] = count
+        
+        return stats
+
+
+class SqueuePoller:
+    """Background ``squeue --me -i <interval>`` stream of this user's queue states.
+    
+    One long-lived squeue process replaces a fork/exec, and a slurmctld RPC,
+    per status check. squeue ends each iteration's listing with a blank line;
+    the listing is published as a whole at that point.
+    """
+    
+    def __init__(self, interval_s: float = 30.0):
+        """Initialize poller.
+        
+        Args:
+            interval_s: Seconds between squeue iterations
+        """
+        self.interval_s = interval_s
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._process = None
+        self._thread = None
+    
+    def start(self):
+        """Launch squeue and the reader thread (raises OSError without squeue)."""
+        self._process = subprocess.Popen(
+            ["squeue", "--me", "-i", str(max(1, int(self.interval_s))),
+             "--format=%i,%T", "--noheader"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True
+        )
+        self._thread = threading.Thread(target=self._consume, args=(self._process.stdout,),
+                                        name="squeue-poller", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+    
+    def _consume(self, stream):
+        """Parse iterations from ``stream`` until it closes."""
+        states, taken_at = {}, None
+        for line in stream:
+            line = line.strip()
+            if taken_at is None:
+                taken_at = time.monotonic()
+            if not line:
+                with self._lock:
+                    self._snapshot = (taken_at, states)
+                states, taken_at = {}, None
+                continue
+            try:
+                job_id, state = line.split(',')
+                states[int(job_id)] = state
+            except ValueError:
+                continue
+    
+    @property
+    def alive(self) -> bool:
+        """True while the squeue stream is being read."""
+        return self._thread is not None and self._thread.is_alive()
+    
+    def snapshot(self) -> Optional[Tuple[float, Dict[int, str]]]:
+        """Latest complete listing as (monotonic time taken, {job id: state}).
+        
+        None before the first listing or once the stream has died, so callers
+        fall back to a one-shot query.
+        """
+        if not self.alive:
+            return None
+        with self._lock:
+            return self._snapshot
+    
+    def stop(self):
+        """Terminate the squeue process (idempotent)."""
+        if self._process is not None and self._process.poll() is None:
+            self._process.terminate()
 
 
 class ProductionManager:
@@ -282,9 +892,9 @@ class ProductionManager:
         self.dry_run = dry_run
         self.allow_dirty = allow_dirty
         
-        # Load and validate configuration
-        self.config_loader = ProductionConfigLoader()
-        self.config = self.config_loader.load_production_config(production_config_path, machine)
+        # Load and validate configuration (cached per process, e.g. for poll loops)
+        config_key = (str(self.config_path), self.config_path.stat().st_mtime_ns, machine)
+        self.config = copy.deepcopy(_load_config_cached(*config_key))
         
         # Handle runtime version (CLI override or config default or fallback)
         self.production_version = (
@@ -306,20 +916,49 @@ class ProductionManager:
         db_path = self.work_dir / "production.db"
         self.job_db = JobDatabase(db_path)
         
+        # squeue snapshots are reused for SQUEUE_POLL_INTERVAL seconds to keep
+        # repeated status checks from hammering slurmctld
+        self._squeue_interval = float(os.environ.get("SQUEUE_POLL_INTERVAL", "60"))
+        self._squeue_cache = (0.0, frozenset(), {})
+        self._sacct_cache = (0.0, frozenset(), {})
+        # Optional streaming poller (start_squeue_poller) and the time of this
+        # process's last sbatch, which older poller listings cannot reflect
+        self._squeue_poller = None
+        self._last_submit = 0.0
+        # Earliest start of the next sbatch (execution.submit_stagger_s apart),
+        # shared by concurrent submitters
+        self._submit_lock = threading.Lock()
+        self._next_submit = 0.0
+        # Cluster MaxArraySize, read from scontrol on first use
+        self._max_array_size = None
+        
+        # Job count, kept current by initialize_production/add_realizations so
+        # status polls need not scan the table to detect an empty database
+        self._total_jobs = self.job_db.count_jobs()
+        
         # Create output subdirectories
         self.catalogs_dir = self.work_dir / "catalogs"
         self.metadata_dir = self.work_dir / "metadata"
         self.logs_dir = self.work_dir / "logs"
         self.qa_dir = self.work_dir / "qa"
+        self.done_dir = self.work_dir / "done"
         
-        for directory in [self.catalogs_dir, self.metadata_dir, self.logs_dir, self.qa_dir]:
+        for directory in [self.catalogs_dir, self.metadata_dir, self.logs_dir, self.qa_dir,
+                          self.done_dir]:
             directory.mkdir(parents=True, exist_ok=True)
         
-        # Save production configuration
+        # Save production configuration, skipping the rewrite when unchanged.
+        # A changed file is replaced atomically so a crash never truncates it
         config_file = self.metadata_dir / "production_config.yaml"
-        with open(config_file, 'w') as f:
-            import yaml
-            yaml.dump(self.config, f, default_flow_style=False)
+        config_text = _dump_config_cached(*config_key)
+        try:
+            unchanged = config_file.read_text() == config_text
+        except FileNotFoundError:
+            unchanged = False
+        if not unchanged:
+            tmp_file = config_file.with_suffix(".yaml.tmp")
+            tmp_file.write_text(config_text)
+            os.replace(tmp_file, config_file)
         
         # Log dependency version information
         self._log_dependency_versions()
@@ -337,7 +976,7 @@ class ProductionManager:
         version_info = {
             "production_version": self.production_version,
             "dependencies": dependencies,
-            "initialized_at": datetime.utcnow().isoformat()
+            "initialized_at": _utc_timestamp()
         }
         
         # Save version info to metadata directory
@@ -355,36 +994,54 @@ class ProductionManager:
             - staged_files: List of staged files
             - untracked_files: List of untracked files
             - status_summary: String summary of status
+            - in_repo: bool, False if git status could not run here
+            - head: HEAD commit hash, or None (no repository or no commits)
         """
         try:
-            # Get git status in porcelain format
+            # One porcelain v2 call reports HEAD as well as the file states,
+            # and fails outside a repository
             result = subprocess.run(
-                ["git", "status", "--porcelain"],
+                ["git", "status", "--porcelain=v2", "--branch", "-z"],
                 capture_output=True,
                 text=True,
                 check=True
             )
             
-            status_lines = result.stdout.strip().split('\n') if result.stdout.strip() else []
-            
             modified_files = []
             staged_files = []
             untracked_files = []
+            head = None
             
-            for line in status_lines:
-                if len(line) < 3:
+            # NUL-separated records; a rename/copy record ("2") is followed by
+            # its original path as a separate record
+            records = iter(result.stdout.split('\0'))
+            for record in records:
+                if record.startswith('# branch.oid '):
+                    oid = record.split()[2]
+                    head = oid if oid != '(initial)' else None
                     continue
-                    
-                status_code = line[:2]
-                filename = line[3:]
+                if record.startswith('? '):  # Untracked
+                    untracked_files.append(record[2:])
+                    continue
+                
+                # Path is the last field: after 8 separators for ordinary
+                # changes, 9 for renames/copies, 10 for unmerged entries
+                n_fields = {'1': 8, '2': 9, 'u': 10}.get(record[:1])
+                if n_fields is None:
+                    continue
+                parts = record.split(' ', n_fields)
+                if len(parts) <= n_fields:  # Malformed record
+                    continue
+                filename = parts[n_fields]
+                if record[:1] == '2':
+                    next(records, None)
+                status_code = record[2:4]
                 
                 # Parse git status codes
                 if status_code[0] in ['M', 'A', 'D', 'R', 'C']:  # Staged changes
                     staged_files.append(filename)
                 if status_code[1] in ['M', 'D']:  # Modified in working tree
                     modified_files.append(filename)
-                if status_code == '??':  # Untracked
-                    untracked_files.append(filename)
             
             is_clean = not (modified_files or staged_files)
             
@@ -408,7 +1065,9 @@ class ProductionManager:
                 'modified_files': modified_files,
                 'staged_files': staged_files,
                 'untracked_files': untracked_files,
-                'status_summary': status_summary
+                'status_summary': status_summary,
+                'in_repo': True,
+                'head': head
             }
             
         except subprocess.CalledProcessError:
@@ -418,26 +1077,19 @@ class ProductionManager:
                 'modified_files': [],
                 'staged_files': [],
                 'untracked_files': [],
-                'status_summary': "Git status unavailable"
+                'status_summary': "Git status unavailable",
+                'in_repo': False,
+                'head': None
             }
     
     def _create_production_tag(self):
         """Create a git tag for this production initialization."""
-        try:
-            # Check if we're in a git repository
-            result = subprocess.run(
-                ["git", "rev-parse", "--git-dir"],
-                capture_output=True,
-                text=True,
-                check=True
-            )
-        except subprocess.CalledProcessError:
+        # Check working tree status (this also detects a missing repository)
+        git_status = self._check_working_tree_status()
+        if not git_status['in_repo']:
             print("Warning: Not in a git repository, skipping tag creation")
             return
         
-        # Check working tree status
-        git_status = self._check_working_tree_status()
-        
         # Handle dirty working tree based on policy
         if not git_status['is_clean']:
             if not self.allow_dirty:
@@ -454,15 +1106,16 @@ class ProductionManager:
         
         # Generate tag components
         production_name = self.config["production"]["name"]
-        timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+        timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
         
         # Create base tag name
         base_tag = f"production/{production_name}_{self.production_version}_{timestamp}"
         tag_name = base_tag
         
         # Check for tag conflicts and handle them
+        existing_tags = self._list_tags(f"{base_tag}*")
         counter = 1
-        while self._tag_exists(tag_name):
+        while tag_name in existing_tags:
             tag_name = f"{base_tag}_{counter:02d}"
             counter += 1
             if counter > 99:  # Safety limit
@@ -490,18 +1143,18 @@ class ProductionManager:
         except subprocess.CalledProcessError as e:
             print(f"Warning: Failed to create git tag {tag_name}: {e.stderr}")
     
-    def _tag_exists(self, tag_name: str) -> bool:
-        """Check if a git tag already exists."""
+    def _list_tags(self, pattern: str) -> set:
+        """Names of existing git tags matching a glob pattern, in one git call."""
         try:
-            subprocess.run(
-                ["git", "rev-parse", "--verify", f"refs/tags/{tag_name}"],
+            result = subprocess.run(
+                ["git", "tag", "--list", pattern],
                 capture_output=True,
                 text=True,
                 check=True
             )
-            return True
+            return set(result.stdout.split())
         except subprocess.CalledProcessError:
-            return False
+            return set()
     
     def _generate_tag_message(self, git_status: Dict[str, Any]) -> str:
         """Generate a comprehensive tag message with production metadata."""
@@ -511,17 +1164,8 @@ class ProductionManager:
         # Calculate config file hash for reproducibility
         config_hash = self._calculate_config_hash()
         
-        # Get current git commit
-        try:
-            result = subprocess.run(
-                ["git", "rev-parse", "HEAD"],
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            commit_hash = result.stdout.strip()[:8]
-        except subprocess.CalledProcessError:
-            commit_hash = "unknown"
+        # Current git commit, as reported by the working tree status call
+        commit_hash = (git_status.get('head') or "unknown")[:8]
         
         # Build working tree status section
         if not git_status['is_clean']:
@@ -565,7 +1209,7 @@ Technical details:
 - Config hash: {config_hash}
 - Machine: {self.machine}
 - Git commit: {commit_hash}
-- Initialized: {datetime.utcnow().isoformat()}Z
+- Initialized: {_utc_timestamp()}Z
 - Work directory: {self.work_dir}"""
         
         return message
@@ -574,19 +1218,47 @@ Technical details:
         """Calculate SHA256 hash of the configuration file for reproducibility."""
         try:
             with open(self.config_path, 'rb') as f:
-                content = f.read()
-            return hashlib.sha256(content).hexdigest()[:12]
+                if hasattr(hashlib, "file_digest"):  # Python 3.11+
+                    digest = hashlib.file_digest(f, "sha256")
+                else:
+                    digest = hashlib.sha256()
+                    for chunk in iter(lambda: f.read(1 << 16), b""):
+                        digest.update(chunk)
+            return digest.hexdigest()[:12]
         except Exception:
             return "unknown"
     
+    def _realization_job_paths(self, realization: int, redshift_tags: List[Tuple[float, str]],
+                               hierarchical: bool) -> Tuple[Path, List[Tuple[str, float, str]]]:
+        """Output directory and (job_id, redshift, output_path) rows of one realization.
+        
+        ``redshift_tags`` pairs each redshift with its preformatted ``z1.000``
+        tag, so the per-job work is plain string joins. Hierarchical layout
+        groups a realization's redshifts in one directory, which callers mkdir
+        once rather than once per job.
+        """
+        rtag = f"r{realization:04d}"
+        if hierarchical:
+            output_dir = self.catalogs_dir / rtag
+            base = str(output_dir)
+            rows = [(f"{rtag}_{ztag}", redshift, os.path.join(base, f"mock_{ztag}.hdf5"))
+                    for redshift, ztag in redshift_tags]
+        else:
+            output_dir = self.catalogs_dir
+            base = str(output_dir)
+            rows = [(f"{rtag}_{ztag}", redshift, os.path.join(base, f"mock_{rtag}_{ztag}.hdf5"))
+                    for redshift, ztag in redshift_tags]
+        return output_dir, rows
+    
     def initialize_production(self) -> int:
         """Initialize production by creating all job specifications.
         
+        Jobs already in the database are left as they are, so re-running this
+        is idempotent.
+        
         Returns:
             Number of jobs created
         """
-        jobs_created = 0
-        
         science_config = self.config["science"]
         realizations = science_config["realizations"]
 
@@ -604,32 +1276,35 @@ Technical details:
         realization_ids = [r for r in realization_ids if r not in exclude]
 
         redshifts = science_config["redshifts"]
+        redshift_tags = [(redshift, f"z{redshift:.3f}") for redshift in redshifts]
+        hierarchical = self.config["outputs"]["structure"] == "hierarchical"
+        realization_jobs = []
+        output_dirs = set()
         for realization in realization_ids:
             # Exclude the whole realization if any redshift's input is absent.
             runnable = realization_runnable(realization, redshifts)
-            for redshift in redshifts:
-                job_id = f"r{realization:04d}_z{redshift:.3f}"
-
-                # Generate output path
-                if self.config["outputs"]["structure"] == "hierarchical":
-                    output_path = self.catalogs_dir / f"r{realization:04d}" / f"mock_z{redshift:.3f}.hdf5"
-                else:
-                    output_path = self.catalogs_dir / f"mock_r{realization:04d}_z{redshift:.3f}.hdf5"
-
-                status = JobStatus.PENDING if runnable else JobStatus.MISSING_INPUT
-                if runnable:
-                    output_path.parent.mkdir(parents=True, exist_ok=True)
-
-                job = JobSpec(
-                    job_id=job_id,
-                    realization=realization,
-                    redshift=redshift,
-                    output_path=str(output_path),
-                    status=status,
-                )
-
-                self.job_db.insert_job(job)
-                jobs_created += 1
+            status = JobStatus.PENDING if runnable else JobStatus.MISSING_INPUT
+            output_dir, rows = self._realization_job_paths(realization, redshift_tags, hierarchical)
+            if runnable:
+                output_dirs.add(output_dir)
+            realization_jobs.append((realization, status.value, rows))
+
+        # One mkdir per output directory and one transaction for all jobs. Rows
+        # are generated straight into executemany, sharing one creation stamp,
+        # rather than building a JobSpec per job
+        for output_dir in output_dirs:
+            output_dir.mkdir(parents=True, exist_ok=True)
+        # Re-running initialization keeps existing jobs (and their progress)
+        created_at = _utc_timestamp()
+        jobs_before = self.job_db.count_jobs()
+        self.job_db.insert_job_rows(
+            ((job_id, realization, redshift, output_path, status, 0, None, created_at, None, None, None)
+             for realization, status, rows in realization_jobs
+             for job_id, redshift, output_path in rows),
+            replace=False
+        )
+        self._total_jobs = self.job_db.count_jobs()
+        jobs_created = self._total_jobs - jobs_before
         
         # Create git tag for this production (unless dry run)
         if not self.dry_run:
@@ -643,61 +1318,55 @@ Technical details:
         Returns:
             List of submitted batch IDs
         """
-        staged_jobs = self.job_db.get_jobs_by_status(JobStatus.STAGED)
-        if not staged_jobs:
+        if not self.job_db.get_production_stats()[JobStatus.STAGED.value]:
             return []
         
-        # Get existing staged batches from database
-        staged_batches = self.job_db.get_batches_by_status(JobStatus.STAGED)
-        submitted_batches = []
+        # Existing staged batches that still have staged jobs (via batch_jobs);
+        # job rows are updated per batch in SQL, so none are loaded here
+        to_submit = self.job_db.get_batch_ids_with_jobs(JobStatus.STAGED, JobStatus.STAGED)
         
-        for batch in staged_batches:
-            batch_jobs = [job for job in staged_jobs if job.job_id in batch.job_ids]
-            if not batch_jobs:
-                continue
-                
+        def submit(batch_id: str) -> int:
             # Submit existing SLURM script
-            try:
-                script_path = self.logs_dir / f"{batch.batch_id}.sh"
-                if not script_path.exists():
-                    raise FileNotFoundError(f"Batch script not found: {script_path}")
-                
-                slurm_job_id = self._submit_slurm_batch_script(script_path)
-                
-                # Update batch status
-                batch.slurm_array_id = slurm_job_id
-                batch.status = JobStatus.QUEUED
-                batch.submitted_at = datetime.utcnow().isoformat()
-                self.job_db.update_batch_status(batch.batch_id, JobStatus.QUEUED, slurm_job_id)
-                
-                # Update job statuses. Persist the SLURM id so completion can be
-                # gated on this job's actual exit state (sacct) rather than on
-                # output-path existence. (batch_size=1 here, so the batch's
-                # SLURM id is this job's id.)
-                for job in batch_jobs:
-                    self.job_db.update_job_status(
-                        job.job_id,
-                        JobStatus.QUEUED,
-                        slurm_job_id=slurm_job_id,
-                        submit_count=job.submit_count + 1
-                    )
-                
-                submitted_batches.append(batch.batch_id)
-                print(f"Submitted batch {batch.batch_id} as SLURM job {slurm_job_id}")
-                
-            except Exception as e:
-                # Mark batch as failed
-                batch.status = JobStatus.FAILED
-                self.job_db.update_batch_status(batch.batch_id, JobStatus.FAILED)
-                for job in batch_jobs:
-                    self.job_db.update_job_status(
-                        job.job_id,
-                        JobStatus.FAILED,
-                        error_message=str(e)
-                    )
-                print(f"Failed to submit batch {batch.batch_id}: {e}")
-        
-        return submitted_batches
+            script_path = self.logs_dir / f"{batch_id}.sh"
+            if not script_path.exists():
+                raise FileNotFoundError(f"Batch script not found: {script_path}")
+            return self._submit_slurm_batch_script(script_path)
+        
+        # Each sbatch is a round trip to slurmctld, so a few run concurrently;
+        # results are recorded one at a time as they arrive, so an interrupted
+        # pass leaves every accepted submission in the database
+        submitted = set()
+        with ThreadPoolExecutor(max_workers=_SBATCH_WORKERS) as pool:
+            futures = {pool.submit(submit, batch_id): batch_id for batch_id in to_submit}
+            for future in as_completed(futures):
+                batch_id = futures[future]
+                try:
+                    slurm_job_id = future.result()
+                    self._record_batch_submission(batch_id, slurm_job_id)
+                    submitted.add(batch_id)
+                    print(f"Submitted batch {batch_id} as SLURM job {slurm_job_id}")
+                except Exception as e:
+                    # Mark batch as failed
+                    self.job_db.update_batch_status(batch_id, JobStatus.FAILED)
+                    self.job_db.update_jobs_in_batch(batch_id, JobStatus.FAILED,
+                                                     only_status=JobStatus.STAGED,
+                                                     error_message=str(e))
+                    print(f"Failed to submit batch {batch_id}: {e}")
+        
+        # Report in staging order, not completion order
+        return [batch_id for batch_id in to_submit if batch_id in submitted]
+    
+    def _record_batch_submission(self, batch_id: str, slurm_job_id: int):
+        """Mark a submitted batch and its jobs QUEUED under ``slurm_job_id``."""
+        # Update batch status
+        self.job_db.update_batch_status(batch_id, JobStatus.QUEUED, slurm_job_id, _utc_timestamp())
+        
+        # Update job statuses. Persist the SLURM id so completion can be
+        # gated on this job's actual exit state (sacct) rather than on
+        # output-path existence. (batch_size=1 here, so the batch's
+        # SLURM id is this job's id.)
+        self.job_db.update_jobs_in_batch(batch_id, JobStatus.QUEUED, only_status=JobStatus.STAGED,
+                                         count_submission=True, slurm_job_id=slurm_job_id)
     
     def submit_pending_jobs(self) -> List[str]:
         """Legacy method: Submit pending jobs in batches to SLURM.
@@ -719,23 +1388,21 @@ Technical details:
         Returns:
             List of staged batch IDs
         """
-        pending_jobs = self.job_db.get_jobs_by_status(JobStatus.PENDING)
-
         # Proactive guard: never stage any box of a realization missing one or
         # more input catalogs; flag the whole realization MISSING_INPUT so it is
         # tracked but never submitted (no partial realizations).
         redshifts = self.config["science"]["redshifts"]
         runnable_real = {}
         runnable, missing = [], []
-        for job in pending_jobs:
+        for job in self.job_db.iter_jobs_by_status(JobStatus.PENDING):
             ok = runnable_real.setdefault(job.realization,
                                           realization_runnable(job.realization, redshifts))
             (runnable if ok else missing).append(job)
-        for job in missing:
-            self.job_db.update_job_status(
-                job.job_id, JobStatus.MISSING_INPUT,
-                error_message="realization has incomplete input catalogs"
-            )
+        self.job_db.bulk_update_status(
+            [(JobStatus.MISSING_INPUT.value, "realization has incomplete input catalogs", job.job_id)
+             for job in missing],
+            fields=("error_message",)
+        )
         if missing:
             print(f"Skipped {len(missing)} job(s) in realizations with incomplete inputs")
         pending_jobs = runnable
@@ -743,32 +1410,34 @@ Technical details:
         if not pending_jobs:
             return []
 
-        batch_size = self.config["execution"]["batch_size"]
+        # A batch becomes one job array, so it cannot exceed MaxArraySize tasks
+        batch_size = min(self.config["execution"]["batch_size"], self._max_jobs_per_array())
         staged_batches = []
+        staged_updates = []
+        failed_updates = []
+        # One timestamp for the whole staging pass
+        stamp = int(time.time())
+        staged_at = _utc_timestamp()
         
         # Group jobs into batches
         for i in range(0, len(pending_jobs), batch_size):
             batch_jobs = pending_jobs[i:i + batch_size]
-            batch_id = f"batch_{i//batch_size:04d}_{int(time.time())}"
+            batch_id = f"batch_{i//batch_size:04d}_{stamp}"
             
             # Create batch specification
             batch = BatchSpec(
                 batch_id=batch_id,
-                job_ids=[job.job_id for job in batch_jobs]
+                job_ids=[job.job_id for job in batch_jobs],
+                created_at=staged_at
             )
             
             # Create SLURM script (but don't submit)
             try:
                 script_path = self._create_slurm_batch_script(batch, batch_jobs)
                 batch.status = JobStatus.STAGED
-                batch.created_at = datetime.utcnow().isoformat()
                 
-                # Update job statuses to STAGED
-                for job in batch_jobs:
-                    self.job_db.update_job_status(
-                        job.job_id, 
-                        JobStatus.STAGED
-                    )
+                # Update job statuses to STAGED (written once after the loop)
+                staged_updates.extend((JobStatus.STAGED.value, job.job_id) for job in batch_jobs)
                 
                 # Save batch to database
                 self.job_db.insert_batch(batch)
@@ -779,14 +1448,12 @@ Technical details:
             except Exception as e:
                 # Mark batch as failed
                 batch.status = JobStatus.FAILED
-                for job in batch_jobs:
-                    self.job_db.update_job_status(
-                        job.job_id,
-                        JobStatus.FAILED,
-                        error_message=str(e)
-                    )
+                failed_updates.extend((JobStatus.FAILED.value, str(e), job.job_id) for job in batch_jobs)
                 print(f"Failed to stage batch {batch_id}: {e}")
         
+        self.job_db.bulk_update_status(staged_updates)
+        self.job_db.bulk_update_status(failed_updates, fields=("error_message",))
+        
         return staged_batches
     
     def _create_slurm_batch_script(self, batch: BatchSpec, jobs: List[JobSpec]) -> Path:
@@ -804,125 +1471,94 @@ Technical details:
         resources = self.config["resources"]
         execution = self.config["execution"]
         
+        # Only add GPU directive if GPUs are configured
+        gpu_directive = ""
+        if "gpus_per_node" in resources and resources["gpus_per_node"] > 0:
+            gpu_directive = f"\n#SBATCH --gpus-per-node={resources['gpus_per_node']}"
+        
+        fields = dict(
+            batch_id=batch.batch_id,
+            account=resources["account"],
+            constraint=resources["constraint"],
+            nodes=resources["nodes_per_job"],
+            tasks_per_node=resources["tasks_per_node"],
+            cpus_per_task=resources["cpus_per_task"],
+            gpu_directive=gpu_directive,
+            time=f"{int(execution['timeout_hours'] * 60):02d}:00",
+            logs_dir=self.logs_dir,
+            done_dir=self.done_dir,
+            load_env=_SCRIPTS_DIR / "load_env.sh",
+            generate_script=_SCRIPTS_DIR / "generate_single_mock.py",
+            machine=self.machine,
+        )
+        
         # Generate simple script for single jobs, job array for multiple jobs
         if len(jobs) == 1:
             job = jobs[0]
-            script_content = f"""#!/bin/bash
-#SBATCH --job-name={batch.batch_id}
-#SBATCH --account={resources["account"]}
-#SBATCH --qos=regular
-#SBATCH --constraint={resources["constraint"]}
-#SBATCH --nodes={resources["nodes_per_job"]}
-#SBATCH --ntasks-per-node={resources["tasks_per_node"]}
-#SBATCH --cpus-per-task={resources["cpus_per_task"]}"""
-            # Only add GPU directive if GPUs are configured
-            if "gpus_per_node" in resources and resources["gpus_per_node"] > 0:
-                script_content += f"\n#SBATCH --gpus-per-node={resources['gpus_per_node']}"
-            script_content += f"""
-#SBATCH --time={int(execution["timeout_hours"] * 60):02d}:00
-#SBATCH --output={self.logs_dir}/{batch.batch_id}.out
-#SBATCH --error={self.logs_dir}/{batch.batch_id}.err
-
-# Load environment
-source {Path(__file__).parent.parent.parent / "scripts" / "load_env.sh"}
-
-echo "Starting job {job.job_id}: realization {job.realization}, redshift {job.redshift}"
-
-# Run the mock generation with MPI
-srun -n 8 python {Path(__file__).parent.parent.parent / "scripts" / "generate_single_mock.py"} \\
-    {self.machine} \\
-    "{job.output_path}" \\
-    --realization "{job.realization}" \\
-    --redshift "{job.redshift}"
-
-EXIT_CODE=$?
-
-echo "Job {job.job_id} completed with exit code $EXIT_CODE"
-exit $EXIT_CODE
-"""
+            script_content = _SINGLE_JOB_SCRIPT.format(
+                job_id=job.job_id,
+                realization=job.realization,
+                redshift=job.redshift,
+                output_path=job.output_path,
+                **fields
+            )
         else:
-            script_content = f"""#!/bin/bash
-#SBATCH --job-name={batch.batch_id}
-#SBATCH --account={resources["account"]}
-#SBATCH --qos=regular
-#SBATCH --constraint={resources["constraint"]}
-#SBATCH --nodes={resources["nodes_per_job"]}
-#SBATCH --ntasks-per-node={resources["tasks_per_node"]}
-#SBATCH --cpus-per-task={resources["cpus_per_task"]}"""
-            # Only add GPU directive if GPUs are configured
-            if "gpus_per_node" in resources and resources["gpus_per_node"] > 0:
-                script_content += f"\n#SBATCH --gpus-per-node={resources['gpus_per_node']}"
-            script_content += f"""
-#SBATCH --time={int(execution["timeout_hours"] * 60):02d}:00
-#SBATCH --array=0-{len(jobs)-1}
-#SBATCH --output={self.logs_dir}/{batch.batch_id}_%a.out
-#SBATCH --error={self.logs_dir}/{batch.batch_id}_%a.err
-
-# Load environment
-source {Path(__file__).parent.parent.parent / "scripts" / "load_env.sh"}
-
-# Job array mapping
-declare -a JOB_IDS=(
-"""
-            
-            for job in jobs:
-                script_content += f'    "{job.job_id}"\n'
-            
-            script_content += f""")
-
-declare -a REALIZATIONS=(
-"""
-            
-            for job in jobs:
-                script_content += f'    "{job.realization}"\n'
-            
-            script_content += f""")
-
-declare -a REDSHIFTS=(
-"""
-            
-            for job in jobs:
-                script_content += f'    "{job.redshift}"\n'
-            
-            script_content += f""")
-
-declare -a OUTPUT_PATHS=(
-"""
-            
-            for job in jobs:
-                script_content += f'    "{job.output_path}"\n'
-            
-            script_content += f""")
-
-# Get job parameters for this array task
-JOB_ID="${{JOB_IDS[$SLURM_ARRAY_TASK_ID]}}"
-REALIZATION="${{REALIZATIONS[$SLURM_ARRAY_TASK_ID]}}"
-REDSHIFT="${{REDSHIFTS[$SLURM_ARRAY_TASK_ID]}}"
-OUTPUT_PATH="${{OUTPUT_PATHS[$SLURM_ARRAY_TASK_ID]}}"
-
-echo "Starting job $JOB_ID: realization $REALIZATION, redshift $REDSHIFT"
-
-# Run the mock generation with MPI (8 ranks = 2 nodes x 4 GPU, as in the single-job path)
-srun -n 8 python {Path(__file__).parent.parent.parent / "scripts" / "generate_single_mock.py"} \\
-    {self.machine} \\
-    "$OUTPUT_PATH" \\
-    --realization "$REALIZATION" \\
-    --redshift "$REDSHIFT"
-
-EXIT_CODE=$?
-
-echo "Job $JOB_ID completed with exit code $EXIT_CODE"
-exit $EXIT_CODE
-"""
+            # The %N suffix caps concurrently running tasks, so slurmctld is not
+            # asked to schedule the whole array at once
+            max_concurrent = execution.get("max_concurrent_array_tasks")
+            # Bundled tasks run back to back, so the walltime scales with them
+            tasks_per_job = execution.get("tasks_per_job", 1)
+            fields["time"] = f"{int(execution['timeout_hours'] * 60 * tasks_per_job):02d}:00"
+            # Per-job parameters go to a side file, so the script stays the
+            # same size however many tasks the array has and each task reads
+            # only its own lines
+            params_path = self.logs_dir / f"{batch.batch_id}.csv"
+            params_path.write_text("".join(
+                f"{job.job_id},{job.realization},{job.redshift},{job.output_path}\n" for job in jobs
+            ))
+            script_content = _ARRAY_JOB_SCRIPT.format(
+                last_index=-(-len(jobs) // tasks_per_job) - 1,
+                tasks_per_job=tasks_per_job,
+                throttle=f"%{max_concurrent}" if max_concurrent else "",
+                params_path=params_path,
+                **fields
+            )
         
-        with open(script_path, 'w') as f:
+        # Created executable (subject to the umask) in the same open call,
+        # rather than with a separate chmod
+        fd = os.open(script_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o755)
+        with os.fdopen(fd, "w") as f:
             f.write(script_content)
         
-        # Make script executable
-        script_path.chmod(0o755)
-        
         return script_path
     
+    def _get_max_array_size(self) -> int:
+        """Largest job array the cluster accepts (tasks 0..MaxArraySize-1).
+        
+        Read once from ``scontrol show config``; _DEFAULT_MAX_ARRAY_SIZE is
+        used when scontrol is unavailable or does not report it.
+        """
+        if self._max_array_size is None:
+            self._max_array_size = _DEFAULT_MAX_ARRAY_SIZE
+            try:
+                result = subprocess.run(["scontrol", "show", "config"],
+                                        capture_output=True, text=True, check=True)
+            except (subprocess.CalledProcessError, FileNotFoundError):
+                return self._max_array_size
+            for line in result.stdout.splitlines():
+                key, _, value = line.partition("=")
+                if key.strip() == "MaxArraySize":
+                    try:
+                        self._max_array_size = int(value)
+                    except ValueError:
+                        pass
+                    break
+        return self._max_array_size
+    
+    def _max_jobs_per_array(self) -> int:
+        """Jobs that fit in one array: MaxArraySize tasks of tasks_per_job each."""
+        return self._get_max_array_size() * self.config["execution"].get("tasks_per_job", 1)
+    
     def _submit_slurm_batch_script(self, script_path: Path) -> int:
         """Submit an existing SLURM batch script.
         
@@ -932,21 +1568,30 @@ exit $EXIT_CODE
         Returns:
             SLURM job ID
         """
-        # Submit to SLURM
+        # Space sbatch calls out so a long submission pass does not fire a
+        # burst of RPCs at slurmctld; each caller reserves the next slot
+        stagger = self.config["execution"].get("submit_stagger_s", 0.1)
+        with self._submit_lock:
+            now = time.monotonic()
+            delay = self._next_submit - now
+            self._next_submit = max(now, self._next_submit) + stagger
+        if delay > 0:
+            time.sleep(delay)
+        
+        # Submit to SLURM; --parsable prints just "<job_id>[;<cluster>]"
         result = subprocess.run(
-            ["sbatch", str(script_path)],
+            ["sbatch", "--parsable", str(script_path)],
             capture_output=True,
             text=True,
             check=True
         )
         
-        # Parse job ID from sbatch output
-        output_lines = result.stdout.strip().split('\n')
-        for line in output_lines:
-            if "Submitted batch job" in line:
-                return int(line.split()[-1])
+        self._last_submit = time.monotonic()
         
-        raise RuntimeError(f"Could not parse SLURM job ID from: {result.stdout}")
+        try:
+            return int(result.stdout.strip().split(";")[0])
+        except ValueError:
+            raise RuntimeError(f"Could not parse SLURM job ID from: {result.stdout}") from None
     
     def _submit_slurm_batch(self, batch: BatchSpec, jobs: List[JobSpec]) -> int:
         """Submit a batch of jobs as SLURM array job (legacy method).
@@ -990,34 +1635,38 @@ exit $EXIT_CODE
         (flagged MISSING_INPUT). Returns the number of runnable jobs added.
         Run stage_jobs() afterward to generate their scripts.
         """
-        existing = set()
-        for st in JobStatus:
-            existing |= {j.job_id for j in self.job_db.get_jobs_by_status(st)}
+        existing = {job_id for job_id, *_ in self.job_db.iter_jobs_minimal(list(JobStatus))}
 
         added = 0
+        jobs = []
+        output_dirs = set()
+        created_at = _utc_timestamp()
         redshifts = self.config["science"]["redshifts"]
+        redshift_tags = [(redshift, f"z{redshift:.3f}") for redshift in redshifts]
         hierarchical = self.config["outputs"]["structure"] == "hierarchical"
         for realization in realization_ids:
             runnable = realization_runnable(realization, redshifts)
-            for redshift in redshifts:
-                job_id = f"r{realization:04d}_z{redshift:.3f}"
+            status = JobStatus.PENDING if runnable else JobStatus.MISSING_INPUT
+            output_dir, rows = self._realization_job_paths(realization, redshift_tags, hierarchical)
+            for job_id, redshift, output_path in rows:
                 if job_id in existing:
                     continue
-                if hierarchical:
-                    output_path = self.catalogs_dir / f"r{realization:04d}" / f"mock_z{redshift:.3f}.hdf5"
-                else:
-                    output_path = self.catalogs_dir / f"mock_r{realization:04d}_z{redshift:.3f}.hdf5"
                 if runnable:
-                    output_path.parent.mkdir(parents=True, exist_ok=True)
-                self.job_db.insert_job(JobSpec(
+                    output_dirs.add(output_dir)
+                jobs.append(JobSpec(
                     job_id=job_id,
                     realization=realization,
                     redshift=redshift,
-                    output_path=str(output_path),
-                    status=JobStatus.PENDING if runnable else JobStatus.MISSING_INPUT,
+                    output_path=output_path,
+                    status=status,
+                    created_at=created_at,
                 ))
                 if runnable:
                     added += 1
+        for output_dir in output_dirs:
+            output_dir.mkdir(parents=True, exist_ok=True)
+        self.job_db.insert_jobs(jobs)
+        self._total_jobs += len(jobs)
         return added
 
     def _box_done(self, job) -> bool:
@@ -1029,12 +1678,15 @@ exit $EXIT_CODE
 
         Each array runs every input-complete realization at that redshift whose
         output catalog is not already on disk — one sbatch per redshift instead
-        of one per box. Returns [(z, n_tasks, slurm_job_id), ...].
+        of one per box. A redshift with more boxes than fit in MaxArraySize
+        tasks (of execution.tasks_per_job boxes each) is split into
+        consecutive arrays (batch ids suffixed ``_p<k>``). Returns
+        [(z, n_tasks, slurm_job_id), ...], one entry per array.
         """
         redshifts = self.config["science"]["redshifts"]
         by_z = {}
         for st in [JobStatus.PENDING, JobStatus.STAGED, JobStatus.QUEUED]:
-            for j in self.job_db.get_jobs_by_status(st):
+            for j in self.job_db.iter_jobs_by_status(st):
                 by_z.setdefault(round(j.redshift, 3), []).append(j)
 
         submitted = []
@@ -1046,18 +1698,24 @@ exit $EXIT_CODE
             if not jobs:
                 print(f"z={z}: nothing to submit (all done or none runnable)")
                 continue
-            batch = BatchSpec(batch_id=f"z{z:.3f}_arr_{int(time.time())}",
-                              job_ids=[j.job_id for j in jobs])
-            script_path = self._create_slurm_batch_script(batch, jobs)
-            sid = self._submit_slurm_batch_script(script_path)
-            batch.status = JobStatus.QUEUED
-            batch.slurm_array_id = sid
-            batch.submitted_at = datetime.utcnow().isoformat()
-            self.job_db.insert_batch(batch)
-            for j in jobs:
-                self.job_db.update_job_status(j.job_id, JobStatus.QUEUED, slurm_job_id=sid)
-            submitted.append((z, len(jobs), sid))
-            print(f"submitted z={z}: array of {len(jobs)} tasks as SLURM {sid}")
+            now = _utc_timestamp()
+            batch_id = f"z{z:.3f}_arr_{int(time.time())}"
+            max_size = self._max_jobs_per_array()
+            n_parts = -(-len(jobs) // max_size)
+            for part in range(n_parts):
+                part_jobs = jobs[part * max_size:(part + 1) * max_size]
+                batch = BatchSpec(batch_id=batch_id if n_parts == 1 else f"{batch_id}_p{part}",
+                                  job_ids=[j.job_id for j in part_jobs], created_at=now)
+                script_path = self._create_slurm_batch_script(batch, part_jobs)
+                sid = self._submit_slurm_batch_script(script_path)
+                batch.status = JobStatus.QUEUED
+                batch.slurm_array_id = sid
+                batch.submitted_at = now
+                self.job_db.insert_batch(batch)
+                # One UPDATE for the whole array via its batch_jobs rows
+                self.job_db.update_jobs_in_batch(batch.batch_id, JobStatus.QUEUED, slurm_job_id=sid)
+                submitted.append((z, len(part_jobs), sid))
+                print(f"submitted z={z}: array of {len(part_jobs)} tasks as SLURM {sid}")
         return submitted
 
     def submit_redshift_individual(self, z_order, skip_done=True) -> int:
@@ -1073,7 +1731,7 @@ exit $EXIT_CODE
         redshifts = self.config["science"]["redshifts"]
         by_z = {}
         for st in [JobStatus.PENDING, JobStatus.STAGED, JobStatus.QUEUED]:
-            for j in self.job_db.get_jobs_by_status(st):
+            for j in self.job_db.iter_jobs_by_status(st):
                 by_z.setdefault(round(j.redshift, 3), []).append(j)
 
         total = 0
@@ -1082,8 +1740,11 @@ exit $EXIT_CODE
             jobs = [j for j in jobs if realization_runnable(j.realization, redshifts)]
             if skip_done:
                 jobs = [j for j in jobs if not self._box_done(j)]
+            # One creation stamp per redshift slice, not per box
+            created_at = _utc_timestamp()
             for j in jobs:
-                batch = BatchSpec(batch_id=f"z{z:.3f}_r{j.realization:04d}", job_ids=[j.job_id])
+                batch = BatchSpec(batch_id=f"z{z:.3f}_r{j.realization:04d}", job_ids=[j.job_id],
+                                  created_at=created_at)
                 script_path = self._create_slurm_batch_script(batch, [j])
                 sid = self._submit_slurm_batch_script(script_path)
                 self.job_db.update_job_status(j.job_id, JobStatus.QUEUED, slurm_job_id=sid)
@@ -1091,28 +1752,36 @@ exit $EXIT_CODE
             print(f"z={z}: submitted {len(jobs)} individual jobs ({total} total)", flush=True)
         return total
 
-    def _query_sacct_states(self) -> Optional[Dict[int, tuple]]:
-        """Map SLURM job id -> (State, ExitCode) for this user's recent jobs.
+    def _query_sacct_states(self, slurm_job_ids) -> Optional[Dict[int, tuple]]:
+        """Map SLURM job id -> (State, ExitCode) for the given jobs.
 
         Used to gate completion on a clean exit code rather than output-path
         existence: a job that wrote a complete catalog but was wall-killed
         (TIMEOUT) leaves its output path in place yet must not count as
-        COMPLETED. Returns None if sacct cannot be queried, in which case the
-        caller falls back to legacy path-existence gating.
+        COMPLETED. The ids are passed with -j in chunks of _SACCT_CHUNK, which
+        also lifts sacct's default start-of-today window, so jobs that ended
+        before midnight are still found. Returns None if sacct cannot be
+        queried, in which case the caller falls back to legacy path-existence
+        gating.
         """
+        slurm_job_ids = sorted(slurm_job_ids)
+        stdout = []
         try:
-            result = subprocess.run(
-                ["sacct", "-u", os.getenv("USER", ""), "-X", "-n", "-P",
-                 "--format=JobIDRaw,State,ExitCode"],
-                capture_output=True,
-                text=True,
-                check=True
-            )
+            for start in range(0, len(slurm_job_ids), _SACCT_CHUNK):
+                chunk = slurm_job_ids[start:start + _SACCT_CHUNK]
+                result = subprocess.run(
+                    ["sacct", "-j", ",".join(map(str, chunk)), "-X", "-n", "-P",
+                     "--format=JobIDRaw,State,ExitCode"],
+                    capture_output=True,
+                    text=True,
+                    check=True
+                )
+                stdout.append(result.stdout)
         except (subprocess.CalledProcessError, FileNotFoundError):
             return None
 
         states: Dict[int, tuple] = {}
-        for line in result.stdout.strip().split('\n'):
+        for line in "".join(stdout).split('\n'):
             if not line:
                 continue
             parts = line.split('|')
@@ -1128,76 +1797,171 @@ exit $EXIT_CODE
                 continue
         return states
 
+    def _query_squeue(self, slurm_job_ids) -> Dict[int, str]:
+        """Map SLURM job id -> state for the given jobs still in the queue.
+
+        The query is scoped with --jobs, in chunks of _SQUEUE_CHUNK ids so
+        the argument stays well under the kernel's per-argument limit; if
+        squeue rejects a list (e.g. an id already purged from slurmctld),
+        falls back to all of this user's jobs. Returns an empty dict if squeue
+        cannot be run or its output cannot be parsed.
+        """
+        slurm_job_ids = sorted(slurm_job_ids)
+        unscoped = ["squeue", "-u", os.getenv("USER", ""), "--format=%i,%T", "--noheader"]
+        try:
+            try:
+                stdout = []
+                for start in range(0, len(slurm_job_ids), _SQUEUE_CHUNK):
+                    chunk = slurm_job_ids[start:start + _SQUEUE_CHUNK]
+                    result = subprocess.run(
+                        ["squeue", "--jobs", ",".join(map(str, chunk)),
+                         "--format=%i,%T", "--noheader"],
+                        capture_output=True,
+                        text=True,
+                        check=True
+                    )
+                    stdout.append(result.stdout)
+            except subprocess.CalledProcessError:
+                result = subprocess.run(unscoped, capture_output=True, text=True, check=True)
+                stdout = [result.stdout]
+            
+            slurm_jobs = {}
+            for line in "\n".join(stdout).split('\n'):
+                if line:
+                    job_id, status = line.split(',')
+                    slurm_jobs[int(job_id)] = status
+            return slurm_jobs
+                    
+        except (subprocess.CalledProcessError, OSError, ValueError):
+            return {}
+
+    def start_squeue_poller(self, interval_s: Optional[float] = None) -> bool:
+        """Serve queue states from a background squeue stream (for long-running monitors).
+        
+        Args:
+            interval_s: Seconds between squeue iterations (default: the
+                execution.squeue_poll_interval_s config option, else 30)
+            
+        Returns:
+            True if the poller started; otherwise one-shot queries remain in use
+        """
+        if interval_s is None:
+            interval_s = self.config["execution"].get("squeue_poll_interval_s", 30)
+        poller = SqueuePoller(interval_s)
+        try:
+            poller.start()
+        except OSError as e:
+            print(f"Warning: could not start squeue poller ({e}); using one-shot squeue")
+            return False
+        self._squeue_poller = poller
+        return True
+
+    def _get_squeue_snapshot(self, slurm_job_ids) -> Dict[int, str]:
+        """Queue states for ``slurm_job_ids``, cached for SQUEUE_POLL_INTERVAL.
+
+        A running poller's latest listing is used when it postdates this
+        process's last submission. Otherwise a cached snapshot is reused only
+        if it was taken for a superset of the requested ids, so newly
+        submitted jobs always trigger a fresh query.
+        """
+        slurm_job_ids = frozenset(slurm_job_ids)
+        if not slurm_job_ids:
+            return {}
+        if self._squeue_poller is not None:
+            polled = self._squeue_poller.snapshot()
+            if polled is not None and polled[0] >= self._last_submit:
+                return {sid: state for sid, state in polled[1].items() if sid in slurm_job_ids}
+        taken_at, cached_ids, snapshot = self._squeue_cache
+        if time.monotonic() - taken_at < self._squeue_interval and slurm_job_ids <= cached_ids:
+            return snapshot
+        snapshot = self._query_squeue(slurm_job_ids)
+        self._squeue_cache = (time.monotonic(), slurm_job_ids, snapshot)
+        return snapshot
+
+    def _get_sacct_states(self, slurm_job_ids) -> Optional[Dict[int, tuple]]:
+        """Accounting states for ``slurm_job_ids``, cached like the squeue snapshot."""
+        slurm_job_ids = frozenset(slurm_job_ids)
+        if not slurm_job_ids:
+            return {}
+        taken_at, cached_ids, states = self._sacct_cache
+        if time.monotonic() - taken_at < self._squeue_interval and slurm_job_ids <= cached_ids:
+            return states
+        states = self._query_sacct_states(slurm_job_ids)
+        if states is not None:
+            self._sacct_cache = (time.monotonic(), slurm_job_ids, states)
+        return states
+
+    def _scan_done_markers(self) -> set:
+        """Job ids with a completion marker (``<job_id>.done``) in done_dir."""
+        try:
+            with os.scandir(self.done_dir) as entries:
+                return {entry.name[:-5] for entry in entries if entry.name.endswith(".done")}
+        except FileNotFoundError:
+            return set()
+
     def check_job_status(self) -> Dict[str, int]:
         """Check status of all jobs and update database.
 
         Returns:
             Updated production statistics
         """
-        # First, ensure we have jobs in the database
-        stats = self.job_db.get_production_stats()
-        total_jobs = sum(stats.values())
-        
-        if total_jobs == 0:
+        # First, ensure we have jobs in the database. The cached count is only
+        # re-checked when it is zero, in case jobs were added by another handle
+        if self._total_jobs == 0:
+            self._total_jobs = self.job_db.count_jobs()
+        if self._total_jobs == 0:
             # Database is empty, need to reinitialize
             print("Warning: No jobs found in database, reinitializing...")
             self.initialize_production()
-            stats = self.job_db.get_production_stats()
         
-        # Query SLURM for running jobs
-        try:
-            result = subprocess.run(
-                ["squeue", "-u", os.getenv("USER", ""), "--format=%i,%T", "--noheader"],
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            
-            slurm_jobs = {}
-            for line in result.stdout.strip().split('\n'):
-                if line:
-                    job_id, status = line.split(',')
-                    slurm_jobs[int(job_id)] = status
-                    
-        except (subprocess.CalledProcessError, ValueError):
-            slurm_jobs = {}
+        # Query SLURM for running jobs, scoped to the ids this production knows
+        slurm_jobs = self._get_squeue_snapshot(self.job_db.iter_active_slurm_ids())
+        
+        # Load the snapshot SQL-side: queued jobs squeue reports running are
+        # promoted by one joined UPDATE, and only jobs that left the queue (or
+        # were never submitted) come back for the terminal decisions below
+        now = _utc_timestamp()
+        self.job_db.load_squeue_snapshot(slurm_jobs, now)
+        off_queue = list(self.job_db.iter_jobs_off_queue())
         
         # Terminal SLURM states for jobs no longer in the live queue. Completion
         # is gated on a clean exit (COMPLETED, exit 0:0) AND a present output,
         # not on the output path alone — a wall-killed job can leave a complete
         # file yet must be counted FAILED so it is retried/diagnosed, not hidden.
-        sacct_states = self._query_sacct_states()
-
-        all_jobs = []
-        for status in [JobStatus.PENDING, JobStatus.STAGED, JobStatus.QUEUED, JobStatus.RUNNING]:
-            all_jobs.extend(self.job_db.get_jobs_by_status(status))
-
-        for job in all_jobs:
-            sid = job.slurm_job_id
+        # One batched, cached sacct covers every off-queue job with a SLURM id
+        sacct_states = self._get_sacct_states(sid for _, _, sid, _ in off_queue if sid)
+
+        # Output existence is only needed for jobs that left the queue. Jobs
+        # whose script left a completion marker are settled by one directory
+        # scan. For the rest, a directory holding several candidates is listed
+        # once rather than stat-ing every path, and a lone candidate is stat-ed;
+        # either way the metadata RPCs (Lustre/GPFS) are overlapped on threads
+        done = self._scan_done_markers()
+        output_exists = {}
+        by_dir = {}
+        for job_id, output_path, sid, _ in off_queue:
+            if job_id in done:
+                output_exists[job_id] = True
+            else:
+                parent, name = os.path.split(output_path)
+                by_dir.setdefault(parent, []).append((job_id, name))
+        if by_dir:
+            with ThreadPoolExecutor(max_workers=32) as pool:
+                for entries, names in zip(by_dir.values(), pool.map(_probe_outputs, by_dir.items())):
+                    for job_id, name in entries:
+                        output_exists[job_id] = name in names
 
-            # Still active in the queue: reflect running, decide nothing terminal.
-            if sid and sid in slurm_jobs:
-                slurm_status = slurm_jobs[sid]
-                if slurm_status in ["RUNNING", "R"] and job.status == JobStatus.QUEUED:
-                    self.job_db.update_job_status(
-                        job.job_id,
-                        JobStatus.RUNNING,
-                        started_at=datetime.utcnow().isoformat()
-                    )
-                continue
+        completed, failed = [], []
 
-            output_exists = Path(job.output_path).exists()
+        for job_id, output_path, sid, status in off_queue:
+            exists = output_exists[job_id]
 
             # Fall back to legacy path-existence gating when a clean exit cannot
             # be verified: sacct unavailable, or this job has no recorded SLURM id
             # (submitted before the id was persisted to the DB).
             if sacct_states is None or not sid:
-                if output_exists and job.status != JobStatus.COMPLETED:
-                    self.job_db.update_job_status(
-                        job.job_id,
-                        JobStatus.COMPLETED,
-                        completed_at=datetime.utcnow().isoformat()
-                    )
+                if exists:
+                    completed.append((now, job_id))
                 continue
 
             terminal = sacct_states.get(sid) if sid else None
@@ -1208,33 +1972,24 @@ exit $EXIT_CODE
                 if state in ("PENDING", "RUNNING", "REQUEUED", "RESIZING", "SUSPENDED"):
                     # Not yet terminal (race with squeue); revisit next poll.
                     continue
-                if clean_exit and output_exists:
-                    if job.status != JobStatus.COMPLETED:
-                        self.job_db.update_job_status(
-                            job.job_id,
-                            JobStatus.COMPLETED,
-                            completed_at=datetime.utcnow().isoformat()
-                        )
+                if clean_exit and exists:
+                    completed.append((now, job_id))
                 else:
                     reason = f"SLURM state {state} (exit {exit_code})"
-                    if clean_exit and not output_exists:
-                        reason = f"clean exit but missing output: {job.output_path}"
-                    if job.status != JobStatus.FAILED:
-                        self.job_db.update_job_status(
-                            job.job_id,
-                            JobStatus.FAILED,
-                            error_message=reason
-                        )
-            elif sid and not output_exists:
+                    if clean_exit and not exists:
+                        reason = f"clean exit but missing output: {output_path}"
+                    failed.append((reason, job_id))
+            elif sid and not exists:
                 # Gone from the queue, no accounting record, no output: lost job.
-                if job.status in [JobStatus.QUEUED, JobStatus.RUNNING]:
-                    self.job_db.update_job_status(
-                        job.job_id,
-                        JobStatus.FAILED,
-                        error_message="Job disappeared from SLURM without output"
-                    )
+                if status in [JobStatus.QUEUED, JobStatus.RUNNING]:
+                    failed.append(("Job disappeared from SLURM without output", job_id))
             # else: not yet submitted (no slurm id) — leave as-is.
 
+        self.job_db.apply_status_updates([
+            (JobStatus.COMPLETED, "completed_at", completed),
+            (JobStatus.FAILED, "error_message", failed),
+        ])
+
         return self.job_db.get_production_stats()
     
     def retry_failed_jobs(self) -> int:
@@ -1243,23 +1998,16 @@ exit $EXIT_CODE
         Returns:
             Number of jobs marked for retry
         """
-        failed_jobs = self.job_db.get_jobs_by_status(JobStatus.FAILED)
         retry_policy = self.config["execution"]["retry_policy"]
         max_retries = retry_policy["max_retries"]
         
-        retried_count = 0
-        
-        for job in failed_jobs:
-            if job.submit_count <= max_retries:
-                # Mark job for retry
-                self.job_db.update_job_status(
-                    job.job_id,
-                    JobStatus.PENDING,
-                    error_message=None
-                )
-                retried_count += 1
+        # A stale completion marker would report the rerun done before it
+        # starts, so markers go before the jobs are reset
+        for job_id in self.job_db.get_retryable_job_ids(max_retries):
+            (self.done_dir / f"{job_id}.done").unlink(missing_ok=True)
         
-        return retried_count
+        # Mark jobs for retry in one UPDATE; the submit_count filter runs in SQL
+        return self.job_db.bulk_retry(max_retries)
     
     def get_git_tag(self) -> Optional[str]:
         """Get the git tag associated with this production."""
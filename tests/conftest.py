@@ -9,7 +9,7 @@ from unittest.mock import Mock, patch, MagicMock
 
 import pytest
 
-from tests.integration_core import MockGenerationConfig, run_full_pipeline
+from tests.integration_core import MockGenerationConfig, run_full_pipeline, shared_tmp_base
 
 
 @pytest.fixture
@@ -58,9 +58,8 @@ def mock_environment(monkeypatch):
 @pytest.fixture(scope="session") 
 def shared_catalog():
     """Generate a single production catalog once per session for all tests."""
-    # Use shared filesystem location for MPI-HDF5 compatibility  
-    base_dir = Path("/global/cfs/cdirs/m4943/Simulations/covariance_mocks/validation/tmp")
-    base_dir.mkdir(parents=True, exist_ok=True)
+    # Use shared filesystem location for MPI-HDF5 compatibility
+    base_dir = shared_tmp_base()
     
     # Create session-specific directory
     import uuid
@@ -4,7 +4,10 @@ This module provides shared functions for both pytest and shell script workflows
 ensuring consistent behavior across testing approaches.
 """
 
+import functools
 import os
+import re
+import shlex
 import subprocess
 import sys
 from pathlib import Path
@@ -61,10 +64,79 @@ def get_script_dir() -> Path:
     return Path(__file__).parent.parent / "scripts"
 
 
+def shared_tmp_base() -> Path:
+    """Base directory for pipeline outputs that every MPI rank must see.
+    
+    Scratch (Lustre, visible to every rank) is preferred over CFS, which is
+    slow for small-file traffic; callers remove their directories afterwards,
+    so nothing needs to persist on CFS.
+    """
+    scratch = os.getenv("PSCRATCH") or os.getenv("SCRATCH")
+    if scratch:
+        base_dir = Path(scratch) / "covariance_mocks_validation"
+    else:
+        base_dir = Path("/global/cfs/cdirs/m4943/Simulations/covariance_mocks/validation/tmp")
+    base_dir.mkdir(parents=True, exist_ok=True)
+    return base_dir
+
+
 def load_environment() -> Dict[str, str]:
-    """Load the conda environment and return environment variables."""
-    script_dir = get_script_dir()
-    load_env_script = script_dir / "load_env.sh"
+    """Load the conda environment and return environment variables.
+    
+    If this process already runs in the loaded environment (CONDA_ENV is set
+    by load_env.sh), its own environment is returned without forking bash.
+    Otherwise the sourced environment is cached until load_env.sh changes.
+    """
+    if "CONDA_ENV" in os.environ:
+        return dict(os.environ)
+    
+    load_env_script = get_script_dir() / "load_env.sh"
+    try:
+        mtime_ns = load_env_script.stat().st_mtime_ns
+    except FileNotFoundError:
+        mtime_ns = 0
+    # Copy so callers may modify their environment without touching the cache
+    return dict(_load_environment_cached(str(load_env_script), mtime_ns))
+
+
+# ``export NAME=value`` with a literal value (no expansion or substitution)
+_LITERAL_EXPORT = re.compile(r"^\s*export\s+([A-Za-z_][A-Za-z0-9_]*)=([^$`]*)$")
+
+
+def _parse_literal_exports(script_text: str) -> Optional[Dict[str, str]]:
+    """Variables set by a script made only of literal exports and comments.
+    
+    Returns None if any other line is present (module loads, conditionals,
+    expansions), since only bash can evaluate those.
+    """
+    exports = {}
+    for line in script_text.splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        match = _LITERAL_EXPORT.match(line)
+        if match is None:
+            return None
+        try:
+            words = shlex.split(match.group(2), comments=True)
+        except ValueError:
+            return None
+        if len(words) > 1:
+            return None
+        exports[match.group(1)] = words[0] if words else ""
+    return exports
+
+
+@functools.lru_cache(maxsize=4)
+def _load_environment_cached(load_env_script: str, mtime_ns: int) -> Dict[str, str]:
+    """Source ``load_env_script`` in bash; keyed by mtime so edits invalidate."""
+    # A script of plain exports is applied in Python, without forking bash
+    try:
+        exports = _parse_literal_exports(Path(load_env_script).read_text())
+    except OSError:
+        exports = None
+    if exports is not None:
+        return {**os.environ, **exports}
     
     # Source the environment script and capture environment
     cmd = f"source {load_env_script} && env"
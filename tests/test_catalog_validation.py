@@ -4,7 +4,12 @@ These tests compare generated catalogs to validated reference catalogs
 to ensure scientific correctness and reproducibility.
 """
 
-import filecmp
+import functools
+import hashlib
+import mmap
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 from pathlib import Path
 import tempfile
@@ -17,14 +22,14 @@ try:
 except ImportError:
     HDF5_AVAILABLE = False
 
-from tests.integration_core import MockGenerationConfig, run_full_pipeline
+from tests.integration_core import MockGenerationConfig, run_full_pipeline, shared_tmp_base
 
 
 # Reference catalog location
 REFERENCE_CATALOG = Path("/global/cfs/cdirs/m4943/Simulations/covariance_mocks/validation/validated/mock_AbacusSummit_small_c000_ph3000_z1.100.hdf5")
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def reference_catalog_path():
     """Provide path to reference catalog."""
     if not REFERENCE_CATALOG.exists():
@@ -32,17 +37,15 @@ def reference_catalog_path():
     return REFERENCE_CATALOG
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def validation_output_dir():
-    """Provide output directory for validation tests."""
-    # Use shared filesystem location for MPI-HDF5 compatibility
-    base_dir = Path("/global/cfs/cdirs/m4943/Simulations/covariance_mocks/validation/tmp")
-    base_dir.mkdir(parents=True, exist_ok=True)
+    """Provide output directory for validation tests.
     
-    # Create unique temporary directory
-    import uuid
-    test_dir = base_dir / f"validation_test_{uuid.uuid4().hex[:8]}"
-    test_dir.mkdir(parents=True, exist_ok=True)
+    One directory per session (created atomically by mkdtemp, removed once at
+    the end); tests write to their own subdirectories of it.
+    """
+    # Use shared filesystem location for MPI-HDF5 compatibility
+    test_dir = Path(tempfile.mkdtemp(prefix="validation_test_", dir=shared_tmp_base()))
     
     try:
         yield test_dir
@@ -57,7 +60,7 @@ def validation_output_dir():
 def validation_config(validation_output_dir):
     """Provide configuration that should produce identical results to reference."""
     return MockGenerationConfig(
-        output_dir=str(validation_output_dir),
+        output_dir=str(validation_output_dir / "reference_match"),
         test_mode=False,  # Production mode to match reference
         force_run=True,
         time_limit=10
@@ -65,23 +68,201 @@ def validation_config(validation_output_dir):
 
 
 def load_hdf5_datasets(file_path):
-    """Load all datasets from HDF5 file into dictionary."""
+    """Load all datasets from HDF5 file into dictionary.
+    
+    Files are read once per session (until modified); each caller gets its
+    own dictionary over the shared arrays.
+    """
     if not HDF5_AVAILABLE:
         pytest.skip("h5py not available")
     
+    file_path = Path(file_path)
+    return dict(_load_hdf5_datasets_cached(str(file_path), file_path.stat().st_mtime_ns))
+
+
+@functools.lru_cache(maxsize=2)
+def _load_hdf5_datasets_cached(path_str, mtime_ns):
+    """Read every dataset of ``path_str``; keyed by mtime so rewrites invalidate."""
     datasets = {}
-    with h5py.File(file_path, 'r') as f:
-        def visit_func(name, obj):
-            if isinstance(obj, h5py.Dataset):
-                # Handle both scalar and array datasets
-                if obj.shape == ():  # Scalar dataset
-                    datasets[name] = obj[()]
-                else:  # Array dataset
-                    datasets[name] = obj[:]
-        f.visititems(visit_func)
+    # 64 MiB chunk cache so chunked datasets are not re-read per chunk row;
+    # a prime slot count well above the chunks it can hold keeps the hash
+    # collisions (which force evictions) rare, and w0 favours evicting
+    # chunks that have been read in full
+    with h5py.File(path_str, 'r', rdcc_nbytes=64 * 1024 * 1024,
+                   rdcc_nslots=100003, rdcc_w0=0.75) as f:
+        for name in _dataset_names(f):
+            ds = f[name]
+            # Handle both scalar and array datasets
+            if ds.shape == ():  # Scalar dataset
+                datasets[name] = ds[()]
+            elif ds.size and ds.dtype.kind != 'O':  # Fixed-size array dataset
+                # read_direct fills a preallocated array, skipping the
+                # high-level selection machinery behind ds[:]
+                array = np.empty(ds.shape, dtype=ds.dtype)
+                ds.read_direct(array)
+                datasets[name] = array
+            else:  # Empty or variable-length array dataset
+                datasets[name] = ds[:]
     return datasets
 
 
+def _file_digest(path, chunk_size=8 * 1024 * 1024):
+    """BLAKE2b digest of a file's contents."""
+    with open(path, 'rb') as f:
+        if sys.version_info >= (3, 11):
+            return hashlib.file_digest(f, 'blake2b').digest()
+        digest = hashlib.blake2b()
+        if os.fstat(f.fileno()).st_size == 0:
+            return digest.digest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if hasattr(mm, 'madvise'):
+                mm.madvise(mmap.MADV_SEQUENTIAL)
+            view = memoryview(mm)
+            try:
+                for start in range(0, len(view), chunk_size):
+                    digest.update(view[start:start + chunk_size])
+            finally:
+                view.release()
+        return digest.digest()
+
+
+def _edge_bytes(path, size, edge=64 * 1024):
+    """First and last ``edge`` bytes of a file of known ``size``."""
+    with open(path, 'rb') as f:
+        head = f.read(edge)
+        f.seek(max(0, size - edge))
+        return head, f.read(edge)
+
+
+def _fast_file_equal(path_a, path_b):
+    """True if two files have identical contents.
+    
+    Cheap checks come first: the same inode, then size, then the first and
+    last 64 KiB (an HDF5 file's superblock/object headers and trailing heap,
+    where differing catalogs almost always differ). Only candidates that
+    pass are hashed in full, concurrently (hashlib releases the GIL),
+    instead of filecmp's block-by-block loop.
+    """
+    stat_a, stat_b = os.stat(path_a), os.stat(path_b)
+    if (stat_a.st_dev, stat_a.st_ino) == (stat_b.st_dev, stat_b.st_ino):
+        return True
+    if stat_a.st_size != stat_b.st_size:
+        return False
+    if _edge_bytes(path_a, stat_a.st_size) != _edge_bytes(path_b, stat_b.st_size):
+        return False
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        digest_a, digest_b = pool.map(_file_digest, (path_a, path_b))
+    return digest_a == digest_b
+
+
+def load_hdf5_metadata(file_path):
+    """Map each dataset in an HDF5 file to its (shape, dtype), reading no data."""
+    if not HDF5_AVAILABLE:
+        pytest.skip("h5py not available")
+    
+    with h5py.File(file_path, 'r') as f:
+        return {name: (f[name].shape, f[name].dtype) for name in _dataset_names(f)}
+
+
+def check_all_finite(file_path):
+    """Names of floating-point datasets holding any non-finite value.
+    
+    Chunked datasets are scanned one chunk at a time, stopping at the first
+    chunk with a non-finite value, so memory stays at one chunk.
+    """
+    if not HDF5_AVAILABLE:
+        pytest.skip("h5py not available")
+    
+    non_finite = []
+    with h5py.File(file_path, 'r') as f:
+        for name in _dataset_names(f):
+            ds = f[name]
+            if not np.issubdtype(ds.dtype, np.floating) or ds.size == 0:
+                continue
+            blocks = [()] if ds.chunks is None else ds.iter_chunks()
+            if not all(np.isfinite(ds[block]).all() for block in blocks):
+                non_finite.append(name)
+    return non_finite
+
+
+def _name_differences(ref_names, test_names):
+    """Messages for dataset names present in only one catalog."""
+    differences = []
+    missing_in_test = ref_names - test_names
+    extra_in_test = test_names - ref_names
+    
+    if missing_in_test:
+        differences.append(f"Missing datasets in test: {missing_in_test}")
+    if extra_in_test:
+        differences.append(f"Extra datasets in test: {extra_in_test}")
+    
+    return differences
+
+
+def _header_difference(name, ref_array, test_array):
+    """Message if two datasets (or arrays) differ in shape or dtype, else None."""
+    # Check shapes match
+    if ref_array.shape != test_array.shape:
+        return f"Shape mismatch for {name}: ref={ref_array.shape}, test={test_array.shape}"
+    
+    # Check dtypes match
+    if ref_array.dtype != test_array.dtype:
+        return f"Dtype mismatch for {name}: ref={ref_array.dtype}, test={test_array.dtype}"
+    
+    return None
+
+
+# Elements per block in the float comparison: large enough to amortize the
+# per-block numpy calls, small enough that the temporaries stay in cache
+_COMPARE_BLOCK = 1 << 20
+
+
+def _abs_difference(ref_array, test_array):
+    """|ref - test| as a new float array (inf - inf gives nan, silently)."""
+    with np.errstate(invalid='ignore', over='ignore'):
+        diff = np.asarray(np.subtract(ref_array, test_array))
+    np.abs(diff, out=diff)
+    return diff
+
+
+def _floats_close(ref_array, test_array, tolerance):
+    """allclose-style test run block by block, stopping at the first miss."""
+    ref_flat = ref_array.reshape(-1)
+    test_flat = test_array.reshape(-1)
+    for start in range(0, ref_flat.size, _COMPARE_BLOCK):
+        ref_block = ref_flat[start:start + _COMPARE_BLOCK]
+        test_block = test_flat[start:start + _COMPARE_BLOCK]
+        diff = _abs_difference(ref_block, test_block)
+        bound = np.abs(test_block) * tolerance
+        bound += tolerance
+        close = diff <= bound
+        # An infinite value is only close to the same infinity, whose
+        # difference is nan rather than 0
+        close &= np.isfinite(diff)
+        if not close.all():
+            close |= ref_block == test_block
+            if not close.all():
+                return False
+    return True
+
+
+def _value_difference(name, ref_array, test_array, tolerance):
+    """Message if two same-shaped arrays differ in value, else None."""
+    if np.issubdtype(ref_array.dtype, np.floating):
+        # For floating point, use tolerance. Matching arrays are scanned
+        # once in cache-sized blocks; the full difference (for the reported
+        # maximum) is only computed on a mismatch
+        if not _floats_close(ref_array, test_array, tolerance):
+            max_diff = _abs_difference(ref_array, test_array).max()
+            return f"Value mismatch for {name}: max_diff={max_diff}, tolerance={tolerance}"
+    else:
+        # For integers and other types, require exact equality
+        if not np.array_equal(ref_array, test_array):
+            return f"Exact value mismatch for {name}"
+    
+    return None
+
+
 def compare_datasets(ref_data, test_data, tolerance=1e-10):
     """Compare two dataset dictionaries for equality."""
     differences = []
@@ -91,41 +272,74 @@ def compare_datasets(ref_data, test_data, tolerance=1e-10):
     test_names = set(test_data.keys())
     
     if ref_names != test_names:
-        missing_in_test = ref_names - test_names
-        extra_in_test = test_names - ref_names
-        
-        if missing_in_test:
-            differences.append(f"Missing datasets in test: {missing_in_test}")
-        if extra_in_test:
-            differences.append(f"Extra datasets in test: {extra_in_test}")
-        
-        return differences
+        return _name_differences(ref_names, test_names)
     
-    # Compare each dataset
-    for name in ref_names:
+    # Compare each dataset; numpy's array loops release the GIL, so the
+    # per-dataset comparisons overlap across threads
+    def compare_one(name):
         ref_array = ref_data[name]
         test_array = test_data[name]
+        return (_header_difference(name, ref_array, test_array)
+                or _value_difference(name, ref_array, test_array, tolerance))
+    
+    with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1)) as pool:
+        differences.extend(difference for difference in pool.map(compare_one, ref_names) if difference)
+    
+    return differences
+
+
+def _dataset_names(f):
+    """Paths of every dataset in an open HDF5 file.
+    
+    Uses the low-level object visitor, which reports each node's type
+    without building a high-level Group/Dataset object for it.
+    """
+    names = []
+    
+    def collect(name, info):
+        if info.type == h5py.h5o.TYPE_DATASET:
+            names.append(name.decode())
+    
+    h5py.h5o.visit(f.id, collect, info=True)
+    return names
+
+
+def compare_hdf5_files(ref_path, test_path, tolerance=1e-10):
+    """Compare two HDF5 catalogs dataset by dataset, one chunk at a time.
+    
+    Same result format as compare_datasets, but neither file is loaded
+    whole: chunked datasets are read block by block along the reference's
+    chunk layout, so memory stays at a couple of chunks. A dataset's value
+    comparison stops at its first mismatching chunk (max_diff is that
+    chunk's).
+    """
+    if not HDF5_AVAILABLE:
+        pytest.skip("h5py not available")
+    
+    differences = []
+    with h5py.File(ref_path, 'r', rdcc_nbytes=16 * 1024 * 1024) as ref_file, \
+         h5py.File(test_path, 'r', rdcc_nbytes=16 * 1024 * 1024) as test_file:
+        ref_names = _dataset_names(ref_file)
+        test_names = _dataset_names(test_file)
+        if set(ref_names) != set(test_names):
+            return _name_differences(set(ref_names), set(test_names))
         
-        # Check shapes match
-        if ref_array.shape != test_array.shape:
-            differences.append(f"Shape mismatch for {name}: ref={ref_array.shape}, test={test_array.shape}")
-            continue
-        
-        # Check dtypes match
-        if ref_array.dtype != test_array.dtype:
-            differences.append(f"Dtype mismatch for {name}: ref={ref_array.dtype}, test={test_array.dtype}")
-            continue
-        
-        # Compare values
-        if np.issubdtype(ref_array.dtype, np.floating):
-            # For floating point, use tolerance
-            if not np.allclose(ref_array, test_array, rtol=tolerance, atol=tolerance):
-                max_diff = np.max(np.abs(ref_array - test_array))
-                differences.append(f"Value mismatch for {name}: max_diff={max_diff}, tolerance={tolerance}")
-        else:
-            # For integers and other types, require exact equality
-            if not np.array_equal(ref_array, test_array):
-                differences.append(f"Exact value mismatch for {name}")
+        for name in ref_names:
+            ref_ds = ref_file[name]
+            test_ds = test_file[name]
+            
+            difference = _header_difference(name, ref_ds, test_ds)
+            if difference is None:
+                if ref_ds.chunks is None or ref_ds.size == 0:
+                    blocks = [()]
+                else:
+                    blocks = ref_ds.iter_chunks()
+                for block in blocks:
+                    difference = _value_difference(name, ref_ds[block], test_ds[block], tolerance)
+                    if difference:
+                        break
+            if difference:
+                differences.append(difference)
     
     return differences
 
@@ -136,13 +350,13 @@ class TestCatalogValidation:
     @pytest.mark.system
     @pytest.mark.slow
     @pytest.mark.skipif(not HDF5_AVAILABLE, reason="h5py not available")
-    def test_catalog_identical_to_reference(self, shared_catalog, reference_catalog_path):
+    def test_catalog_identical_to_reference(self, reference_catalog_path, shared_catalog):
         """Test that shared production catalog is identical to reference catalog."""
         # Use shared production catalog instead of generating new one
         
         # Compare catalogs using simple file comparison
         # For reproducibility tests, catalogs should be byte-for-byte identical
-        catalogs_identical = filecmp.cmp(reference_catalog_path, shared_catalog.catalog_path, shallow=False)
+        catalogs_identical = _fast_file_equal(reference_catalog_path, shared_catalog.catalog_path)
         
         # Provide helpful error message if different
         if not catalogs_identical:
@@ -155,6 +369,8 @@ class TestCatalogValidation:
                 error_msg += "\n  File sizes differ - catalogs are not identical"
             else:
                 error_msg += "\n  File sizes match but content differs"
+            for difference in compare_hdf5_files(reference_catalog_path, shared_catalog.catalog_path):
+                error_msg += f"\n  - {difference}"
         
         assert catalogs_identical, error_msg if not catalogs_identical else ""
     
@@ -168,19 +384,19 @@ class TestCatalogValidation:
         assert reference_catalog_path.exists(), f"Reference catalog not found: {reference_catalog_path}"
         assert reference_catalog_path.is_file(), f"Reference catalog is not a file: {reference_catalog_path}"
         
-        # Check it's a valid HDF5 file
+        # Check it's a valid HDF5 file (metadata only; no dataset is read)
         try:
-            ref_data = load_hdf5_datasets(reference_catalog_path)
+            ref_meta = load_hdf5_metadata(reference_catalog_path)
         except Exception as e:
             pytest.fail(f"Cannot read reference catalog: {e}")
         
         # Check it has expected datasets
-        assert len(ref_data) > 0, "Reference catalog contains no datasets"
+        assert len(ref_meta) > 0, "Reference catalog contains no datasets"
         
         # Log dataset information for debugging
         print(f"\nReference catalog datasets:")
-        for name, data in ref_data.items():
-            print(f"  {name}: shape={data.shape}, dtype={data.dtype}")
+        for name, (shape, dtype) in ref_meta.items():
+            print(f"  {name}: shape={shape}, dtype={dtype}")
     
     @pytest.mark.system
     @pytest.mark.slow
@@ -200,7 +416,7 @@ class TestCatalogValidation:
         
         # Compare shared catalog with new catalog for reproducibility
         # For reproducibility, multiple runs should produce identical files
-        catalogs_identical = filecmp.cmp(shared_catalog.catalog_path, config2.catalog_path, shallow=False)
+        catalogs_identical = _fast_file_equal(shared_catalog.catalog_path, config2.catalog_path)
         
         if not catalogs_identical:
             size1 = shared_catalog.catalog_path.stat().st_size
@@ -212,6 +428,8 @@ class TestCatalogValidation:
                 error_msg += "\n  File sizes differ - runs are not reproducible"
             else:
                 error_msg += "\n  File sizes match but content differs - runs are not reproducible"
+            for difference in compare_hdf5_files(shared_catalog.catalog_path, config2.catalog_path):
+                error_msg += f"\n  - {difference}"
         
         assert catalogs_identical, error_msg if not catalogs_identical else ""
 
@@ -224,13 +442,13 @@ class TestCatalogContent:
     @pytest.mark.skipif(not HDF5_AVAILABLE, reason="h5py not available")
     def test_reference_catalog_properties(self, reference_catalog_path):
         """Test basic properties of reference catalog."""
-        ref_data = load_hdf5_datasets(reference_catalog_path)
+        ref_meta = load_hdf5_metadata(reference_catalog_path)
         
         # Basic sanity checks
-        assert len(ref_data) > 0, "Reference catalog is empty"
+        assert len(ref_meta) > 0, "Reference catalog is empty"
         
         # Check that we have galaxy-related data (actual structure uses 'galaxies/' prefix)
-        found_datasets = list(ref_data.keys())
+        found_datasets = list(ref_meta.keys())
         
         print(f"\nFound datasets in reference catalog: {found_datasets}")
         
@@ -238,11 +456,12 @@ class TestCatalogContent:
         galaxy_datasets = [name for name in found_datasets if name.startswith('galaxies/')]
         assert len(galaxy_datasets) > 0, f"No galaxy datasets found in reference catalog. Available: {found_datasets}"
         
-        # Check data ranges are reasonable
-        for name, data in ref_data.items():
-            if np.issubdtype(data.dtype, np.floating):
-                assert np.all(np.isfinite(data)), f"Non-finite values found in {name}"
-                assert data.size > 0, f"Empty dataset: {name}"
+        # Check data ranges are reasonable; values are streamed chunk by chunk
+        for name, (shape, dtype) in ref_meta.items():
+            if np.issubdtype(dtype, np.floating):
+                assert np.prod(shape) > 0, f"Empty dataset: {name}"
+        non_finite = check_all_finite(reference_catalog_path)
+        assert not non_finite, f"Non-finite values found in {non_finite}"
     
     @pytest.mark.system
     @pytest.mark.slow
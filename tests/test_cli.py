@@ -9,11 +9,30 @@ from io import StringIO
 import pytest
 
 from covariance_mocks.cli import (
-    list_productions, wrap_with_config_resolution, main
+    list_productions, wrap_with_config_resolution, main, _resolve_config_cached
 )
 from covariance_mocks.production_config import ConfigurationError
 
 
+class _StubFunc:
+    """Plain callable recording its calls; much cheaper than Mock."""
+
+    def __init__(self, rv=0):
+        self.rv, self.calls = rv, []
+
+    def __call__(self, *args, **kwargs):
+        self.calls.append((args, kwargs))
+        return self.rv
+
+
+@pytest.fixture(autouse=True)
+def _clear_resolved_configs():
+    """Keep memoized config resolutions from leaking between tests."""
+    _resolve_config_cached.cache_clear()
+    yield
+    _resolve_config_cached.cache_clear()
+
+
 class TestListProductions:
     """Test list_productions function."""
     
@@ -114,6 +133,27 @@ class TestConfigResolutionWrapper:
         assert "Configuration error: Config not found" in error_output
         mock_func.assert_not_called()
 
+    @pytest.mark.unit
+    @patch('covariance_mocks.cli.resolve_config')
+    def test_config_resolution_cached(self, mock_resolve_config):
+        """Test that repeated names resolve once, until list clears the cache."""
+        mock_resolve_config.return_value = Path('config/productions/alpha.yaml')
+        wrapped_func = wrap_with_config_resolution(_StubFunc())
+
+        for _ in range(3):
+            args = Mock()
+            args.config = 'alpha'
+            wrapped_func(args)
+            assert args.config == Path('config/productions/alpha.yaml')
+        mock_resolve_config.assert_called_once_with('alpha')
+
+        with patch('covariance_mocks.cli.get_registry'), patch('sys.stdout', new_callable=StringIO):
+            list_productions(None)
+        args = Mock()
+        args.config = 'alpha'
+        wrapped_func(args)
+        assert mock_resolve_config.call_count == 2
+
 
 class TestMainFunction:
     """Test main CLI function."""
@@ -135,13 +175,13 @@ class TestMainFunction:
     @patch('sys.argv', ['production-manager', 'status', 'alpha'])
     def test_main_status_command(self, mock_wrap):
         """Test main function with status command."""
-        mock_wrapped_func = Mock(return_value=0)
-        mock_wrap.return_value = mock_wrapped_func
+        stub = _StubFunc()
+        mock_wrap.return_value = stub
         
         result = main()
         
         assert result == 0
-        mock_wrapped_func.assert_called_once()
+        assert len(stub.calls) == 1
     
     @pytest.mark.unit
     @patch('sys.argv', ['production-manager'])
@@ -157,29 +197,29 @@ class TestMainFunction:
     @patch('covariance_mocks.cli.wrap_with_config_resolution')
     def test_main_init_command(self, mock_wrap):
         """Test main function with init command."""
-        mock_wrapped_func = Mock(return_value=0)
-        mock_wrap.return_value = mock_wrapped_func
+        stub = _StubFunc()
+        mock_wrap.return_value = stub
         
         result = main()
         
         assert result == 0
-        mock_wrapped_func.assert_called_once()
+        assert len(stub.calls) == 1
     
     @pytest.mark.unit
     @patch('sys.argv', ['production-manager', 'monitor', 'alpha', '--interval', '30'])
     @patch('covariance_mocks.cli.wrap_with_config_resolution')
     def test_main_monitor_command_with_interval(self, mock_wrap):
         """Test main function with monitor command and interval."""
-        mock_wrapped_func = Mock(return_value=0)
-        mock_wrap.return_value = mock_wrapped_func
+        stub = _StubFunc()
+        mock_wrap.return_value = stub
         
         result = main()
         
         assert result == 0
-        mock_wrapped_func.assert_called_once()
+        assert len(stub.calls) == 1
         
         # Check that args were parsed correctly
-        args = mock_wrapped_func.call_args[0][0]
+        args = stub.calls[-1][0][0]
         assert args.interval == 30
         assert args.config == 'alpha'
     
@@ -188,15 +228,15 @@ class TestMainFunction:
     @patch('covariance_mocks.cli.wrap_with_config_resolution')
     def test_main_status_verbose(self, mock_wrap):
         """Test main function with status command and verbose flag."""
-        mock_wrapped_func = Mock(return_value=0)
-        mock_wrap.return_value = mock_wrapped_func
+        stub = _StubFunc()
+        mock_wrap.return_value = stub
         
         result = main()
         
         assert result == 0
         
         # Check that verbose flag was parsed correctly
-        args = mock_wrapped_func.call_args[0][0]
+        args = stub.calls[-1][0][0]
         assert args.verbose is True
     
     @pytest.mark.unit
@@ -204,15 +244,15 @@ class TestMainFunction:
     @patch('covariance_mocks.cli.wrap_with_config_resolution')
     def test_main_retry_with_submit(self, mock_wrap):
         """Test main function with retry command and submit flag."""
-        mock_wrapped_func = Mock(return_value=0)
-        mock_wrap.return_value = mock_wrapped_func
+        stub = _StubFunc()
+        mock_wrap.return_value = stub
         
         result = main()
         
         assert result == 0
         
         # Check that submit flag was parsed correctly
-        args = mock_wrapped_func.call_args[0][0]
+        args = stub.calls[-1][0][0]
         assert args.submit is True
     
     @pytest.mark.unit
@@ -220,15 +260,15 @@ class TestMainFunction:
     @patch('covariance_mocks.cli.wrap_with_config_resolution')
     def test_main_global_machine_option(self, mock_wrap):
         """Test main function with global machine option."""
-        mock_wrapped_func = Mock(return_value=0)
-        mock_wrap.return_value = mock_wrapped_func
+        stub = _StubFunc()
+        mock_wrap.return_value = stub
         
         result = main()
         
         assert result == 0
         
         # Check that machine option was parsed correctly
-        args = mock_wrapped_func.call_args[0][0]
+        args = stub.calls[-1][0][0]
         assert args.machine == 'local'
     
     @pytest.mark.unit
@@ -236,15 +276,15 @@ class TestMainFunction:
     @patch('covariance_mocks.cli.wrap_with_config_resolution')
     def test_main_global_work_dir_option(self, mock_wrap):
         """Test main function with global work-dir option."""
-        mock_wrapped_func = Mock(return_value=0)
-        mock_wrap.return_value = mock_wrapped_func
+        stub = _StubFunc()
+        mock_wrap.return_value = stub
         
         result = main()
         
         assert result == 0
         
         # Check that work-dir option was parsed correctly
-        args = mock_wrapped_func.call_args[0][0]
+        args = stub.calls[-1][0][0]
         assert args.work_dir == Path('/tmp/test')
 
 
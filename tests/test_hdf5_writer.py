@@ -0,0 +1,228 @@
+"""Unit tests for HDF5 Writer module."""
+
+import os
+import tempfile
+from collections import namedtuple
+
+import numpy as np
+import pytest
+
+h5py = pytest.importorskip("h5py")
+
+from covariance_mocks import hdf5_writer
+from covariance_mocks.hdf5_writer import (
+    write_single_hdf5, combine_mpi_files, write_parallel_mpiio, convert_mpiio_to_hdf5
+)
+
+
+def make_catalog(n_galaxies, n_halos, seed=0):
+    """Build a small galaxy catalog and matching halo arrays."""
+    rng = np.random.default_rng(seed)
+    galcat = {
+        'pos': rng.uniform(0, 500, (n_galaxies, 3)),
+        'vel': rng.normal(0, 300, (n_galaxies, 3)),
+        'logsm_t_obs': rng.uniform(8, 12, n_galaxies),
+        'upid': rng.integers(-1, 100, n_galaxies),
+        'z_obs': np.float64(1.1),
+        't_table': np.linspace(0.1, 13.8, 20),
+    }
+    halos = (
+        rng.uniform(10, 15, n_halos),
+        rng.uniform(0.1, 1.0, n_halos),
+        rng.uniform(0, 500, (n_halos, 3)),
+        rng.normal(0, 300, (n_halos, 3)),
+    )
+    return galcat, halos
+
+
+class TestWriteSingleHdf5:
+    """Test write_single_hdf5 function."""
+
+    @pytest.mark.unit
+    def test_write_round_trip(self):
+        """Test that galaxy and halo arrays are written unchanged."""
+        galcat, halos = make_catalog(50, 20)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output_path = os.path.join(tmp_dir, "sub", "mock.hdf5")
+            write_single_hdf5(galcat, *halos, output_path, 500.0, z_obs=1.1)
+
+            with h5py.File(output_path, 'r') as f:
+                np.testing.assert_array_equal(f['galaxies/pos'][...], galcat['pos'])
+                np.testing.assert_array_equal(f['galaxies/upid'][...], galcat['upid'])
+                np.testing.assert_array_equal(f['galaxies/t_table'][...], galcat['t_table'])
+                assert f['galaxies/z_obs'][()] == 1.1
+                np.testing.assert_array_equal(f['halos/pos'][...], halos[2])
+                assert f.attrs['n_galaxies'] == 50
+                assert f.attrs['n_halos'] == 20
+                assert f.attrs['redshift'] == "z1.100"
+                assert 'param_layout' not in f.attrs
+
+    @pytest.mark.unit
+    def test_quantize_positions(self, monkeypatch):
+        """Test that COVMOCK_QUANTIZE stores positions and velocities as float32."""
+        monkeypatch.setenv("COVMOCK_QUANTIZE", "1")
+        galcat, halos = make_catalog(50, 20)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output_path = os.path.join(tmp_dir, "mock.hdf5")
+            write_single_hdf5(galcat, *halos, output_path, 500.0, z_obs=1.1)
+
+            with h5py.File(output_path, 'r') as f:
+                assert f['galaxies/pos'].dtype == np.float32
+                assert f['galaxies/vel'].dtype == np.float32
+                assert f['halos/pos'].dtype == np.float32
+                assert f['galaxies/logsm_t_obs'].dtype == np.float64
+                assert f['galaxies/upid'].dtype == galcat['upid'].dtype
+                np.testing.assert_allclose(f['galaxies/pos'][...], galcat['pos'], rtol=1e-6)
+
+    @pytest.mark.unit
+    def test_gzip_compression(self, monkeypatch):
+        """Test that COVMOCK_COMPRESSION=gzip compresses arrays losslessly."""
+        monkeypatch.setenv("COVMOCK_COMPRESSION", "gzip")
+        galcat, halos = make_catalog(50, 20)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output_path = os.path.join(tmp_dir, "mock.hdf5")
+            write_single_hdf5(galcat, *halos, output_path, 500.0, z_obs=1.1)
+
+            with h5py.File(output_path, 'r') as f:
+                assert f['galaxies/pos'].compression == 'gzip'
+                assert f['galaxies/pos'].shuffle
+                assert f['halos/vel'].compression == 'gzip'
+                assert f['galaxies/z_obs'].compression is None
+                np.testing.assert_array_equal(f['galaxies/pos'][...], galcat['pos'])
+                np.testing.assert_array_equal(f['galaxies/upid'][...], galcat['upid'])
+
+    @pytest.mark.unit
+    def test_scaleoffset_positions(self, monkeypatch):
+        """Test that quantized, compressed positions keep three decimals."""
+        monkeypatch.setenv("COVMOCK_COMPRESSION", "gzip")
+        monkeypatch.setenv("COVMOCK_QUANTIZE", "1")
+        galcat, halos = make_catalog(50, 20)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output_path = os.path.join(tmp_dir, "mock.hdf5")
+            write_single_hdf5(galcat, *halos, output_path, 500.0, z_obs=1.1)
+
+            with h5py.File(output_path, 'r') as f:
+                assert f['galaxies/pos'].scaleoffset == 3
+                assert f['halos/pos'].scaleoffset == 3
+                assert f['galaxies/vel'].scaleoffset is None
+                np.testing.assert_allclose(f['galaxies/pos'][...], galcat['pos'], atol=1e-3)
+
+    @pytest.mark.unit
+    def test_structured_fields(self):
+        """Test that namedtuple fields are stacked, or split when ragged."""
+        Params = namedtuple("Params", ["a", "b"])
+        galcat, halos = make_catalog(50, 20)
+        galcat['mah_params'] = Params(np.arange(50.0), np.ones(50))
+        galcat['ragged'] = Params(np.arange(50.0), np.ones(3))
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output_path = os.path.join(tmp_dir, "mock.hdf5")
+            write_single_hdf5(galcat, *halos, output_path, 500.0, z_obs=1.1)
+
+            with h5py.File(output_path, 'r') as f:
+                assert f['galaxies/mah_params'].shape == (50, 2)
+                assert f.attrs['param_layout'] == 'row_major'
+                np.testing.assert_array_equal(f['galaxies/mah_params'][:, 0], np.arange(50.0))
+                np.testing.assert_array_equal(f['galaxies/ragged_a'][...], np.arange(50.0))
+                np.testing.assert_array_equal(f['galaxies/ragged_b'][...], np.ones(3))
+                assert 'galaxies/ragged' not in f
+
+
+class TestCombineMpiFiles:
+    """Test combine_mpi_files function."""
+
+    @pytest.mark.unit
+    def test_combine_rank_files(self):
+        """Test that rank files are stacked in rank order and cleaned up."""
+        catalogs = [make_catalog(n_gal, n_halo, seed)
+                    for seed, (n_gal, n_halo) in enumerate([(30, 10), (0, 5), (45, 12)])]
+        for galcat, _ in catalogs:
+            galcat['mah_params'] = np.stack([galcat['logsm_t_obs'], -galcat['logsm_t_obs']])
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output_path = os.path.join(tmp_dir, "mock.hdf5")
+            for rank, (galcat, halos) in enumerate(catalogs):
+                rank_path = os.path.join(tmp_dir, f"mock_rank{rank:04d}.hdf5")
+                write_single_hdf5(galcat, *halos, rank_path, 500.0, z_obs=1.1)
+
+            combine_mpi_files(output_path, len(catalogs))
+
+            with h5py.File(output_path, 'r') as f:
+                np.testing.assert_array_equal(
+                    f['galaxies/pos'][...],
+                    np.concatenate([galcat['pos'] for galcat, _ in catalogs])
+                )
+                np.testing.assert_array_equal(
+                    f['galaxies/logsm_t_obs'][...],
+                    np.concatenate([galcat['logsm_t_obs'] for galcat, _ in catalogs])
+                )
+                np.testing.assert_array_equal(
+                    f['galaxies/mah_params'][...],
+                    np.concatenate([galcat['mah_params'].T for galcat, _ in catalogs])
+                )
+                assert f.attrs['param_layout'] == 'row_major'
+                np.testing.assert_array_equal(
+                    f['halos/logmhost'][...],
+                    np.concatenate([halos[0] for _, halos in catalogs])
+                )
+                assert f['galaxies/z_obs'][()] == 1.1
+                assert f.attrs['n_galaxies'] == 75
+                assert f.attrs['n_halos'] == 27
+                assert f.attrs['mpi_combined']
+                assert f.attrs['redshift'] == "z1.100"
+
+            remaining = sorted(os.listdir(tmp_dir))
+            assert remaining == ["mock.hdf5"]
+
+
+class TestMpiioBackend:
+    """Test the raw MPI-IO writer and its HDF5 converter."""
+
+    @pytest.mark.unit
+    def test_mpiio_round_trip(self):
+        """Test that a converted MPI-IO catalog matches the input arrays."""
+        MPI = pytest.importorskip("mpi4py.MPI")
+        galcat, halos = make_catalog(50, 20)
+        galcat['mah_params'] = np.random.default_rng(1).normal(size=(4, 50))
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output_path = os.path.join(tmp_dir, "mock.hdf5")
+            write_parallel_mpiio(galcat, *halos, output_path, 0, 1, MPI.COMM_WORLD, 500.0, z_obs=1.1)
+            assert not os.path.exists(output_path)
+
+            assert convert_mpiio_to_hdf5(os.path.join(tmp_dir, "mock.json")) == output_path
+            with h5py.File(output_path, 'r') as f:
+                np.testing.assert_array_equal(f['galaxies/pos'][...], galcat['pos'])
+                np.testing.assert_array_equal(f['galaxies/upid'][...], galcat['upid'])
+                np.testing.assert_array_equal(f['galaxies/t_table'][...], galcat['t_table'])
+                np.testing.assert_array_equal(f['galaxies/mah_params'][...], galcat['mah_params'].T)
+                np.testing.assert_array_equal(f['halos/vel'][...], halos[3])
+                assert f['galaxies/z_obs'][()] == 1.1
+                assert f.attrs['n_galaxies'] == 50
+                assert f.attrs['n_halos'] == 20
+                assert f.attrs['param_layout'] == 'row_major'
+
+
+class TestFileAccessCache:
+    """Test the cached MPI-IO hints and file-access keywords."""
+
+    @pytest.mark.unit
+    def test_fapl_reused_per_comm(self, monkeypatch):
+        """Test that hints are built once per communicator and tuning."""
+        MPI = pytest.importorskip("mpi4py.MPI")
+        monkeypatch.setattr(hdf5_writer, "_FAPL_CACHE", {})
+        monkeypatch.delenv("COVMOCK_HDF5_ALIGN", raising=False)
+
+        info, kwargs = hdf5_writer._get_fapl(MPI.COMM_WORLD)
+        assert hdf5_writer._get_fapl(MPI.COMM_WORLD)[0] is info
+        assert kwargs == {}
+
+        monkeypatch.setenv("COVMOCK_HDF5_ALIGN", "1048576")
+        retuned_info, retuned_kwargs = hdf5_writer._get_fapl(MPI.COMM_WORLD)
+        assert retuned_info is not info
+        assert retuned_kwargs['alignment_interval'] == 1048576
+        hdf5_writer._clear_fapl_cache()
@@ -12,6 +12,7 @@ from tests.integration_core import (
     build_srun_command,
     get_script_dir,
     load_environment,
+    _load_environment_cached,
     parse_shell_args,
     run_galaxy_generation,
     run_plotting,
@@ -146,6 +147,14 @@ class TestSrunCommand:
 class TestEnvironmentLoading:
     """Test environment loading."""
     
+    @pytest.fixture(autouse=True)
+    def fresh_environment_cache(self, monkeypatch):
+        """Start each test outside the loaded environment with an empty cache."""
+        monkeypatch.delenv("CONDA_ENV", raising=False)
+        _load_environment_cached.cache_clear()
+        yield
+        _load_environment_cached.cache_clear()
+    
     @pytest.mark.unit
     @patch('subprocess.run')
     def test_load_environment_success(self, mock_run):
@@ -172,6 +181,40 @@ class TestEnvironmentLoading:
         
         with pytest.raises(RuntimeError, match="Failed to load environment"):
             load_environment()
+    
+    @pytest.mark.unit
+    @patch('subprocess.run')
+    def test_load_environment_cached(self, mock_run, monkeypatch):
+        """Test that bash is forked once, and not at all inside the environment."""
+        mock_run.return_value = Mock(returncode=0, stdout="PATH=/test/path\n")
+        
+        env_vars = load_environment()
+        env_vars["PATH"] = "/changed"
+        assert load_environment() == {"PATH": "/test/path"}
+        mock_run.assert_called_once()
+        
+        monkeypatch.setenv("CONDA_ENV", "/test/conda")
+        assert load_environment()["CONDA_ENV"] == "/test/conda"
+        mock_run.assert_called_once()
+    
+    @pytest.mark.unit
+    @patch('subprocess.run')
+    def test_load_environment_literal_exports(self, mock_run, tmp_path):
+        """Test that an export-only script is parsed without bash."""
+        script = tmp_path / "load_env.sh"
+        script.write_text('#!/bin/bash\n# comment\nexport A=1\nexport B="two words"  # note\n')
+        
+        env_vars = _load_environment_cached(str(script), 0)
+        assert env_vars["A"] == "1"
+        assert env_vars["B"] == "two words"
+        assert env_vars["PATH"] == os.environ["PATH"]
+        mock_run.assert_not_called()
+        
+        # Anything bash must evaluate falls back to sourcing the script
+        script.write_text('export A=1\nexport B="$A"\n')
+        mock_run.return_value = Mock(returncode=0, stdout="A=1\nB=1\n")
+        assert _load_environment_cached(str(script), 1) == {"A": "1", "B": "1"}
+        mock_run.assert_called_once()
 
 
 class TestPipelineExecution:
@@ -1,5 +1,7 @@
 """Tests for production manager functionality."""
 
+import io
+import time
 import pytest
 import tempfile
 import sqlite3
@@ -12,7 +14,11 @@ from covariance_mocks.production_manager import (
     JobDatabase,
     JobSpec,
     BatchSpec,
-    JobStatus
+    JobStatus,
+    SqueuePoller,
+    _probe_outputs,
+    _load_config_cached,
+    _dump_config_cached
 )
 
 
@@ -164,6 +170,152 @@ class TestJobDatabase:
         assert stats["running"] == 1
         assert stats["completed"] == 1
         assert stats["failed"] == 1
+    
+    def test_bulk_insert(self, temp_work_dir):
+        """Test inserting many jobs in one transaction."""
+        db_path = temp_work_dir / "test.db"
+        db = JobDatabase(db_path)
+        
+        jobs = [JobSpec(f"job_{i:03d}", i, 1.0, f"/tmp/out{i}.hdf5") for i in range(50)]
+        jobs[0].status = JobStatus.MISSING_INPUT
+        db.insert_jobs(jobs)
+        
+        stats = db.get_production_stats()
+        assert stats["pending"] == 49
+        assert stats["missing_input"] == 1
+        
+        # Re-inserting replaces rows rather than duplicating them
+        db.insert_jobs(jobs[:10])
+        assert sum(db.get_production_stats().values()) == 50
+    
+    def test_bulk_update_status(self, temp_work_dir):
+        """Test updating status and extra fields for many jobs at once."""
+        db_path = temp_work_dir / "test.db"
+        db = JobDatabase(db_path)
+        db.insert_jobs([JobSpec(f"job_{i:03d}", i, 1.0, f"/tmp/out{i}.hdf5") for i in range(3)])
+        
+        db.bulk_update_status(
+            [(JobStatus.QUEUED.value, 500 + i, 1, f"job_{i:03d}") for i in range(2)],
+            fields=("slurm_job_id", "submit_count")
+        )
+        
+        queued = db.get_jobs_by_status(JobStatus.QUEUED)
+        assert [job.slurm_job_id for job in queued] == [500, 501]
+        assert all(job.submit_count == 1 for job in queued)
+        assert len(db.get_jobs_by_status(JobStatus.PENDING)) == 1
+    
+    def test_iter_jobs_by_status(self, temp_work_dir):
+        """Test the generator variant of get_jobs_by_status."""
+        db_path = temp_work_dir / "test.db"
+        db = JobDatabase(db_path)
+        db.insert_jobs([JobSpec(f"job_{i:03d}", i, 1.0, f"/tmp/out{i}.hdf5") for i in range(3)])
+        db.update_job_status("job_001", JobStatus.RUNNING)
+        
+        jobs = db.iter_jobs_by_status(JobStatus.PENDING)
+        assert not isinstance(jobs, list)
+        assert [job.job_id for job in jobs] == ["job_000", "job_002"]
+        assert [job.job_id for job in db.iter_jobs_by_status(JobStatus.RUNNING)] == ["job_001"]
+    
+    def test_squeue_snapshot_join(self, temp_work_dir):
+        """Test promoting running jobs and listing jobs that left the queue."""
+        db_path = temp_work_dir / "test.db"
+        db = JobDatabase(db_path)
+        db.insert_jobs([
+            JobSpec("job_000", 0, 1.0, "/tmp/out0.hdf5", JobStatus.QUEUED, slurm_job_id=100),
+            JobSpec("job_001", 1, 1.0, "/tmp/out1.hdf5", JobStatus.QUEUED, slurm_job_id=101),
+            JobSpec("job_002", 2, 1.0, "/tmp/out2.hdf5", JobStatus.RUNNING, slurm_job_id=102),
+            JobSpec("job_003", 3, 1.0, "/tmp/out3.hdf5"),
+        ])
+        assert sorted(db.iter_active_slurm_ids()) == [100, 101, 102]
+        
+        db.load_squeue_snapshot({100: "RUNNING", 101: "PENDING"}, "2026-01-01T00:00:00")
+        
+        running = db.get_jobs_by_status(JobStatus.RUNNING)
+        assert [job.job_id for job in running] == ["job_000", "job_002"]
+        assert running[0].started_at == "2026-01-01T00:00:00"
+        assert sorted(job_id for job_id, *_ in db.iter_jobs_off_queue()) == ["job_002", "job_003"]
+        
+        db.load_squeue_snapshot({}, "2026-01-01T00:00:00")
+        assert len(list(db.iter_jobs_off_queue())) == 4
+    
+    def test_status_counts(self, temp_work_dir):
+        """Test that trigger-maintained counts track inserts, replaces and updates."""
+        db_path = temp_work_dir / "test.db"
+        db = JobDatabase(db_path)
+        db.insert_jobs([JobSpec(f"job_{i:03d}", i, 1.0, f"/tmp/out{i}.hdf5") for i in range(3)])
+        db.insert_job(JobSpec("job_000", 0, 1.0, "/tmp/out0.hdf5", JobStatus.FAILED))
+        db.bulk_update_status([(JobStatus.RUNNING.value, "job_001"), (JobStatus.RUNNING.value, "job_001")])
+        
+        stats = db.get_production_stats()
+        assert (stats["pending"], stats["running"], stats["failed"]) == (1, 1, 1)
+        assert db.count_jobs() == 3
+        
+        # Databases created before the counts table are seeded on open
+        db._conn.executescript("DROP TABLE status_counts")
+        db.close()
+        assert JobDatabase(db_path).get_production_stats() == stats
+    
+    def test_batch_jobs_join(self, temp_work_dir):
+        """Test that batch membership is queryable through the join table."""
+        db_path = temp_work_dir / "test.db"
+        db = JobDatabase(db_path)
+        db.insert_jobs([JobSpec(f"job_{i:03d}", i, 1.0, f"/tmp/out{i}.hdf5") for i in range(4)])
+        db.insert_batch(BatchSpec("batch_0000", ["job_000", "job_001"]))
+        db.insert_batch(BatchSpec("batch_0001", ["job_003", "job_002"]))
+        db.update_job_status("job_001", JobStatus.STAGED)
+        
+        assert [job.job_id for job in db.get_batch_jobs("batch_0000")] == ["job_000", "job_001"]
+        assert [job.job_id for job in db.get_batch_jobs("batch_0001")] == ["job_003", "job_002"]
+        staged = db.get_batch_jobs("batch_0000", JobStatus.STAGED)
+        assert [job.job_id for job in staged] == ["job_001"]
+        assert db.get_batch_ids_with_jobs(JobStatus.PENDING, JobStatus.STAGED) == ["batch_0000"]
+        
+        db.update_jobs_in_batch("batch_0001", JobStatus.QUEUED, only_status=JobStatus.PENDING,
+                                count_submission=True, slurm_job_id=42)
+        queued = db.get_batch_jobs("batch_0001", JobStatus.QUEUED)
+        assert [(job.slurm_job_id, job.submit_count) for job in queued] == [(42, 1), (42, 1)]
+        
+        # Databases written before the join table are backfilled on open
+        db._conn.execute("DELETE FROM batch_jobs")
+        db.close()
+        reopened = JobDatabase(db_path)
+        assert len(reopened.get_batch_jobs("batch_0001")) == 2
+    
+    def test_batch_job_ids_encoding(self, temp_work_dir):
+        """Test batch job ids round-trip, including legacy JSON rows."""
+        db_path = temp_work_dir / "test.db"
+        db = JobDatabase(db_path)
+        db.insert_batch(BatchSpec("batch_0000", ["r0000_z1.000", "r0001_z1.000"]))
+        db.insert_batch(BatchSpec("batch_0001", []))
+        db._conn.execute(
+            "INSERT INTO batches (batch_id, job_ids, status, created_at) VALUES (?, ?, ?, ?)",
+            ("batch_0002", '["r0002_z1.000"]', "pending", "2026-01-01T00:00:00")
+        )
+        
+        batches = {batch.batch_id: batch.job_ids for batch in db.get_batches_by_status(JobStatus.PENDING)}
+        assert batches == {
+            "batch_0000": ["r0000_z1.000", "r0001_z1.000"],
+            "batch_0001": [],
+            "batch_0002": ["r0002_z1.000"],
+        }
+    
+    def test_shared_connection(self, temp_work_dir):
+        """Test that the database keeps one WAL-mode connection until closed."""
+        db_path = temp_work_dir / "test.db"
+        db = JobDatabase(db_path)
+        
+        journal_mode = db._conn.execute("PRAGMA journal_mode").fetchone()[0]
+        assert journal_mode == "wal"
+        
+        db.insert_job(JobSpec("job_001", 0, 1.0, "/tmp/out1.hdf5"))
+        
+        # Writes are visible to other connections immediately (autocommit)
+        with sqlite3.connect(db_path) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0] == 1
+        
+        db.close()
+        db.close()
+        assert db._conn is None
 
 
 class TestProductionManager:
@@ -195,6 +347,25 @@ class TestProductionManager:
         config_file = temp_work_dir / "metadata" / "production_config.yaml"
         assert config_file.exists()
     
+    @patch('covariance_mocks.production_manager.ProductionConfigLoader')
+    def test_config_load_cached(self, mock_loader, temp_config_file, temp_work_dir, test_production_config):
+        """Test that repeated instantiation reuses the parsed and saved config."""
+        _load_config_cached.cache_clear()
+        _dump_config_cached.cache_clear()
+        mock_loader_instance = MagicMock()
+        mock_loader_instance.load_production_config.return_value = test_production_config
+        mock_loader.return_value = mock_loader_instance
+        
+        manager = ProductionManager(temp_config_file, "test_machine", temp_work_dir)
+        saved = manager.metadata_dir / "production_config.yaml"
+        saved_mtime = saved.stat().st_mtime_ns
+        manager.config["production"]["name"] = "mutated"
+        
+        manager = ProductionManager(temp_config_file, "test_machine", temp_work_dir)
+        assert mock_loader_instance.load_production_config.call_count == 1
+        assert manager.config == test_production_config
+        assert saved.stat().st_mtime_ns == saved_mtime
+    
     @patch('covariance_mocks.production_manager.ProductionConfigLoader')
     @patch('covariance_mocks.production_manager.realization_runnable', return_value=True)
     def test_production_initialization(self, mock_runnable, mock_loader, temp_config_file, temp_work_dir, test_production_config):
@@ -224,18 +395,31 @@ class TestProductionManager:
             "r0003_z1.000", "r0003_z2.000"
         }
         assert job_ids == expected_ids
+        
+        # Re-initializing keeps existing jobs and their progress
+        manager.job_db.update_job_status("r0000_z1.000", JobStatus.COMPLETED)
+        assert manager.initialize_production() == 0
+        assert manager.job_db.get_production_stats()["completed"] == 1
     
+    @patch('covariance_mocks.production_manager.realization_runnable', return_value=True)
     @patch('covariance_mocks.production_manager.ProductionConfigLoader')
     @patch('subprocess.run')
-    def test_submit_pending_jobs(self, mock_subprocess, mock_loader, temp_config_file, temp_work_dir, test_production_config):
+    def test_submit_pending_jobs(self, mock_subprocess, mock_loader, mock_runnable, temp_config_file, temp_work_dir, test_production_config):
         """Test job submission to SLURM."""
         # Mock config loader
         mock_loader_instance = MagicMock()
         mock_loader_instance.load_production_config.return_value = test_production_config
         mock_loader.return_value = mock_loader_instance
         
-        # Mock subprocess (sbatch)
-        mock_subprocess.return_value.stdout = "Submitted batch job 12345\n"
+        # Mock subprocess, answering git (status at init) and sbatch separately
+        def run(argv, *args, **kwargs):
+            result = MagicMock(returncode=0, stdout="")
+            if argv[0] == "git":
+                result.stdout = "# branch.oid abc123\0# branch.head main\0"
+            elif argv[0] == "sbatch":
+                result.stdout = "12345\n"
+            return result
+        mock_subprocess.side_effect = run
         
         # Create manager and initialize
         manager = ProductionManager(temp_config_file, "test_machine", temp_work_dir)
@@ -248,12 +432,124 @@ class TestProductionManager:
         assert len(submitted_batches) == 4
         
         # Check that sbatch was called for each batch
-        assert mock_subprocess.call_count == 4
+        sbatch_calls = [c for c in mock_subprocess.call_args_list if c[0][0][0] == "sbatch"]
+        assert len(sbatch_calls) == 4
         
         # Check that jobs were marked as queued
         queued_jobs = manager.job_db.get_jobs_by_status(JobStatus.QUEUED)
         assert len(queued_jobs) == 8
     
+    @patch('covariance_mocks.production_manager.ProductionConfigLoader')
+    @patch('subprocess.run')
+    def test_submit_parsable(self, mock_subprocess, mock_loader, temp_config_file, temp_work_dir, test_production_config):
+        """Test parsing the job id from sbatch --parsable output."""
+        mock_loader_instance = MagicMock()
+        mock_loader_instance.load_production_config.return_value = test_production_config
+        mock_loader.return_value = mock_loader_instance
+        
+        manager = ProductionManager(temp_config_file, "test_machine", temp_work_dir)
+        script_path = temp_work_dir / "batch.sh"
+        
+        mock_subprocess.return_value.stdout = "12345;perlmutter\n"
+        assert manager._submit_slurm_batch_script(script_path) == 12345
+        assert mock_subprocess.call_args[0][0] == ["sbatch", "--parsable", str(script_path)]
+        
+        mock_subprocess.return_value.stdout = "sbatch: error\n"
+        with pytest.raises(RuntimeError):
+            manager._submit_slurm_batch_script(script_path)
+        
+        # Back-to-back submissions wait out the configured stagger
+        manager.config["execution"]["submit_stagger_s"] = 30
+        manager._next_submit = 0.0
+        mock_subprocess.return_value.stdout = "12346\n"
+        with patch('covariance_mocks.production_manager.time.sleep') as mock_sleep:
+            manager._submit_slurm_batch_script(script_path)
+            manager._submit_slurm_batch_script(script_path)
+        assert mock_sleep.call_count == 1
+        assert 29 < mock_sleep.call_args[0][0] <= 30
+    
+    @patch('covariance_mocks.production_manager.ProductionConfigLoader')
+    @patch('subprocess.run')
+    def test_submit_staged_jobs(self, mock_subprocess, mock_loader, temp_config_file, temp_work_dir, test_production_config):
+        """Test concurrent submission of staged batches."""
+        mock_loader_instance = MagicMock()
+        mock_loader_instance.load_production_config.return_value = test_production_config
+        mock_loader.return_value = mock_loader_instance
+        
+        manager = ProductionManager(temp_config_file, "test_machine", temp_work_dir)
+        jobs = [JobSpec(f"job_{i:03d}", i, 1.0, f"/tmp/out{i}.hdf5", JobStatus.STAGED) for i in range(4)]
+        manager.job_db.insert_jobs(jobs)
+        for i, job in enumerate(jobs[:3]):
+            manager.job_db.insert_batch(BatchSpec(f"batch_{i:04d}", [job.job_id], status=JobStatus.STAGED))
+            (manager.logs_dir / f"batch_{i:04d}.sh").touch()
+        manager.job_db.insert_batch(BatchSpec("batch_0003", ["job_003"], status=JobStatus.STAGED))
+        
+        # Job id derived from the script name, whatever order the threads run in
+        def sbatch(args, **kwargs):
+            return MagicMock(stdout=f"{500 + int(Path(args[-1]).stem[-4:])}\n")
+        mock_subprocess.side_effect = sbatch
+        
+        assert manager.submit_staged_jobs() == ["batch_0000", "batch_0001", "batch_0002"]
+        queued = {job.job_id: job.slurm_job_id for job in manager.job_db.get_jobs_by_status(JobStatus.QUEUED)}
+        assert queued == {"job_000": 500, "job_001": 501, "job_002": 502}
+        failed = manager.job_db.get_jobs_by_status(JobStatus.FAILED)
+        assert failed[0].job_id == "job_003"
+        assert "Batch script not found" in failed[0].error_message
+    
+    @patch('covariance_mocks.production_manager.ProductionConfigLoader')
+    @patch('covariance_mocks.production_manager.realization_runnable', return_value=True)
+    @patch('subprocess.run')
+    def test_redshift_arrays_split(self, mock_subprocess, mock_runnable, mock_loader, temp_config_file, temp_work_dir, test_production_config):
+        """Test that arrays larger than MaxArraySize are split into consecutive arrays."""
+        mock_loader_instance = MagicMock()
+        mock_loader_instance.load_production_config.return_value = test_production_config
+        mock_loader.return_value = mock_loader_instance
+        
+        manager = ProductionManager(temp_config_file, "test_machine", temp_work_dir)
+        manager.config["execution"]["max_concurrent_array_tasks"] = 4
+        manager.job_db.insert_jobs([JobSpec(f"job_{i:03d}", i, 1.0, f"/tmp/out{i}") for i in range(5)])
+        
+        def slurm(args, **kwargs):
+            if args[0] == "scontrol":
+                return MagicMock(stdout="MaxArraySize            = 2\nMaxJobCount = 10000\n")
+            return MagicMock(stdout=f"{600 + mock_subprocess.call_count}\n")
+        mock_subprocess.side_effect = slurm
+        
+        submitted = manager.submit_redshift_arrays([1.0], skip_done=False)
+        assert [n_tasks for _, n_tasks, _ in submitted] == [2, 2, 1]
+        assert manager._get_max_array_size() == 2
+        assert len(manager.job_db.get_batches_by_status(JobStatus.QUEUED)) == 3
+        queued = {job.job_id: job.slurm_job_id for job in manager.job_db.get_jobs_by_status(JobStatus.QUEUED)}
+        assert [queued[f"job_{i:03d}"] for i in range(5)] == [sid for _, n, sid in submitted for _ in range(n)]
+        
+        # Each part's parameter file holds only its own tasks, throttled by %N
+        script = max(manager.logs_dir.glob("*_p0.sh"))
+        assert "#SBATCH --array=0-1%4\n" in script.read_text()
+        params = script.with_suffix(".csv").read_text().splitlines()
+        assert [line.split(",")[0] for line in params] == ["job_000", "job_001"]
+    
+    @patch('covariance_mocks.production_manager.ProductionConfigLoader')
+    def test_array_tasks_per_job(self, mock_loader, temp_config_file, temp_work_dir, test_production_config):
+        """Test that bundled jobs shrink the array and extend the walltime."""
+        mock_loader_instance = MagicMock()
+        mock_loader_instance.load_production_config.return_value = test_production_config
+        mock_loader.return_value = mock_loader_instance
+        
+        manager = ProductionManager(temp_config_file, "test_machine", temp_work_dir)
+        manager.config["execution"]["tasks_per_job"] = 2
+        manager._max_array_size = 2
+        assert manager._max_jobs_per_array() == 4
+        
+        jobs = [JobSpec(f"job_{i:03d}", i, 1.0, f"/tmp/out{i}") for i in range(3)]
+        script = manager._create_slurm_batch_script(BatchSpec("batch_0000", [j.job_id for j in jobs]), jobs)
+        content = script.read_text()
+        assert "#SBATCH --array=0-1\n" in content
+        assert "#SBATCH --time=120:00\n" in content
+        assert "TASKS_PER_JOB=2\n" in content
+        assert "#SBATCH --output=" + str(manager.logs_dir / "batch_0000.out") in content
+        assert "#SBATCH --open-mode=append\n" in content
+        assert script.stat().st_mode & 0o100
+    
     @patch('covariance_mocks.production_manager.ProductionConfigLoader')
     def test_retry_failed_jobs(self, mock_loader, temp_config_file, temp_work_dir, test_production_config):
         """Test retrying failed jobs."""
@@ -284,12 +580,176 @@ class TestProductionManager:
         # Check that jobs were marked as pending
         pending_jobs = manager.job_db.get_jobs_by_status(JobStatus.PENDING)
         assert len(pending_jobs) == 2
+        assert all(job.error_message is None for job in pending_jobs)
         
         # Third job should still be failed
         failed_jobs = manager.job_db.get_jobs_by_status(JobStatus.FAILED)
         assert len(failed_jobs) == 1
         assert failed_jobs[0].job_id == "job_003"
     
+    @patch('covariance_mocks.production_manager.ProductionConfigLoader')
+    def test_check_job_status(self, mock_loader, temp_config_file, temp_work_dir, test_production_config):
+        """Test that queue, accounting and output state update active jobs."""
+        mock_loader_instance = MagicMock()
+        mock_loader_instance.load_production_config.return_value = test_production_config
+        mock_loader.return_value = mock_loader_instance
+        
+        manager = ProductionManager(temp_config_file, "test_machine", temp_work_dir)
+        
+        done_path = temp_work_dir / "done.hdf5"
+        done_path.touch()
+        missing_path = str(temp_work_dir / "missing.hdf5")
+        manager.job_db.insert_jobs([
+            JobSpec("job_001", 0, 1.0, missing_path, JobStatus.QUEUED, slurm_job_id=101),
+            JobSpec("job_002", 1, 1.0, str(done_path), JobStatus.RUNNING, slurm_job_id=102),
+            JobSpec("job_003", 2, 1.0, missing_path, JobStatus.RUNNING, slurm_job_id=103),
+            JobSpec("job_004", 3, 1.0, missing_path, JobStatus.PENDING),
+        ])
+        
+        squeue = MagicMock(stdout="101,RUNNING\n")
+        sacct = {102: ("COMPLETED", "0:0"), 103: ("TIMEOUT", "0:0")}
+        with patch('covariance_mocks.production_manager.subprocess.run', return_value=squeue), \
+             patch.object(manager, '_query_sacct_states', return_value=sacct):
+            stats = manager.check_job_status()
+        
+        assert stats["running"] == 1
+        assert stats["completed"] == 1
+        assert stats["failed"] == 1
+        assert stats["pending"] == 1
+        failed = manager.job_db.get_jobs_by_status(JobStatus.FAILED)
+        assert failed[0].job_id == "job_003"
+        assert failed[0].error_message == "SLURM state TIMEOUT (exit 0:0)"
+        assert manager.job_db.get_jobs_by_status(JobStatus.RUNNING)[0].started_at is not None
+    
+    def test_probe_outputs(self, temp_work_dir):
+        """Test output probing by directory listing and by single stat."""
+        (temp_work_dir / "a.hdf5").touch()
+        (temp_work_dir / "b.hdf5").touch()
+        parent = str(temp_work_dir)
+        
+        assert _probe_outputs((parent, [("j1", "a.hdf5"), ("j2", "c.hdf5")])) >= {"a.hdf5", "b.hdf5"}
+        assert _probe_outputs((parent, [("j1", "b.hdf5")])) == {"b.hdf5"}
+        assert _probe_outputs((parent, [("j1", "c.hdf5")])) == frozenset()
+        assert _probe_outputs((str(temp_work_dir / "nope"), [("j1", "a"), ("j2", "b")])) == frozenset()
+    
+    @patch('covariance_mocks.production_manager.ProductionConfigLoader')
+    def test_done_markers(self, mock_loader, temp_config_file, temp_work_dir, test_production_config):
+        """Test that completion markers stand in for output-path checks."""
+        mock_loader_instance = MagicMock()
+        mock_loader_instance.load_production_config.return_value = test_production_config
+        mock_loader.return_value = mock_loader_instance
+        
+        manager = ProductionManager(temp_config_file, "test_machine", temp_work_dir)
+        
+        missing_path = str(temp_work_dir / "missing.hdf5")
+        jobs = [
+            JobSpec("job_001", 0, 1.0, missing_path, JobStatus.QUEUED, slurm_job_id=101),
+            JobSpec("job_002", 1, 1.0, missing_path, JobStatus.QUEUED, slurm_job_id=102),
+        ]
+        manager.job_db.insert_jobs(jobs)
+        (manager.done_dir / "job_001.done").touch()
+        
+        script_path = manager._create_slurm_batch_script(BatchSpec("batch_0000", ["job_001"]), jobs[:1])
+        assert f'touch "{manager.done_dir}/job_001.done"' in script_path.read_text()
+        
+        with patch('covariance_mocks.production_manager.subprocess.run', return_value=MagicMock(stdout="")), \
+             patch.object(manager, '_query_sacct_states', return_value=None):
+            stats = manager.check_job_status()
+        
+        assert stats["completed"] == 1
+        assert manager.job_db.get_jobs_by_status(JobStatus.COMPLETED)[0].job_id == "job_001"
+    
+    @patch('covariance_mocks.production_manager.ProductionConfigLoader')
+    def test_squeue_snapshot_cached(self, mock_loader, temp_config_file, temp_work_dir, test_production_config):
+        """Test that squeue is scoped to known jobs and reused within the TTL."""
+        mock_loader_instance = MagicMock()
+        mock_loader_instance.load_production_config.return_value = test_production_config
+        mock_loader.return_value = mock_loader_instance
+        
+        manager = ProductionManager(temp_config_file, "test_machine", temp_work_dir)
+        
+        squeue = MagicMock(stdout="101,RUNNING\n102,PENDING\n")
+        with patch('covariance_mocks.production_manager.subprocess.run', return_value=squeue) as mock_run:
+            assert manager._get_squeue_snapshot([101, 102]) == {101: "RUNNING", 102: "PENDING"}
+            assert manager._get_squeue_snapshot([101]) == {101: "RUNNING", 102: "PENDING"}
+            assert mock_run.call_count == 1
+            assert "--jobs" in mock_run.call_args[0][0]
+            
+            # A job outside the cached snapshot forces a fresh query
+            manager._get_squeue_snapshot([101, 103])
+            assert mock_run.call_count == 2
+            
+            assert manager._get_squeue_snapshot([]) == {}
+            assert mock_run.call_count == 2
+    
+    @patch('covariance_mocks.production_manager.ProductionConfigLoader')
+    def test_squeue_chunked(self, mock_loader, temp_config_file, temp_work_dir, test_production_config):
+        """Test that squeue ids are split across calls and that a failing squeue yields no states."""
+        mock_loader_instance = MagicMock()
+        mock_loader_instance.load_production_config.return_value = test_production_config
+        mock_loader.return_value = mock_loader_instance
+        
+        manager = ProductionManager(temp_config_file, "test_machine", temp_work_dir)
+        
+        chunks = [MagicMock(stdout="101,RUNNING\n"), MagicMock(stdout="103,PENDING\n")]
+        with patch('covariance_mocks.production_manager._SQUEUE_CHUNK', 2), \
+             patch('covariance_mocks.production_manager.subprocess.run', side_effect=chunks) as mock_run:
+            assert manager._query_squeue([103, 101, 102]) == {101: "RUNNING", 103: "PENDING"}
+            assert [call[0][0][2] for call in mock_run.call_args_list] == ["101,102", "103"]
+        
+        with patch('covariance_mocks.production_manager.subprocess.run',
+                   side_effect=FileNotFoundError("squeue")):
+            assert manager._query_squeue([101]) == {}
+        with patch('covariance_mocks.production_manager.subprocess.run',
+                   side_effect=OSError(7, "Argument list too long")):
+            assert manager._query_squeue([101]) == {}
+    
+    @patch('covariance_mocks.production_manager.ProductionConfigLoader')
+    def test_sacct_batched(self, mock_loader, temp_config_file, temp_work_dir, test_production_config):
+        """Test that sacct is queried by id in chunks and reused within the TTL."""
+        mock_loader_instance = MagicMock()
+        mock_loader_instance.load_production_config.return_value = test_production_config
+        mock_loader.return_value = mock_loader_instance
+        
+        manager = ProductionManager(temp_config_file, "test_machine", temp_work_dir)
+        
+        chunks = [MagicMock(stdout="101|COMPLETED|0:0\n102|TIMEOUT|0:0\n"),
+                  MagicMock(stdout="103|CANCELLED by 42|0:15\n")]
+        with patch('covariance_mocks.production_manager._SACCT_CHUNK', 2), \
+             patch('covariance_mocks.production_manager.subprocess.run', side_effect=chunks) as mock_run:
+            states = manager._get_sacct_states([103, 101, 102])
+            assert states == {101: ("COMPLETED", "0:0"), 102: ("TIMEOUT", "0:0"),
+                              103: ("CANCELLED", "0:15")}
+            assert [call[0][0][2] for call in mock_run.call_args_list] == ["101,102", "103"]
+            
+            assert manager._get_sacct_states([101]) is states
+            assert manager._get_sacct_states([]) == {}
+            assert mock_run.call_count == 2
+    
+    @patch('covariance_mocks.production_manager.ProductionConfigLoader')
+    def test_squeue_poller(self, mock_loader, temp_config_file, temp_work_dir, test_production_config):
+        """Test that complete poller listings are served until a newer submission."""
+        mock_loader_instance = MagicMock()
+        mock_loader_instance.load_production_config.return_value = test_production_config
+        mock_loader.return_value = mock_loader_instance
+        
+        manager = ProductionManager(temp_config_file, "test_machine", temp_work_dir)
+        poller = SqueuePoller()
+        poller._thread = MagicMock(is_alive=MagicMock(return_value=True))
+        # Second iteration is incomplete (no trailing blank line) and not published
+        poller._consume(io.StringIO("101,RUNNING\n102,PENDING\n\n103,RUNNING\n"))
+        manager._squeue_poller = poller
+        
+        with patch('covariance_mocks.production_manager.subprocess.run') as mock_run:
+            assert manager._get_squeue_snapshot([101, 103]) == {101: "RUNNING"}
+            assert mock_run.call_count == 0
+            
+            # A submission after the listing falls back to a one-shot query
+            manager._last_submit = time.monotonic()
+            mock_run.return_value = MagicMock(stdout="103,PENDING\n")
+            assert manager._get_squeue_snapshot([103]) == {103: "PENDING"}
+            assert mock_run.call_count == 1
+    
     @patch('covariance_mocks.production_manager.ProductionConfigLoader')
     def test_production_summary(self, mock_loader, temp_config_file, temp_work_dir, test_production_config):
         """Test production summary generation."""